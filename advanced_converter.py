@@ -2,9 +2,38 @@
 import pandas as pd
 import numpy as np
 import openpyxl
-from openpyxl.utils import get_column_letter
 import re
 import html
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from conversion_metrics import NO_METRICS, ConversionMetrics, format_summary, profiled, report_path
+from number_formats import compile_number_format
+from markdown_writer import (DEFAULT_BUFFER_SIZE, ChunkedMarkdownWriter, MarkdownWriter, chunk_paths, open_output,
+                             replace_atomically)
+from workbook_reader import BINARY_FORMATS, ENGINES, open_workbook, parse_window, select_engine
+
+# Bump whenever the Markdown produced for the same workbook changes,
+# so that cached conversions are invalidated
+CONVERTER_VERSION = "3"
+
+# Suffix of the file recording the xlsx part checksums of an incremental conversion
+PARTS_MANIFEST_SUFFIX = ".parts.json"
+
+# Markdown escapes of cell text, applied in a single str.translate() pass:
+# pipes would break the table, asterisks, underscores and backticks would
+# start emphasis or code, and newlines become HTML line breaks
+ESCAPE_TABLE = str.maketrans({'|': '\\|', '*': '\\*', '_': '\\_', '`': '\\`', '\n': '<br>'})
+
+# Cell value types whose str() never contains a character to escape
+PLAIN_VALUE_TYPES = frozenset({int, float, bool, datetime.datetime, datetime.date, datetime.time,
+                               datetime.timedelta})
+
+# Number of escaped strings remembered per converter; the memo starts over when full
+MAX_MEMOIZED_STRINGS = 100000
 
 class AdvancedExcelConverter:
     """
@@ -12,91 +41,345 @@ class AdvancedExcelConverter:
     - Merged cells
     - Cell formatting (bold, italic, etc.)
     - Cell alignments
+    - Number formats (percentages, thousands separators, dates...)
     - Basic formula display
     - Cell colors and backgrounds (as notes in the Markdown)
     """
     
-    def __init__(self, excel_file):
-        """Initialize with Excel file path"""
+    def __init__(self, excel_file, engine='auto', formatting=True, metrics=None, include_formulas=None):
+        """
+        Initialize with Excel file path
+        
+        Parameters:
+        -----------
+        excel_file : str
+            Path to the Excel file (.xlsx, or .xls/.xlsb read with calamine)
+        engine : str, optional
+            Reader engine: 'openpyxl' (values, formulas and formatting),
+            'calamine' (values only, much faster) or 'auto' to pick one from
+            the options and the file size (see workbook_reader.select_engine)
+        formatting : bool, optional
+            Whether to render bold, italic, alignment and number formats.
+            Without formatting or formulas only raw values are needed, so the
+            faster engine can be used.
+        metrics : ConversionMetrics, optional
+            Record per-phase durations and counters of the workbook and of
+            each converted sheet (see conversion_metrics); the workbook
+            record is finished by close()
+        include_formulas : bool, optional
+            Whether the conversions will include formulas. None (default):
+            not known yet, so 'auto' keeps openpyxl, which reads them.
+        """
         self.excel_file = excel_file
-        self.workbook = openpyxl.load_workbook(excel_file, data_only=False)
-        self.workbook_data_only = openpyxl.load_workbook(excel_file, data_only=True)
+        self.formatting = formatting
+        self.metrics = metrics or NO_METRICS
+        # Cell string -> escaped text; shared strings make repeated values common
+        self._escaped = {}
+        if include_formulas is None:
+            # Formulas may still be asked for by the conversion calls
+            include_formulas = engine == 'auto'
+        self.engine = select_engine(excel_file, engine, values_only=not (formatting or include_formulas))
+        self._scope = self.metrics.start(excel_file)
+        try:
+            # Parses each sheet once (with openpyxl, keeping both formulas and cached values)
+            with self.metrics.phase('open'):
+                self.workbook = open_workbook(excel_file, self.engine)
+            # (bold, italic, alignment, number format) of every style id, resolved once per workbook
+            with self.metrics.phase('styles'):
+                self._style_table = self._build_style_table()
+        except BaseException:
+            self.metrics.finish(self._scope)
+            raise
+    
+    def close(self):
+        """Release the underlying workbook file"""
+        self.workbook.close()
+        self.metrics.finish(self._scope)
     
     def get_sheet_names(self):
         """Get all sheet names from the workbook"""
         return self.workbook.sheetnames
     
+    def _build_style_table(self):
+        """
+        Precompute the formatting of every cell style of the workbook
+        
+        Workbooks have a few hundred distinct styles at most, against possibly
+        millions of cells, so each style is resolved once and cells are then
+        formatted with a single list lookup on their style id. Many styles
+        share a number format code, and each distinct code is compiled only
+        once (see number_formats).
+        
+        Returns:
+        --------
+        list
+            style id -> (is_bold, is_italic, alignment, number_format), where
+            number_format renders a value as Excel displays it, or is None to
+            render the raw value
+        """
+        styles = self.workbook.cell_styles()
+        if not self.formatting:
+            # Plain values: no emphasis, the default alignment and raw values everywhere
+            return [(False, False, 'left', None)] * len(styles)
+        number_formats = {}
+        table = []
+        for font, alignment, format_code in styles:
+            if alignment.horizontal in ('center', 'right'):
+                align = alignment.horizontal
+            else:
+                align = 'left'  # Default
+            if format_code not in number_formats:
+                number_formats[format_code] = compile_number_format(format_code)
+            table.append((bool(font.bold), bool(font.italic), align, number_formats[format_code]))
+        return table
+    
     def _is_cell_bold(self, cell):
         """Check if a cell has bold formatting"""
-        return cell.font.bold
+        return self._style_table[cell.style_id][0]
     
     def _is_cell_italic(self, cell):
         """Check if a cell has italic formatting"""
-        return cell.font.italic
+        return self._style_table[cell.style_id][1]
     
     def _get_cell_alignment(self, cell):
         """Get cell alignment (left, center, right)"""
-        if cell.alignment.horizontal == 'center':
-            return 'center'
-        elif cell.alignment.horizontal == 'right':
-            return 'right'
-        else:
-            return 'left'  # Default
+        return self._style_table[cell.style_id][2]
     
     def _get_merged_cell_ranges(self, sheet):
         """Get all merged cell ranges in the sheet"""
         return sheet.merged_cells.ranges
     
-    def _is_cell_in_merged_range(self, cell_coord, merged_ranges):
-        """Check if a cell is part of a merged range"""
+    def _build_merged_index(self, merged_ranges, max_row, max_col):
+        """
+        Map every cell covered by a merged range to the range's top-left cell
+        
+        Built once per sheet so that lookups are a single dict access on
+        integer coordinates. Ranges are clipped to max_row/max_col, the part
+        of the sheet that is rendered.
+        
+        Returns:
+        --------
+        dict
+            (row, col) -> (anchor_row, anchor_col)
+        """
+        merged_index = {}
         for merged_range in merged_ranges:
-            if cell_coord in merged_range:
-                return merged_range
-        return None
+            anchor = (merged_range.min_row, merged_range.min_col)
+            for row_idx in range(merged_range.min_row, min(merged_range.max_row, max_row) + 1):
+                for col_idx in range(merged_range.min_col, min(merged_range.max_col, max_col) + 1):
+                    merged_index[(row_idx, col_idx)] = anchor
+        return merged_index
+    
+    def _escape_text(self, text):
+        """Escape the Markdown special characters of a cell string, memoizing the result"""
+        escaped = self._escaped.get(text)
+        if escaped is None:
+            escaped = text.translate(ESCAPE_TABLE)
+            if len(self._escaped) >= MAX_MEMOIZED_STRINGS:
+                self._escaped.clear()
+            self._escaped[text] = escaped
+        return escaped
+    
+    def _value_text(self, value, number_format=None):
+        """
+        Markdown text of a cell value, without emphasis
+        
+        Values are rendered with their compiled number format when they
+        have one. Other strings are escaped (and memoized); numbers,
+        booleans, dates and durations never contain a character to escape
+        and are only converted with str().
+        """
+        if value is None:
+            return ""
+        if number_format is not None:
+            text = number_format(value)
+            if text is not None:
+                # Padding for column alignment in Excel is meaningless in a Markdown table
+                return text.strip().translate(ESCAPE_TABLE)
+        value_type = type(value)
+        if value_type is str:
+            return self._escape_text(value)
+        if value_type in PLAIN_VALUE_TYPES:
+            return str(value)
+        return str(value).translate(ESCAPE_TABLE)
     
-    def _format_value(self, value, is_bold=False, is_italic=False):
+    def _format_row(self, cells, merged_index, include_formulas=False):
         """
-        Format cell value with Markdown styling
+        Format one table row as a Markdown line (without the trailing newline)
         
         Parameters:
         -----------
-        value : any
-            Cell value to format
-        is_bold : bool
-            Whether to apply bold formatting
-        is_italic : bool
-            Whether to apply italic formatting
+        cells : list
+            Cells of the row, one per output column
+        merged_index : dict
+            Merged cell index of the sheet (see _build_merged_index)
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
             
         Returns:
         --------
         str
-            Formatted value as Markdown
+            Markdown table row
         """
-        if value is None:
-            return ""
+        # Hot loop: attribute lookups are hoisted and strings take the memo directly
+        style_table = self._style_table
+        escaped = self._escaped
+        value_text = self._value_text
+        texts = []
+        for cell in cells:
+            # Check if this cell is part of a merged range
+            if merged_index:
+                anchor = merged_index.get((cell.row, cell.column))
+                if anchor and anchor != (cell.row, cell.column):
+                    # This is a continuation of a merged cell, leave it empty
+                    texts.append("")
+                    continue
             
-        # Convert to string and escape any Markdown special characters
-        value_str = str(value)
-        # Escape pipe characters to avoid breaking table structure
-        value_str = value_str.replace('|', '\\|')
-        # Escape asterisks to avoid unintended emphasis
-        value_str = value_str.replace('*', '\\*')
-        # Escape underscores to avoid unintended emphasis
-        value_str = value_str.replace('_', '\\_')
-        # Escape backticks to avoid unintended code blocks
-        value_str = value_str.replace('`', '\\`')
-        # Replace newlines with HTML line breaks
-        value_str = value_str.replace('\n', '<br>')
-        
-        # Apply formatting
-        if is_bold:
-            value_str = f"**{value_str}**"
-        if is_italic:
-            value_str = f"*{value_str}*"
+            value = cell.value
+            if value is None:
+                cell_text = ""
+            else:
+                is_bold, is_italic, _, number_format = style_table[cell.style_id]
+                if number_format is None and type(value) is str:
+                    cell_text = escaped.get(value)
+                    if cell_text is None:
+                        cell_text = self._escape_text(value)
+                else:
+                    cell_text = value_text(value, number_format)
+                if is_bold:
+                    cell_text = f"**{cell_text}**"
+                if is_italic:
+                    cell_text = f"*{cell_text}*"
             
-        return value_str
+            # Add formula as comment if requested
+            if include_formulas and cell.formula:
+                cell_text += f" <!-- Formula: {html.escape(cell.formula)} -->"
+            
+            texts.append(cell_text)
+        
+        if not texts:
+            return "| "
+        return "| " + " | ".join(texts) + " | "
     
-    def convert_sheet_to_markdown(self, sheet_name, include_formulas=False):
+    def _format_alignment_row(self, header_cells):
+        """Build the Markdown alignment row from the alignment of the header cells"""
+        md_row = "|"
+        for cell in header_cells:
+            align = self._get_cell_alignment(cell)
+            if align == 'center':
+                md_row += " :---: |"
+            elif align == 'right':
+                md_row += " ---: |"
+            else:
+                md_row += " :--- |"
+        return md_row
+    
+    def _iter_streamed_sheet(self, sheet_name, include_formulas=False, window=None):
+        """
+        Yield the Markdown lines of a sheet in one forward pass
+        
+        Rows are parsed, formatted and released one at a time, so memory stays
+        roughly constant whatever the number of rows. The table width is taken
+        from the sheet's dimension, verified against the cell references of the
+        part (see workbook_reader.SheetStream); it may include trailing empty
+        columns that the loaded mode would trim.
+        """
+        metrics = self.metrics
+        with metrics.phase('prescan'):
+            sheet = self.workbook.stream(sheet_name, window)
+        min_col, max_cols = sheet.min_column, sheet.max_column
+        with metrics.phase('merged_cells'):
+            merged_index = self._build_merged_index(self._get_merged_cell_ranges(sheet), sheet.max_row, max_cols)
+        header_done = False
+        row_count = 0
+        
+        for row_idx, row in metrics.timed(sheet.iter_rows(), 'parse', count_bytes=False):
+            # Skip completely empty rows (only the top-left cell of a merged range counts)
+            if not any((cell.value is not None or cell.formula is not None)
+                       and merged_index.get((row_idx, col_idx), (row_idx, col_idx)) == (row_idx, col_idx)
+                       for col_idx, cell in row.items()):
+                continue
+            
+            cells = [row.get(col_idx) or sheet.cell(row_idx, col_idx) for col_idx in range(min_col, max_cols + 1)]
+            row_count += 1
+            if not header_done:
+                # The first row with data is the header row
+                yield self._format_row(cells, merged_index) + "\n"
+                yield self._format_alignment_row(cells) + "\n"
+                header_done = True
+            else:
+                yield self._format_row(cells, merged_index, include_formulas) + "\n"
+        
+        metrics.count(rows=row_count, cells=row_count * (max_cols - min_col + 1))
+        if not header_done:
+            yield f"## {sheet_name}\n\n*Empty sheet*\n\n"
+    
+    def _iter_loaded_sheet(self, sheet_name, include_formulas=False, window=None):
+        """Yield the Markdown lines of a sheet loaded in memory"""
+        with self.metrics.phase('parse'):
+            sheet = self.workbook.load(sheet_name, window)
+        
+        # Rows with data and the table width were recorded while parsing
+        data_rows = sheet.data_rows
+        min_col, max_cols = sheet.min_column, sheet.max_data_column
+        
+        if not data_rows:
+            yield f"## {sheet_name}\n\n*Empty sheet*\n\n"
+            return
+        
+        min_row, max_row = data_rows[0], data_rows[-1]
+        with self.metrics.phase('merged_cells'):
+            merged_index = self._build_merged_index(self._get_merged_cell_ranges(sheet), max_row, max_cols)
+        self.metrics.count(rows=len(data_rows), cells=len(data_rows) * (max_cols - min_col + 1))
+        
+        # Create header row and alignment row
+        header_cells = [sheet.cell(min_row, col_idx) for col_idx in range(min_col, max_cols + 1)]
+        yield self._format_row(header_cells, merged_index) + "\n"
+        yield self._format_alignment_row(header_cells) + "\n"
+        
+        # Create data rows (completely empty rows are skipped)
+        for row_idx in data_rows[1:]:
+            cells = [sheet.cell(row_idx, col_idx) for col_idx in range(min_col, max_cols + 1)]
+            yield self._format_row(cells, merged_index, include_formulas) + "\n"
+    
+    def iter_sheet_markdown(self, sheet_name, include_formulas=False, streaming=False, window=None):
+        """
+        Yield the Markdown table of a sheet line by line
+        
+        Parameters:
+        -----------
+        sheet_name : str
+            Name of the sheet to convert
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read the sheet in one forward pass with constant memory
+            instead of loading it first
+        window : SheetWindow, optional
+            Only convert the cells inside this window (see
+            workbook_reader.parse_window); its first row holding data is the
+            header row. Reading stops once the window has been passed.
+            
+        Yields:
+        -------
+        str
+            Markdown lines of the sheet, newline included
+        """
+        self._check_formulas(include_formulas)
+        if streaming:
+            pieces = self._iter_streamed_sheet(sheet_name, include_formulas, window)
+        else:
+            pieces = self._iter_loaded_sheet(sheet_name, include_formulas, window)
+        if self.metrics.enabled:
+            return self._measure_sheet(sheet_name, pieces)
+        return pieces
+    
+    def _measure_sheet(self, sheet_name, pieces):
+        """Yield the pieces of a sheet, recording them in a sheet record of the metrics"""
+        with self.metrics.scope(sheet=sheet_name):
+            yield from self.metrics.timed(pieces, 'format')
+    
+    def convert_sheet_to_markdown(self, sheet_name, include_formulas=False, streaming=False, window=None):
         """
         Convert a specific sheet to Markdown with advanced formatting
         
@@ -106,109 +389,124 @@ class AdvancedExcelConverter:
             Name of the sheet to convert
         include_formulas : bool, optional
             Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read the sheet in one forward pass (see iter_sheet_markdown)
+        window : SheetWindow, optional
+            Only convert the cells inside this window (see iter_sheet_markdown)
             
         Returns:
         --------
         str
             Markdown representation of the sheet
         """
-        sheet = self.workbook[sheet_name]
-        sheet_data = self.workbook_data_only[sheet_name]
-        merged_ranges = self._get_merged_cell_ranges(sheet)
-        
-        # Find the actual data range (skip completely empty rows/columns)
-        data_rows = []
-        max_cols = 0
+        return "".join(self.iter_sheet_markdown(sheet_name, include_formulas, streaming, window))
+    
+    def _check_formulas(self, include_formulas):
+        """
+        Fail early when formulas are requested from an engine that cannot read them
         
-        for row_idx, row in enumerate(sheet.iter_rows(), 1):
-            row_has_data = False
-            for col_idx, cell in enumerate(row, 1):
-                if cell.value is not None:
-                    row_has_data = True
-                    max_cols = max(max_cols, col_idx)
-            if row_has_data:
-                data_rows.append(row_idx)
+        Binary workbooks (.xls, .xlsb) have no engine that reads formulas:
+        they are converted with their values only, like their formatting.
+        """
+        if include_formulas and not self.workbook.reads_formulas and self.workbook.format not in BINARY_FORMATS:
+            raise ValueError(f"The {self.engine} engine does not read formulas, use the openpyxl engine")
+    
+    def _resolve_sheet_names(self, sheet_name):
+        """Get the list of sheet names to process from a name, a list of names or None (all sheets)"""
+        if sheet_name is None:
+            return self.get_sheet_names()
+        elif isinstance(sheet_name, str):
+            return [sheet_name]
+        return list(sheet_name)
+    
+    def _iter_sheets_parallel(self, sheet_names, include_formulas=False, streaming=False, jobs=2, window=None):
+        """
+        Convert sheets in worker processes, yielding each sheet's Markdown in sheet order
         
-        if not data_rows:
-            return f"## {sheet_name}\n\n*Empty sheet*\n\n"
+        Every worker reopens the workbook (sheet list, shared strings and
+        styles) and parses only the XML part of the sheet it was given. With
+        metrics, workers measure their sheet and send the record back.
+        """
+        measure = self.metrics.enabled
+        with ProcessPoolExecutor(max_workers=min(jobs, len(sheet_names))) as executor:
+            futures = [
+                executor.submit(_convert_sheet_worker, self.excel_file, sheet, include_formulas, streaming,
+                                self.engine, self.formatting, window, measure)
+                for sheet in sheet_names
+            ]
+            for future in futures:
+                with self.metrics.phase('workers'):
+                    result = future.result()
+                if measure:
+                    result, record = result
+                    self.metrics.add(record)
+                yield [result]
+    
+    def iter_markdown(self, sheet_name=None, include_formulas=False, streaming=False, jobs=1, window=None):
+        """
+        Yield the Markdown document piece by piece
         
-        min_row, max_row = min(data_rows), max(data_rows)
+        Parameters:
+        -----------
+        sheet_name : str or list, optional
+            Sheet name(s) to convert. If None, all sheets are converted.
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to convert sheets row by row in one forward pass, so that
+            pieces can be written out before the whole sheet is read
+        jobs : int, optional
+            Number of worker processes converting sheets in parallel. Each
+            sheet is then produced as a single piece, in the original order.
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see
+            iter_sheet_markdown)
+            
+        Yields:
+        -------
+        str
+            Consecutive pieces of the Markdown document
+        """
+        for _, pieces in self.iter_sheet_sections(sheet_name, include_formulas, streaming, jobs, window):
+            yield from pieces
+    
+    def iter_sheet_sections(self, sheet_name=None, include_formulas=False, streaming=False, jobs=1, window=None):
+        """
+        Yield the Markdown document sheet by sheet
         
-        # Prepare the Markdown table
-        column_alignments = []
-        for col_idx in range(1, max_cols + 1):
-            cell = sheet.cell(min_row, col_idx)
-            align = self._get_cell_alignment(cell)
-            column_alignments.append(align)
+        Takes the same parameters as iter_markdown. Each sheet's pieces must
+        be consumed before moving on to the next sheet.
         
-        # Create header row
-        md_table = "| "
-        for col_idx in range(1, max_cols + 1):
-            cell = sheet.cell(min_row, col_idx)
-            cell_data = sheet_data.cell(min_row, col_idx)
-            
-            # Check if this cell is part of a merged range
-            cell_coord = f"{get_column_letter(col_idx)}{min_row}"
-            merged_range = self._is_cell_in_merged_range(cell_coord, merged_ranges)
-            
-            value = cell_data.value
-            is_bold = self._is_cell_bold(cell)
-            is_italic = self._is_cell_italic(cell)
-            
-            if merged_range and cell_coord != merged_range.coord:
-                # This is a continuation of a merged cell, leave it empty
-                md_table += " | "
-            else:
-                cell_text = self._format_value(value, is_bold, is_italic)
-                md_table += f"{cell_text} | "
+        Yields:
+        -------
+        tuple
+            (sheet name, iterator of the pieces of the sheet's section: its
+            heading when several sheets are converted, its table and the
+            blank lines that follow)
+        """
+        sheet_names = self._resolve_sheet_names(sheet_name)
+        self._check_formulas(include_formulas)
         
-        md_table += "\n|"
+        if jobs > 1 and len(sheet_names) > 1:
+            sheet_pieces = self._iter_sheets_parallel(sheet_names, include_formulas, streaming, jobs, window)
+        else:
+            sheet_pieces = (self.iter_sheet_markdown(sheet, include_formulas, streaming, window)
+                            for sheet in sheet_names)
         
-        # Create alignment row
-        for align in column_alignments:
-            if align == 'center':
-                md_table += " :---: |"
-            elif align == 'right':
-                md_table += " ---: |"
-            else:
-                md_table += " :--- |"
-        
-        md_table += "\n"
-        
-        # Create data rows
-        for row_idx in range(min_row + 1, max_row + 1):
-            if row_idx in data_rows:
-                md_table += "| "
-                for col_idx in range(1, max_cols + 1):
-                    cell = sheet.cell(row_idx, col_idx)
-                    cell_data = sheet_data.cell(row_idx, col_idx)
-                    
-                    # Check if this cell is part of a merged range
-                    cell_coord = f"{get_column_letter(col_idx)}{row_idx}"
-                    merged_range = self._is_cell_in_merged_range(cell_coord, merged_ranges)
-                    
-                    value = cell_data.value
-                    formula = cell.value if isinstance(cell.value, str) and cell.value.startswith('=') else None
-                    is_bold = self._is_cell_bold(cell)
-                    is_italic = self._is_cell_italic(cell)
-                    
-                    if merged_range and cell_coord != merged_range.coord:
-                        # This is a continuation of a merged cell, leave it empty
-                        md_table += " | "
-                    else:
-                        cell_text = self._format_value(value, is_bold, is_italic)
-                        
-                        # Add formula as comment if requested
-                        if include_formulas and formula:
-                            cell_text += f" <!-- Formula: {html.escape(formula)} -->"
-                            
-                        md_table += f"{cell_text} | "
-                
-                md_table += "\n"
+        # Convert each sheet
+        for sheet, pieces in zip(sheet_names, sheet_pieces):
+            yield sheet, self._sheet_section(sheet, pieces, heading=len(sheet_names) > 1)
+    
+    @staticmethod
+    def _sheet_section(sheet, pieces, heading):
+        """Pieces of a sheet's section of the document"""
+        if heading:
+            yield f"## {sheet}\n\n"
         
-        return md_table
+        yield from pieces
+        yield "\n\n"
     
-    def convert_to_markdown(self, sheet_name=None, include_formulas=False):
+    def convert_to_markdown(self, sheet_name=None, include_formulas=False, streaming=False, jobs=1, window=None):
         """
         Convert Excel file to Markdown
         
@@ -218,46 +516,272 @@ class AdvancedExcelConverter:
             Sheet name(s) to convert. If None, all sheets are converted.
         include_formulas : bool, optional
             Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read each sheet in one forward pass (see iter_sheet_markdown)
+        jobs : int, optional
+            Number of worker processes converting sheets in parallel
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see iter_sheet_markdown)
             
         Returns:
         --------
         str
             Markdown representation of the Excel file
         """
-        # Get sheet names to process
-        if sheet_name is None:
-            sheet_names = self.get_sheet_names()
-        elif isinstance(sheet_name, str):
-            sheet_names = [sheet_name]
-        else:
-            sheet_names = sheet_name
+        return "".join(self.iter_markdown(sheet_name, include_formulas, streaming, jobs, window))
+    
+    def write_markdown(self, output, sheet_name=None, include_formulas=False, streaming=False, jobs=1,
+                       buffer_size=DEFAULT_BUFFER_SIZE, window=None):
+        """
+        Write the Markdown document to an output sink in buffered batches
         
-        # Convert each sheet
-        md_content = ""
-        for sheet in sheet_names:
-            if len(sheet_names) > 1:
-                md_content += f"## {sheet}\n\n"
+        Parameters:
+        -----------
+        output : str, Path, file-like or None
+            Output file path, any object with a write() method (sys.stdout,
+            io.StringIO...), or None for stdout
+        sheet_name : str or list, optional
+            Sheet name(s) to convert. If None, all sheets are converted.
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read each sheet in one forward pass (see iter_sheet_markdown)
+        jobs : int, optional
+            Number of worker processes converting sheets in parallel
+        buffer_size : int, optional
+            Number of buffered characters written to the sink at once
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see iter_sheet_markdown)
+            
+        Returns:
+        --------
+        int
+            Number of characters written
+        """
+        with self.metrics.phase('write'), open_output(output) as sink:
+            with MarkdownWriter(sink, buffer_size) as writer:
+                writer.write_all(self.iter_markdown(sheet_name, include_formulas, streaming, jobs, window))
+        return writer.chars_written
+    
+    def write_markdown_chunked(self, output_file, sheet_name=None, include_formulas=False, streaming=False, jobs=1,
+                               max_rows=None, max_bytes=None, window=None):
+        """
+        Write the Markdown document as several files of at most max_rows table rows or max_bytes bytes
+        
+        Each chunk repeats the header and alignment rows of the table it
+        continues, and a manifest indexes the chunks (see
+        markdown_writer.ChunkedMarkdownWriter). With streaming, rows go to disk
+        as they are read, so memory stays constant whatever the sheet size.
+        
+        Parameters:
+        -----------
+        output_file : str or Path
+            Path the document would have in one piece; chunks are written
+            next to it as <name>.part001.md... with the manifest <name>.chunks.json
+        sheet_name : str or list, optional
+            Sheet name(s) to convert. If None, all sheets are converted.
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read each sheet in one forward pass (see iter_sheet_markdown)
+        jobs : int, optional
+            Number of worker processes converting sheets in parallel
+        max_rows : int, optional
+            Maximum number of table rows per chunk
+        max_bytes : int, optional
+            Maximum size of a chunk in bytes
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see iter_sheet_markdown)
             
-            md_content += self.convert_sheet_to_markdown(sheet, include_formulas)
-            md_content += "\n\n"
+        Returns:
+        --------
+        list
+            Paths of the chunk files
+        """
+        with self.metrics.phase('write'), ChunkedMarkdownWriter(output_file, max_rows, max_bytes) as writer:
+            writer.write_all(self.iter_markdown(sheet_name, include_formulas, streaming, jobs, window))
+        return writer.paths
+
+    def write_markdown_incremental(self, output_file, sheet_name=None, include_formulas=False, streaming=False,
+                                   window=None):
+        """
+        Write the Markdown document, re-rendering only the sheets that changed
+        
+        Next to output_file, a manifest records the checksum of every sheet's
+        XML part and of the workbook, shared strings and styles parts, along
+        with the byte range of each sheet in the output. On the next run a
+        sheet whose part is unchanged is copied from the existing output
+        instead of being converted again. A change to a workbook-wide part,
+        to the options or to the converter version re-renders every sheet.
+        Binary workbooks (.xls, .xlsb) have no XML parts to compare, so every
+        sheet is rendered and no manifest is kept.
+        
+        Parameters:
+        -----------
+        output_file : str
+            Path to the output Markdown file
+        sheet_name : str or list, optional
+            Sheet name(s) to convert. If None, all sheets are converted.
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read changed sheets in one forward pass (see iter_sheet_markdown)
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see iter_sheet_markdown)
+            
+        Returns:
+        --------
+        list
+            Names of the sheets that were re-rendered
+        """
+        sheet_names = self._resolve_sheet_names(sheet_name)
+        manifest_path = f"{output_file}{PARTS_MANIFEST_SUFFIX}"
+        if not self.workbook.has_part_checksums:
+            self.write_markdown(output_file, sheet_names, include_formulas, streaming, window=window)
+            # A manifest left by an earlier .xlsx conversion no longer matches the output
+            try:
+                os.remove(manifest_path)
+            except OSError:
+                pass
+            return sheet_names
+        
+        options = {
+            'include_formulas': include_formulas,
+            'formatting': self.formatting,
+            'engine': self.engine,
+            'window': list(window) if window else None,
+            'converter_version': CONVERTER_VERSION,
+        }
+        with self.metrics.phase('checksums'):
+            shared = self.workbook.shared_checksums()
         
-        return md_content
+        # Sheets of the previous output that can be reused as is
+        previous = _load_parts_manifest(manifest_path, output_file)
+        reusable = {}
+        if previous and previous['options'] == options and previous['shared'] == shared:
+            reusable = {sheet['name']: sheet for sheet in previous['sheets']}
+        
+        sheets = []
+        rendered = []
+        with self.metrics.phase('write'), replace_atomically(output_file) as tmp_path:
+            old = open(output_file, 'rb') if reusable else None
+            try:
+                with open(tmp_path, 'wb') as out:
+                    offset = 0
+                    for sheet in sheet_names:
+                        if len(sheet_names) > 1:
+                            offset += out.write(f"## {sheet}\n\n".encode('utf-8'))
+                        
+                        with self.metrics.phase('checksums'):
+                            checksum = self.workbook.sheet_checksum(sheet)
+                        known = reusable.get(sheet)
+                        length = 0
+                        if known and known['checksum'] == checksum:
+                            old.seek(known['offset'])
+                            length = out.write(old.read(known['length']))
+                            self.metrics.count(nbytes=length)
+                        else:
+                            for piece in self.iter_sheet_markdown(sheet, include_formulas, streaming, window):
+                                length += out.write(piece.encode('utf-8'))
+                            rendered.append(sheet)
+                        
+                        sheets.append({'name': sheet, 'checksum': checksum, 'offset': offset, 'length': length})
+                        offset += length + out.write(b"\n\n")
+            finally:
+                # Closed before the new file replaces it (required on Windows)
+                if old:
+                    old.close()
+        
+        stat = os.stat(output_file)
+        manifest = {
+            'options': options,
+            'shared': shared,
+            'sheets': sheets,
+            'output': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        return rendered
+
 
+def _load_parts_manifest(manifest_path, output_file):
+    """Load the parts manifest of a previous incremental conversion, or None if it cannot be trusted"""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        stat = os.stat(output_file)
+    except (OSError, ValueError):
+        return None
+    # The output must not have been modified since the manifest was written
+    if manifest.get('output') != {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}:
+        return None
+    return manifest
 
-def convert_excel_advanced(excel_file, output_file=None, sheet_name=None, include_formulas=False):
+
+def _convert_sheet_worker(excel_file, sheet_name, include_formulas, streaming, engine, formatting, window=None,
+                          measure=False):
+    """
+    Convert a single sheet in a worker process (see AdvancedExcelConverter._iter_sheets_parallel)
+    
+    With measure, return (markdown, metrics record of the sheet); the record
+    includes reopening the workbook in the worker.
+    """
+    metrics = ConversionMetrics() if measure else None
+    converter = AdvancedExcelConverter(excel_file, engine, formatting, metrics)
+    try:
+        markdown = converter.convert_sheet_to_markdown(sheet_name, include_formulas, streaming, window)
+    finally:
+        converter.close()
+    if not measure:
+        return markdown
+    # The workbook record holds the sheet's phases plus the reopening
+    return markdown, dict(metrics.records[-1], sheet=sheet_name)
+
+
+def convert_excel_advanced(excel_file, output_file=None, sheet_name=None, include_formulas=False,
+                           streaming=False, jobs=1, incremental=False, engine='auto', formatting=True, window=None,
+                           chunk_rows=None, chunk_bytes=None, metrics=None):
     """
     Convert Excel file to Markdown with advanced formatting
     
     Parameters:
     -----------
     excel_file : str
-        Path to the Excel file
-    output_file : str, optional
-        Path to the output Markdown file. If None, return as string.
+        Path to the Excel file (.xlsx, .xls or .xlsb)
+    output_file : str or file-like, optional
+        Path to the output Markdown file, or an object with a write() method.
+        If None, return as string.
     sheet_name : str or list, optional
         Sheet name(s) to convert. If None, all sheets are converted.
     include_formulas : bool, optional
         Whether to include formulas as comments in the output
+    streaming : bool, optional
+        Whether to read sheets in one forward pass, keeping memory roughly
+        constant whatever the number of rows
+    jobs : int, optional
+        Number of worker processes converting sheets in parallel. Sheets are
+        stitched back together in their original order.
+    incremental : bool, optional
+        Whether to re-render only the sheets whose xlsx parts changed since
+        the previous conversion to output_file and splice them into the
+        existing output (see AdvancedExcelConverter.write_markdown_incremental)
+    engine : str, optional
+        Reader engine: 'openpyxl', 'calamine' or 'auto' (see AdvancedExcelConverter)
+    formatting : bool, optional
+        Whether to render bold, italic and alignment; plain values can be read
+        with the faster calamine engine
+    window : SheetWindow, optional
+        Only convert the cells of each sheet inside this window, e.g.
+        ``parse_window(rows='1000:2000', cols='A:F')``; reading stops once
+        the window has been passed
+    chunk_rows : int, optional
+        Split the output into files of at most this many table rows (see
+        AdvancedExcelConverter.write_markdown_chunked); needs an output path
+    chunk_bytes : int, optional
+        Split the output into files of at most this many bytes
+    metrics : ConversionMetrics, optional
+        Record per-phase durations and counters of the conversion (see
+        conversion_metrics)
         
     Returns:
     --------
@@ -266,19 +790,34 @@ def convert_excel_advanced(excel_file, output_file=None, sheet_name=None, includ
         Otherwise, returns True if successful, False if error occurred.
     """
     try:
-        converter = AdvancedExcelConverter(excel_file)
-        md_content = converter.convert_to_markdown(sheet_name, include_formulas)
-        
-        if output_file:
-            try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-                return True
-            except IOError as e:
-                print(f"Error writing to output file: {e}")
-                return False
-        else:
-            return md_content
+        chunked = bool(chunk_rows or chunk_bytes)
+        if chunked and not isinstance(output_file, (str, os.PathLike)):
+            raise ValueError("Chunked output needs an output file path")
+        if chunked and incremental:
+            raise ValueError("Chunked output cannot be combined with incremental conversion")
+        engine = select_engine(excel_file, engine, values_only=not (formatting or include_formulas), window=window)
+        converter = AdvancedExcelConverter(excel_file, engine, formatting, metrics)
+        try:
+            if output_file:
+                # Rows are written to the file as they are converted
+                try:
+                    if chunked:
+                        converter.write_markdown_chunked(output_file, sheet_name, include_formulas, streaming, jobs,
+                                                         chunk_rows, chunk_bytes, window)
+                    elif incremental and isinstance(output_file, (str, os.PathLike)):
+                        converter.write_markdown_incremental(output_file, sheet_name, include_formulas, streaming,
+                                                             window)
+                    else:
+                        converter.write_markdown(output_file, sheet_name, include_formulas, streaming, jobs,
+                                                 window=window)
+                    return True
+                except IOError as e:
+                    print(f"Error writing to output file: {e}")
+                    return False
+            else:
+                return converter.convert_to_markdown(sheet_name, include_formulas, streaming, jobs, window)
+        finally:
+            converter.close()
             
     except Exception as e:
         print(f"Error in advanced conversion: {e}")
@@ -288,20 +827,61 @@ def convert_excel_advanced(excel_file, output_file=None, sheet_name=None, includ
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python advanced_converter.py <excel_file> [output_file] [sheet_name]")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    sheet_name = sys.argv[3] if len(sys.argv) > 3 else None
+    parser = argparse.ArgumentParser(description='Convert Excel files to Markdown with advanced formatting.')
+    parser.add_argument('excel_file', help='Path to the Excel file')
+    parser.add_argument('output_file', nargs='?', help='Path to the output Markdown file')
+    parser.add_argument('sheet_name', nargs='?', help='Sheet name to convert. If not specified, all sheets are converted.')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Read sheets in one forward pass with constant memory')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes converting sheets in parallel')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-render only the sheets that changed since the previous conversion to output_file')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='Workbook reader: openpyxl (formatting and formulas), calamine (values only, faster) '
+                             'or auto (calamine for large files converted with --no-formatting)')
+    parser.add_argument('--no-formatting', dest='formatting', action='store_false',
+                        help='Render raw values, without bold, italic, alignment and number formats')
+    parser.add_argument('--rows', help='Only convert these rows, e.g. 1000:2000, 1000: or :2000')
+    parser.add_argument('--cols', help='Only convert these columns, e.g. A:F')
+    parser.add_argument('--range', dest='cell_range', help='Only convert this A1-style range, e.g. B2:F2000')
+    parser.add_argument('--chunk-rows', type=int,
+                        help='Split the output into files of at most this many table rows, indexed by a manifest')
+    parser.add_argument('--chunk-size', type=float,
+                        help='Split the output into files of at most this many MB, indexed by a manifest')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Write per-phase durations, row, cell and byte counts of the workbook and of each '
+                             'sheet to FILE as JSON lines')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Write a cProfile dump to FILE, and the --metrics report next to it '
+                             '(FILE.metrics.jsonl) unless --metrics is given')
+    args = parser.parse_args()
+    try:
+        window = parse_window(args.rows, args.cols, args.cell_range)
+    except ValueError as e:
+        parser.error(str(e))
     
-    result = convert_excel_advanced(excel_file, output_file, sheet_name)
+    metrics = ConversionMetrics() if args.metrics or args.profile else None
+    output_file = args.output_file
+    with profiled(args.profile):
+        result = convert_excel_advanced(args.excel_file, output_file, args.sheet_name,
+                                        streaming=args.streaming, jobs=args.jobs, incremental=args.incremental,
+                                        engine=args.engine, formatting=args.formatting, window=window,
+                                        chunk_rows=args.chunk_rows,
+                                        chunk_bytes=int(args.chunk_size * 1024 * 1024) if args.chunk_size else None,
+                                        metrics=metrics)
+    if metrics:
+        report_file = args.metrics or report_path(args.profile)
+        metrics.write_report(report_file)
+        print(format_summary(metrics.records), file=sys.stderr)
+        print(f"Metrics written to {report_file}", file=sys.stderr)
     
     if output_file:
-        if result:
+        if result and (args.chunk_rows or args.chunk_size):
+            print(f"Converted Excel file to Markdown chunks, indexed in: {chunk_paths(output_file)[1]}")
+        elif result:
             print(f"Converted Excel file to Markdown: {output_file}")
         else:
             print("Conversion failed.")
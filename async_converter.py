@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+asyncio interface of the advanced converter.
+
+``convert_excel_advanced`` is blocking and CPU-bound: called from a
+coroutine, it stalls the event loop for the whole conversion. An
+``AsyncConverter`` runs every conversion in a worker process instead and
+awaits its result, so the event loop keeps serving other requests:
+
+- ``await converter.convert(path, ...)`` is the awaitable counterpart of
+  ``convert_excel_advanced``;
+- ``async with converter.iter_markdown(path, ...) as chunks`` then
+  ``async for sheet, chunk in chunks`` receives the document in chunks of
+  about ``buffer_size`` characters as the worker converts it, each chunk
+  belonging to one sheet.
+
+Concurrency is bounded: at most ``max_workers`` conversions run at once,
+each in its own process (like batch_convert's ConversionPool, so a crash or a
+cancelled conversion only ends its own process). Further conversions wait for
+a free slot; with ``max_pending``, conversions beyond that many waiting ones
+are refused at once with ``ConverterBusy``, so that a service can answer
+"try again later" instead of queueing uploads without limit.
+
+Chunks cross a pipe whose OS buffer holds about one of them: a worker whose
+consumer stops reading blocks on the next chunk, so a slow client holds back
+its conversion instead of filling memory. Leaving the ``async with`` block
+before the end of the document, or cancelling the task, stops the worker
+process and frees its slot before the block is left.
+
+``convert_excel_async`` and ``iter_markdown_async`` use a converter shared by
+the event loop, with the default limits.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from advanced_converter import AdvancedExcelConverter, convert_excel_advanced
+from markdown_writer import DEFAULT_BUFFER_SIZE, iter_chunks
+from workbook_reader import select_engine
+
+# Message kinds sent by a worker process
+_ITEM, _ERROR, _DONE = 'item', 'error', 'done'
+
+
+class ConverterBusy(RuntimeError):
+    """Raised when a conversion is submitted while max_pending conversions are already waiting"""
+
+
+def _worker(function, args, conn):
+    """Run in a worker process: send every item produced by function(*args), then an end or error message"""
+    # The parent handles Ctrl+C and stops workers with terminate(), which
+    # exits through SystemExit so that temporary output files are removed
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    try:
+        for item in function(*args):
+            conn.send((_ITEM, item))
+    except Exception as e:
+        try:
+            conn.send((_ERROR, e))
+        except Exception:
+            # The exception cannot be pickled
+            conn.send((_ERROR, RuntimeError(f"{type(e).__name__}: {e}")))
+    else:
+        conn.send((_DONE, None))
+    finally:
+        conn.close()
+
+
+def _convert(excel_file, output_file, options):
+    """Worker side of AsyncConverter.convert: the result of convert_excel_advanced"""
+    yield convert_excel_advanced(excel_file, output_file, **options)
+
+
+def _sheet_chunks(excel_file, sheet_name, include_formulas, streaming, engine, formatting, window, buffer_size):
+    """Worker side of AsyncConverter.iter_markdown: (sheet name, chunk) pairs"""
+    engine = select_engine(excel_file, engine, values_only=not (formatting or include_formulas), window=window)
+    converter = AdvancedExcelConverter(excel_file, engine, formatting)
+    try:
+        for sheet, pieces in converter.iter_sheet_sections(sheet_name, include_formulas, streaming, window=window):
+            for chunk in iter_chunks(pieces, buffer_size):
+                yield sheet, chunk
+    finally:
+        converter.close()
+
+
+class _MarkdownStream:
+    """
+    Async context manager returned by AsyncConverter.iter_markdown
+
+    Entering it gives the async iterator of (sheet name, chunk) pairs;
+    leaving it stops the worker if the document was not read to the end.
+    An async generator left in the middle of an ``async for`` is only closed
+    when it is garbage-collected, keeping its worker and slot until then.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self._chunks
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._chunks.aclose()
+        return False
+
+
+class AsyncConverter:
+    """
+    Run conversions in worker processes from asyncio code
+
+    Parameters:
+    -----------
+    max_workers : int, optional
+        Maximum number of conversions running at once, each in its own
+        process (default: number of CPUs)
+    max_pending : int, optional
+        Maximum number of conversions waiting for a free worker; further ones
+        raise ConverterBusy. None (default) lets them all wait.
+
+    Can be used as an async context manager; close() stops the conversions
+    still running.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        # Created on first use, inside the event loop
+        self._slots = None
+        self._waiting = 0
+        self._processes = set()
+        # One thread per running conversion, blocked reading its pipe
+        self._receivers = ThreadPoolExecutor(max_workers=self.max_workers,
+                                             thread_name_prefix='excel2markdown-receiver')
+
+    @property
+    def running(self):
+        """Number of conversions running in worker processes"""
+        return len(self._processes)
+
+    @property
+    def pending(self):
+        """Number of conversions waiting for a free worker"""
+        return self._waiting
+
+    async def _acquire(self):
+        """Wait for a free worker slot, or raise ConverterBusy when too many conversions are waiting"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._slots.locked() and self.max_pending is not None and self._waiting >= self.max_pending:
+            raise ConverterBusy(f"{self.max_workers} conversions running and {self._waiting} waiting")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+    async def _run(self, function, *args):
+        """
+        Run function(*args), a generator, in a worker process
+
+        Yields:
+        -------
+        object
+            The items of the generator, as the worker produces them; its
+            exception is raised if it fails
+        """
+        await self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_worker, args=(function, args, child_conn), daemon=True)
+            process.start()
+            child_conn.close()
+            self._processes.add(process)
+            finished = False
+            try:
+                while True:
+                    try:
+                        kind, payload = await loop.run_in_executor(self._receivers, parent_conn.recv)
+                    except EOFError:
+                        # The worker ended without a result (crashed or killed)
+                        await loop.run_in_executor(None, process.join)
+                        raise RuntimeError(f"Conversion process stopped (exit code {process.exitcode})")
+                    if kind == _ITEM:
+                        yield payload
+                        continue
+                    finished = True
+                    if kind == _ERROR:
+                        raise payload
+                    return
+            finally:
+                if not finished:
+                    # Unfinished: the consumer stopped reading or the task was cancelled
+                    process.terminate()
+                try:
+                    # Joined off the event loop: a worker slow to exit must not stall other coroutines
+                    await loop.run_in_executor(None, process.join)
+                finally:
+                    parent_conn.close()
+                    self._processes.discard(process)
+        finally:
+            self._slots.release()
+
+    async def convert(self, excel_file, output_file=None, sheet_name=None, include_formulas=False,
+                      streaming=False, incremental=False, engine='auto', formatting=True, window=None,
+                      chunk_rows=None, chunk_bytes=None):
+        """
+        Convert an Excel file to Markdown in a worker process
+
+        Takes the parameters of convert_excel_advanced, except jobs (the
+        converter bounds the processes) and metrics (they would be recorded
+        in the worker). output_file must be a path or None: file objects
+        cannot be shared with the worker.
+
+        Returns:
+        --------
+        str or bool
+            Like convert_excel_advanced: the Markdown content if output_file
+            is None, otherwise whether the file was written
+        """
+        if output_file is not None and not isinstance(output_file, (str, os.PathLike)):
+            raise ValueError("The output of an asynchronous conversion must be a file path or None")
+        options = {
+            'sheet_name': sheet_name,
+            'include_formulas': include_formulas,
+            'streaming': streaming,
+            'incremental': incremental,
+            'engine': engine,
+            'formatting': formatting,
+            'window': window,
+            'chunk_rows': chunk_rows,
+            'chunk_bytes': chunk_bytes,
+        }
+        result = None
+        async for result in self._run(_convert, excel_file, output_file, options):
+            pass
+        return result
+
+    def iter_markdown(self, excel_file, sheet_name=None, include_formulas=False, streaming=False,
+                      engine='auto', formatting=True, window=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Convert an Excel file in a worker process, giving the document in chunks
+
+        Use it as ``async with converter.iter_markdown(path) as chunks:
+        async for sheet, chunk in chunks: ...``. The conversion starts with
+        the first iteration, and leaving the block stops it if the document
+        was not read to the end.
+
+        Parameters:
+        -----------
+        excel_file : str
+            Path to the Excel file (.xlsx, .xls or .xlsb)
+        sheet_name : str or list, optional
+            Sheet name(s) to convert. If None, all sheets are converted.
+        include_formulas : bool, optional
+            Whether to include formulas as comments in the output
+        streaming : bool, optional
+            Whether to read sheets in one forward pass, so that the first
+            chunks arrive before a sheet is fully read and the worker's memory
+            stays roughly constant
+        engine : str, optional
+            Reader engine: 'openpyxl', 'calamine' or 'auto' (see AdvancedExcelConverter)
+        formatting : bool, optional
+            Whether to render bold, italic, alignment and number formats
+        window : SheetWindow, optional
+            Only convert the cells of each sheet inside this window (see
+            workbook_reader.parse_window)
+        buffer_size : int, optional
+            Size of the chunks in characters; a chunk is shorter when its
+            sheet ends
+
+        Returns:
+        --------
+        async context manager
+            Giving an async iterator of (sheet name, chunk) tuples; the chunks
+            put together are the document returned by convert_excel_advanced
+        """
+        return _MarkdownStream(self._run(_sheet_chunks, excel_file, sheet_name, include_formulas, streaming, engine,
+                                         formatting, window, buffer_size))
+
+    async def close(self):
+        """Stop the running conversions and release the receiver threads"""
+        for process in list(self._processes):
+            process.terminate()
+        self._receivers.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+
+# Converter shared by convert_excel_async and iter_markdown_async, one per event loop
+_shared_converters = weakref.WeakKeyDictionary()
+
+
+def _shared_converter():
+    loop = asyncio.get_running_loop()
+    converter = _shared_converters.get(loop)
+    if converter is None:
+        converter = _shared_converters[loop] = AsyncConverter()
+    return converter
+
+
+async def convert_excel_async(excel_file, output_file=None, converter=None, **options):
+    """
+    Awaitable convert_excel_advanced, run in a worker process
+
+    Parameters:
+    -----------
+    excel_file : str
+        Path to the Excel file
+    output_file : str, optional
+        Path to the output Markdown file. If None, return as string.
+    converter : AsyncConverter, optional
+        Converter bounding the concurrent conversions; defaults to one shared
+        by the event loop
+    **options
+        Other parameters of AsyncConverter.convert
+
+    Returns:
+    --------
+    str or bool
+        Like convert_excel_advanced
+    """
+    converter = converter or _shared_converter()
+    return await converter.convert(excel_file, output_file, **options)
+
+
+def iter_markdown_async(excel_file, converter=None, **options):
+    """
+    Chunks of a document converted in a worker process (see AsyncConverter.iter_markdown)
+
+    Use it as ``async with iter_markdown_async(path) as chunks: async for
+    sheet, chunk in chunks: ...``.
+
+    Parameters:
+    -----------
+    excel_file : str
+        Path to the Excel file
+    converter : AsyncConverter, optional
+        Converter bounding the concurrent conversions; defaults to one shared
+        by the event loop
+    **options
+        Other parameters of AsyncConverter.iter_markdown
+    """
+    converter = converter or _shared_converter()
+    return converter.iter_markdown(excel_file, **options)
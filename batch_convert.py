@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 import os
 import sys
+import argparse
+from collections import deque, namedtuple
 from pathlib import Path
+import multiprocessing
+from multiprocessing.connection import wait
+import signal
 import time
 
 # Thêm thư mục hiện tại vào PYTHONPATH để import các module
@@ -9,16 +14,530 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
 # Import converter từ advanced_converter.py (sẽ sử dụng bộ converter nâng cao)
-from advanced_converter import convert_excel_advanced
+from advanced_converter import CONVERTER_VERSION, convert_excel_advanced
+from conversion_cache import DEFAULT_MAX_BYTES, ConversionCache
+from conversion_metrics import ConversionMetrics, profiled, report_path, write_records
+from folder_watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_SECONDS, FolderWatcher
+from markdown_writer import replace_atomically
 
-def main():
+# Thư mục cache mặc định cho các file đã chuyển đổi
+CACHE_DIR = os.path.join(current_dir, ".excel2markdown_cache")
+
+# Tùy chọn chuyển đổi dùng trong batch (một phần của khóa cache)
+CONVERSION_OPTIONS = {
+    'include_formulas': True,
+    'sheet_name': None,
+    'converter_version': CONVERTER_VERSION,
+}
+
+# Phần mở rộng của các file Excel được chuyển đổi
+EXCEL_EXTENSIONS = (".xlsx", ".xls", ".xlsb")
+
+# Chu kỳ (giây) kiểm tra tiến trình con và thư mục input ở chế độ --watch
+WATCH_TICK = 0.5
+
+# Kết quả chuyển đổi của một file (cached=True nếu lấy lại từ cache,
+# metrics: các bản ghi ConversionMetrics của workbook và từng sheet nếu có đo)
+ConversionResult = namedtuple('ConversionResult',
+                              ['index', 'excel_file', 'output_path', 'success', 'error', 'seconds', 'cached',
+                               'metrics'],
+                              defaults=(False, None))
+
+
+def _is_excel_file(file_name):
+    """File Excel cần chuyển đổi (bỏ qua file khóa ~$... mà Excel tạo khi đang mở file)"""
+    return file_name.lower().endswith(EXCEL_EXTENSIONS) and not file_name.startswith("~$")
+
+
+def _output_path(output_dir, excel_file):
+    """Tên file output: đổi phần mở rộng .xlsx/.xls/.xlsb sang .md"""
+    return os.path.join(output_dir, Path(excel_file).stem + ".md")
+
+
+def _pause(interactive):
+    """Chờ người dùng nhấn Enter (bỏ qua khi chạy không tương tác, ví dụ cron)"""
+    if interactive:
+        input("\nNhấn Enter để thoát...")
+
+
+def _open_folder(path, interactive):
+    """Mở thư mục bằng trình quản lý file của hệ điều hành (chỉ ở chế độ tương tác)"""
+    if not interactive:
+        return
+    try:
+        if sys.platform == 'win32':
+            os.startfile(path)
+        elif sys.platform == 'darwin':  # macOS
+            import subprocess
+            subprocess.call(['open', path])
+        else:  # Linux
+            import subprocess
+            subprocess.call(['xdg-open', path])
+    except Exception:
+        pass  # Nếu không mở được thư mục thì bỏ qua
+
+
+def _convert_file(input_path, output_path, incremental=False, metrics=None):
+    """
+    Chuyển đổi một file, trả về (thành công, thông báo lỗi)
+
+    File .md được ghi dưới tên tạm rồi đổi tên một lần (atomic), nên thư mục
+    output không bao giờ chứa file dở dang và file cũ được giữ nguyên nếu lỗi.
+    Với metrics (ConversionMetrics), thời gian từng giai đoạn được ghi lại.
+    """
+    try:
+        if incremental:
+            # Chỉ chuyển đổi lại các sheet đã thay đổi (tự ghi file tạm rồi đổi tên)
+            result = convert_excel_advanced(
+                excel_file=input_path,
+                output_file=output_path,
+                include_formulas=True,
+                incremental=True,
+                metrics=metrics
+            )
+            if result:
+                return True, None
+            return False, "Chuyển đổi thất bại"
+
+        with replace_atomically(output_path) as tmp_path:
+            # Sử dụng advanced converter để chuyển đổi
+            result = convert_excel_advanced(
+                excel_file=input_path,
+                output_file=tmp_path,
+                include_formulas=True,  # Bao gồm công thức trong file Markdown
+                metrics=metrics
+            )
+            if not result:
+                raise IOError("Chuyển đổi thất bại")
+        return True, None
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return False, str(e)
+
+
+def _convert_worker(input_path, output_path, incremental, measure, conn):
+    """Chạy trong tiến trình con: chuyển đổi một file và gửi kết quả (kèm metrics nếu có đo) về tiến trình cha"""
+    # Ctrl+C được xử lý bởi tiến trình cha, tiến trình này sẽ bị dừng từ đó.
+    # terminate() (quá thời gian, Ctrl+C) thoát qua SystemExit để file tạm được xóa.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    metrics = ConversionMetrics() if measure else None
+    start = time.time()
+    success, error = _convert_file(input_path, output_path, incremental, metrics)
+    conn.send((success, error, time.time() - start, metrics.records if metrics else None))
+    conn.close()
+
+
+class ConversionPool:
+    """
+    Nhóm tiến trình con chuyển đổi file, tối đa jobs tiến trình cùng lúc
+
+    Mỗi file được chuyển đổi trong một tiến trình riêng để có thể dừng file
+    quá thời gian cho phép mà không ảnh hưởng các file khác.
+
+    Parameters:
+    -----------
+    jobs : int
+        Số tiến trình chạy song song
+    timeout : float, optional
+        Thời gian tối đa (giây) cho mỗi file
+    incremental : bool, optional
+        Chỉ chuyển đổi lại các sheet đã thay đổi
+    measure : bool, optional
+        Đo thời gian từng giai đoạn (xem conversion_metrics), trả về trong ConversionResult.metrics
+    """
+
+    def __init__(self, jobs, timeout=None, incremental=False, measure=False):
+        self.jobs = jobs
+        self.timeout = timeout
+        self.incremental = incremental
+        self.measure = measure
+        self._running = {}  # conn -> (index, task, process, start)
+
+    def __len__(self):
+        return len(self._running)
+
+    def is_full(self):
+        return len(self._running) >= self.jobs
+
+    def running_tasks(self):
+        """Các task (excel_file, input_path, output_path) đang được chuyển đổi"""
+        return [task for _, task, _, _ in self._running.values()]
+
+    def submit(self, index, task):
+        """Bắt đầu chuyển đổi task (excel_file, input_path, output_path) trong một tiến trình con"""
+        _, input_path, output_path = task
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_convert_worker,
+                                          args=(input_path, output_path, self.incremental, self.measure,
+                                                child_conn))
+        process.start()
+        child_conn.close()
+        self._running[parent_conn] = (index, task, process, time.time())
+
+    def collect(self, wait_time=None):
+        """
+        Chờ đến khi có tiến trình gửi kết quả, kết thúc hoặc hết thời gian
+
+        Parameters:
+        -----------
+        wait_time : float, optional
+            Thời gian chờ tối đa (giây); None là chờ đến khi có kết quả
+
+        Returns:
+        --------
+        list of ConversionResult
+            Kết quả của các file vừa xong (có thể rỗng nếu hết wait_time)
+        """
+        if not self._running:
+            if wait_time:
+                time.sleep(wait_time)
+            return []
+        if self.timeout is not None:
+            now = time.time()
+            deadline = max(0, min(start + self.timeout for _, _, _, start in self._running.values()) - now)
+            wait_time = deadline if wait_time is None else min(wait_time, deadline)
+        ready = wait(list(self._running), timeout=wait_time)
+
+        results = []
+        now = time.time()
+        for conn in list(self._running):
+            index, (excel_file, _, output_path), process, start = self._running[conn]
+            result = None
+            if conn in ready:
+                try:
+                    success, error, seconds, metrics = conn.recv()
+                except EOFError:
+                    # Tiến trình con kết thúc mà không gửi kết quả (bị crash)
+                    process.join()
+                    success, error, seconds = False, f"Tiến trình con bị dừng (exit code {process.exitcode})", now - start
+                    metrics = None
+                result = ConversionResult(index, excel_file, output_path, success, error, seconds, metrics=metrics)
+            elif self.timeout is not None and now - start >= self.timeout:
+                process.terminate()
+                result = ConversionResult(index, excel_file, output_path, False,
+                                          f"Quá thời gian cho phép ({self.timeout:g} giây)", now - start)
+            if result is not None:
+                process.join()
+                conn.close()
+                del self._running[conn]
+                results.append(result)
+        return results
+
+    def close(self):
+        """Dừng các tiến trình còn đang chạy (ví dụ khi người dùng nhấn Ctrl+C)"""
+        for conn, (_, _, process, _) in self._running.items():
+            process.terminate()
+            process.join()
+            conn.close()
+        self._running.clear()
+
+
+def run_conversions(tasks, jobs=1, timeout=None, incremental=False, measure=False):
+    """
+    Chuyển đổi danh sách file, trả kết quả theo đúng thứ tự của danh sách
+
+    Parameters:
+    -----------
+    tasks : list of (excel_file, input_path, output_path)
+        Các file cần chuyển đổi
+    jobs : int
+        Số tiến trình chạy song song
+    timeout : float, optional
+        Thời gian tối đa (giây) cho mỗi file. Tiến trình quá thời gian sẽ bị dừng.
+    incremental : bool, optional
+        Chỉ chuyển đổi lại các sheet đã thay đổi kể từ lần chuyển đổi trước
+    measure : bool, optional
+        Đo thời gian từng giai đoạn, số dòng, số ô và số byte của mỗi file
+        (xem conversion_metrics); kết quả nằm trong ConversionResult.metrics
+
+    Yields:
+    -------
+    ConversionResult
+        Kết quả của từng file, theo thứ tự của tasks
+    """
+    if jobs <= 1 and timeout is None:
+        # Chạy tuần tự ngay trong tiến trình hiện tại
+        for index, (excel_file, input_path, output_path) in enumerate(tasks):
+            metrics = ConversionMetrics() if measure else None
+            start = time.time()
+            success, error = _convert_file(input_path, output_path, incremental, metrics)
+            yield ConversionResult(index, excel_file, output_path, success, error, time.time() - start,
+                                   metrics=metrics.records if metrics else None)
+        return
+
+    pending = deque(enumerate(tasks))
+    pool = ConversionPool(jobs, timeout, incremental, measure)
+    finished = {}
+    next_index = 0
+
+    try:
+        while pending or pool:
+            # Khởi động tiến trình mới cho đến khi đủ số jobs
+            while pending and not pool.is_full():
+                pool.submit(*pending.popleft())
+
+            for result in pool.collect():
+                finished[result.index] = result
+
+            # Trả kết quả theo thứ tự
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        pool.close()
+
+
+def run_cached_conversions(tasks, cache, force=False, jobs=1, timeout=None, incremental=False, measure=False):
+    """
+    Giống run_conversions, nhưng bỏ qua các file không thay đổi kể từ lần chuyển đổi trước
+
+    File có nội dung và tùy chọn chuyển đổi trùng với một mục trong cache sẽ
+    được sao chép lại file .md đã lưu thay vì chuyển đổi lại. Với force=True,
+    mọi file đều được chuyển đổi lại (cache vẫn được cập nhật).
+    """
+    keys = {}
+    cached = {}
+    for index, (excel_file, input_path, output_path) in enumerate(tasks):
+        start = time.time()
+        try:
+            keys[index] = cache.make_key(input_path, CONVERSION_OPTIONS)
+        except OSError:
+            continue  # Không đọc được file: để bước chuyển đổi báo lỗi
+        if not force and cache.fetch(keys[index], output_path):
+            cached[index] = ConversionResult(index, excel_file, output_path, True, None,
+                                             time.time() - start, cached=True)
+
+    to_convert = [(index, task) for index, task in enumerate(tasks) if index not in cached]
+    conversions = run_conversions([task for _, task in to_convert], jobs=jobs, timeout=timeout,
+                                  incremental=incremental, measure=measure)
+    positions = iter(index for index, _ in to_convert)
+
+    try:
+        for index in range(len(tasks)):
+            if index in cached:
+                yield cached[index]
+                continue
+            result = next(conversions)._replace(index=next(positions))
+            if result.success and result.index in keys:
+                cache.store(keys[result.index], result.output_path)
+            yield result
+    finally:
+        cache.save()
+
+
+def watch_conversions(watcher, output_dir, cache=None, force=False, jobs=1, timeout=None, incremental=False,
+                      measure=False):
+    """
+    Chuyển đổi các file Excel mới hoặc vừa thay đổi trong thư mục được theo dõi, cho đến khi bị dừng (Ctrl+C)
+
+    Một file được chuyển đổi khi đã ghi xong (xem FolderWatcher), trong tiến
+    trình con, tối đa jobs file cùng lúc; file sửa lại trong khi đang chuyển
+    đổi sẽ được chuyển đổi lại sau đó. Với cache, file có nội dung không đổi
+    được lấy lại từ cache thay vì chuyển đổi lại.
+
+    Parameters:
+    -----------
+    watcher : FolderWatcher
+        Theo dõi thư mục input; gọi watcher.add_existing() trước để chuyển
+        đổi cả các file đã có sẵn
+    output_dir : str
+        Thư mục chứa các file .md
+    cache : ConversionCache, optional
+        Cache chuyển đổi (None để không dùng)
+    force, jobs, timeout, incremental, measure
+        Như run_cached_conversions
+
+    Yields:
+    -------
+    ConversionResult
+        Kết quả của từng file theo thứ tự hoàn thành, index tăng dần
+    """
+    pool = ConversionPool(jobs, timeout, incremental, measure)
+    queue = []  # Các file đã ghi xong, chờ chuyển đổi
+    keys = {}  # index -> khóa cache của file đang chuyển đổi
+    count = 0
+
+    try:
+        while True:
+            # Chờ tiến trình con hoặc thay đổi trong thư mục input
+            if pool:
+                results = pool.collect(WATCH_TICK)
+                ready = watcher.wait(0)
+            else:
+                results = []
+                ready = watcher.wait(60)
+
+            for result in results:
+                key = keys.pop(result.index, None)
+                if result.success and key is not None:
+                    cache.store(key, result.output_path)
+                    cache.save()
+                yield result
+
+            queue.extend(excel_file for excel_file in ready if excel_file not in queue)
+            # Một file đang được chuyển đổi sẽ chờ lần chuyển đổi đó xong
+            running = {excel_file for excel_file, _, _ in pool.running_tasks()}
+            for excel_file in [excel_file for excel_file in queue if excel_file not in running]:
+                if pool.is_full():
+                    break
+                queue.remove(excel_file)
+                input_path = os.path.join(watcher.directory, excel_file)
+                task = (excel_file, input_path, _output_path(output_dir, excel_file))
+                if cache is not None:
+                    start = time.time()
+                    try:
+                        key = cache.make_key(input_path, CONVERSION_OPTIONS)
+                    except OSError:
+                        continue  # File đã bị xóa hoặc đổi tên
+                    if not force and cache.fetch(key, task[2]):
+                        cache.save()
+                        yield ConversionResult(count, excel_file, task[2], True, None, time.time() - start,
+                                               cached=True)
+                        count += 1
+                        continue
+                    keys[count] = key
+                pool.submit(count, task)
+                count += 1
+    finally:
+        pool.close()
+        if cache is not None:
+            cache.save()
+
+
+def _print_result(result, prefix):
+    """In kết quả chuyển đổi của một file"""
+    output_file = os.path.basename(result.output_path)
+    print(f"\n{prefix} {result.excel_file} -> {output_file} ({result.seconds:.1f} giây)")
+    if result.cached:
+        print(f"   ✓ Không thay đổi, dùng lại kết quả trong cache: {result.output_path}")
+    elif result.success:
+        print(f"   ✓ Chuyển đổi thành công: {result.output_path}")
+    else:
+        print(f"   ✗ Chuyển đổi thất bại: {result.excel_file} - {result.error}")
+
+
+def _open_metrics_report(args):
+    """Mở file báo cáo metrics (JSON lines) của --metrics hoặc --profile, None nếu không đo"""
+    report_file = args.metrics or (report_path(args.profile) if args.profile else None)
+    if not report_file:
+        return None
+    print(f"Ghi thời gian từng giai đoạn chuyển đổi vào: {report_file}")
+    return open(report_file, 'w', encoding='utf-8')
+
+
+def _write_metrics(report, result):
+    """Ghi các bản ghi metrics của một file vào báo cáo ngay khi file chuyển đổi xong"""
+    if report is not None and result.metrics:
+        write_records(result.metrics, report)
+        report.flush()
+
+
+def _stop_watching(signum, frame):
+    """SIGTERM (ví dụ khi dừng service) dừng chế độ --watch như Ctrl+C"""
+    raise KeyboardInterrupt
+
+
+def _watch(args, input_dir, output_dir):
+    """Chế độ --watch: chạy liên tục cho đến khi nhấn Ctrl+C hoặc nhận SIGTERM"""
+    signal.signal(signal.SIGTERM, _stop_watching)
+    cache = None
+    if not args.no_cache:
+        cache = ConversionCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+    watcher = FolderWatcher(input_dir, _is_excel_file, args.settle, args.poll_interval, args.poll)
+    watcher.add_existing()
+
+    method = "inotify" if watcher.method == 'inotify' else f"kiểm tra mỗi {args.poll_interval:g} giây"
+    print(f"\nĐang theo dõi thư mục: {input_dir} ({method})")
+    print(f"Các file Markdown được lưu trong thư mục: {output_dir}")
+    print("Nhấn Ctrl+C để dừng.")
+
+    success_count = 0
+    error_count = 0
+    report = _open_metrics_report(args)
+    try:
+        for result in watch_conversions(watcher, output_dir, cache, force=args.force, jobs=args.jobs,
+                                        timeout=args.timeout, incremental=args.incremental,
+                                        measure=report is not None):
+            _print_result(result, time.strftime("[%H:%M:%S]"))
+            _write_metrics(report, result)
+            if result.success:
+                success_count += 1
+            else:
+                error_count += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if report is not None:
+            report.close()
+
+    print("\n" + "=" * 60)
+    print(f"ĐÃ DỪNG THEO DÕI: Thành công: {success_count}, Thất bại: {error_count}")
+    print("=" * 60)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Chuyển đổi tất cả file Excel trong thư mục input sang Markdown.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Số file chuyển đổi song song (mặc định: 1)')
+    parser.add_argument('--timeout', type=float,
+                        help='Thời gian tối đa (giây) cho mỗi file')
+    parser.add_argument('--non-interactive', action='store_true',
+                        help='Không chờ nhấn Enter và không mở thư mục (dùng cho cron). '
+                             'Tự động bật khi không chạy trong terminal.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Chỉ chuyển đổi lại các sheet đã thay đổi và ghép vào file .md có sẵn')
+    parser.add_argument('--force', action='store_true',
+                        help='Chuyển đổi lại tất cả file, kể cả file không thay đổi')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Không dùng cache chuyển đổi')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='Thư mục cache (mặc định: .excel2markdown_cache)')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Dung lượng tối đa của cache, tính bằng MB (mặc định: %(default)g)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Chạy liên tục: theo dõi thư mục input và chuyển đổi ngay các file mới '
+                             'hoặc vừa thay đổi (Ctrl+C để dừng)')
+    parser.add_argument('--poll', action='store_true',
+                        help='Với --watch: kiểm tra thư mục định kỳ thay vì dùng inotify (cho ổ mạng)')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='Với --watch: số giây giữa hai lần kiểm tra thư mục khi không có inotify '
+                             '(mặc định: %(default)g)')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help='Với --watch: file được coi là đã ghi xong khi không thay đổi trong '
+                             'số giây này (mặc định: %(default)g)')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Ghi thời gian từng giai đoạn (đọc, định dạng, ghi file...), số dòng, số ô và số byte '
+                             'của từng file và từng sheet vào FILE (JSON lines)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Chạy với cProfile và ghi kết quả vào FILE, kèm báo cáo --metrics '
+                             '(FILE.metrics.jsonl nếu không có --metrics). Chỉ dùng khi chuyển đổi '
+                             'trong tiến trình chính: không dùng cùng --jobs > 1, --timeout hay --watch')
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs phải lớn hơn hoặc bằng 1")
+    if args.profile and (args.jobs > 1 or args.timeout is not None or args.watch):
+        # cProfile chỉ đo tiến trình chính, không đo các tiến trình con
+        parser.error("--profile không dùng được cùng --jobs > 1, --timeout hay --watch")
+    if args.poll_interval <= 0 or args.settle < 0:
+        parser.error("--poll-interval phải lớn hơn 0 và --settle không được âm")
+    return args
+
+
+def main(argv=None):
     """
     Tự động chuyển đổi tất cả file Excel trong thư mục input sang Markdown trong thư mục output
     """
+    args = parse_args(argv)
+    interactive = not args.non_interactive and sys.stdin is not None and sys.stdin.isatty()
+
     print("=" * 60)
     print("EXCEL TO MARKDOWN CONVERTER")
     print("=" * 60)
-    
+
     # Kiểm tra các thư viện cần thiết
     try:
         import pandas
@@ -32,13 +551,13 @@ def main():
     except ImportError as e:
         print(f"Lỗi: Thiếu thư viện - {str(e)}")
         print("Vui lòng chạy Install_Dependencies.command (Mac) hoặc Install_Dependencies.bat (Windows)")
-        input("\nNhấn Enter để thoát...")
-        return
-    
+        _pause(interactive)
+        return 1
+
     # Đường dẫn tuyệt đối đến thư mục input và output
     input_dir = os.path.join(current_dir, "input")
     output_dir = os.path.join(current_dir, "output")
-    
+
     # Kiểm tra thư mục input và output
     if not os.path.exists(input_dir):
         try:
@@ -46,108 +565,102 @@ def main():
             print(f"Đã tạo thư mục input: {input_dir}")
         except OSError as e:
             print(f"Lỗi khi tạo thư mục input: {str(e)}")
-            input("\nNhấn Enter để thoát...")
-            return
-    
+            _pause(interactive)
+            return 1
+
     if not os.path.exists(output_dir):
         try:
             os.makedirs(output_dir)
             print(f"Đã tạo thư mục output: {output_dir}")
         except OSError as e:
             print(f"Lỗi khi tạo thư mục output: {str(e)}")
-            input("\nNhấn Enter để thoát...")
-            return
-    
+            _pause(interactive)
+            return 1
+
+    if args.watch:
+        return _watch(args, input_dir, output_dir)
+
     # Tìm tất cả file Excel trong thư mục input
     excel_files = []
-    for file in os.listdir(input_dir):
-        if file.endswith(".xlsx") or file.endswith(".xls"):
+    for file in sorted(os.listdir(input_dir)):
+        if _is_excel_file(file):
             excel_files.append(file)
-    
+
     # Kiểm tra nếu không có file Excel nào
     if not excel_files:
         print("\nKhông tìm thấy file Excel nào trong thư mục input!")
         print(f"Vui lòng đặt file Excel vào thư mục: {input_dir}")
-        
+
         # Mở thư mục input để người dùng có thể đặt file vào đó
-        try:
-            if sys.platform == 'win32':
-                os.startfile(input_dir)
-            elif sys.platform == 'darwin':  # macOS
-                import subprocess
-                subprocess.call(['open', input_dir])
-            else:  # Linux
-                import subprocess
-                subprocess.call(['xdg-open', input_dir])
-        except Exception:
-            pass  # Nếu không mở được thư mục thì bỏ qua
-            
-        input("\nNhấn Enter để thoát...")
-        return
-    
+        _open_folder(input_dir, interactive)
+        _pause(interactive)
+        return 0
+
     # Convert từng file Excel sang Markdown
     print(f"\nĐã tìm thấy {len(excel_files)} file Excel để chuyển đổi:")
-    
+    if args.jobs > 1:
+        print(f"Chuyển đổi song song với {args.jobs} tiến trình")
+
+    tasks = []
+    for excel_file in excel_files:
+        input_path = os.path.join(input_dir, excel_file)
+        tasks.append((excel_file, input_path, _output_path(output_dir, excel_file)))
+
     success_count = 0
+    cached_count = 0
     error_count = 0
-    
-    for i, excel_file in enumerate(excel_files, 1):
-        input_path = os.path.join(input_dir, excel_file)
-        
-        # Tạo tên file output (thay đổi phần mở rộng từ .xlsx/.xls sang .md)
-        output_file = Path(excel_file).stem + ".md"
-        output_path = os.path.join(output_dir, output_file)
-        
-        print(f"\n{i}. Đang chuyển đổi: {excel_file} -> {output_file}")
-        
-        try:
-            # Sử dụng advanced converter để chuyển đổi
-            result = convert_excel_advanced(
-                excel_file=input_path,
-                output_file=output_path,
-                include_formulas=True  # Bao gồm công thức trong file Markdown
-            )
-            
-            if result:
-                print(f"   ✓ Chuyển đổi thành công: {output_path}")
-                success_count += 1
-            else:
-                print(f"   ✗ Chuyển đổi thất bại: {excel_file}")
-                error_count += 1
-                
-        except Exception as e:
-            print(f"   ✗ Lỗi khi chuyển đổi {excel_file}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            error_count += 1
-    
+    failures = []
+    start = time.time()
+
+    report = _open_metrics_report(args)
+    if args.no_cache:
+        results = run_conversions(tasks, jobs=args.jobs, timeout=args.timeout, incremental=args.incremental,
+                                  measure=report is not None)
+    else:
+        cache = ConversionCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+        results = run_cached_conversions(tasks, cache, force=args.force, jobs=args.jobs, timeout=args.timeout,
+                                         incremental=args.incremental, measure=report is not None)
+
+    # Các file được chuyển đổi trong lúc duyệt results
+    try:
+        with profiled(args.profile):
+            for result in results:
+                _print_result(result, f"{result.index + 1}.")
+                _write_metrics(report, result)
+                if result.cached:
+                    success_count += 1
+                    cached_count += 1
+                elif result.success:
+                    success_count += 1
+                else:
+                    failures.append(result)
+                    error_count += 1
+    finally:
+        if report is not None:
+            report.close()
+
     # Hiển thị kết quả
     print("\n" + "=" * 60)
-    print(f"KẾT QUẢ: Thành công: {success_count}, Thất bại: {error_count}")
+    print(f"KẾT QUẢ: Thành công: {success_count} (từ cache: {cached_count}), Thất bại: {error_count} "
+          f"(tổng thời gian: {time.time() - start:.1f} giây)")
+    for result in failures:
+        print(f"   ✗ {result.excel_file}: {result.error}")
     print("=" * 60)
-    
+
     if success_count > 0:
         print(f"\nCác file Markdown đã được lưu trong thư mục: {output_dir}")
-        
+
         # Mở thư mục output nếu có file thành công
-        try:
-            if sys.platform == 'win32':
-                os.startfile(output_dir)
-            elif sys.platform == 'darwin':  # macOS
-                import subprocess
-                subprocess.call(['open', output_dir])
-            else:  # Linux
-                import subprocess
-                subprocess.call(['xdg-open', output_dir])
-        except Exception:
-            pass  # Nếu không mở được thư mục thì bỏ qua
-    
+        _open_folder(output_dir, interactive)
+
     print("\nCảm ơn bạn đã sử dụng Excel2Markdown!")
-    input("\nNhấn Enter để thoát...")
+    _pause(interactive)
+    return 1 if error_count else 0
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         print(f"\nĐã xảy ra lỗi: {str(e)}")
-        input("\nNhấn Enter để thoát...") 
\ No newline at end of file
+        _pause("--non-interactive" not in sys.argv and sys.stdin is not None and sys.stdin.isatty())
+        sys.exit(1)
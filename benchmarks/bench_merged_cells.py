@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: merged-cell lookup with a linear scan vs the per-sheet index.
+
+The linear scan is far too slow to run over a whole sheet with thousands of
+merged ranges, so it is timed on a sample of cells and extrapolated.
+
+Usage: python benchmarks/bench_merged_cells.py [--merged N] [--rows N] [--cols N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from openpyxl.utils import get_column_letter
+
+from advanced_converter import AdvancedExcelConverter
+from benchmarks.synthetic import generate_workbook
+
+
+def linear_lookup(row, col, merged_ranges):
+    """Lookup as previously done by the converter, scanning every range for each cell"""
+    cell_coord = f"{get_column_letter(col)}{row}"
+    for merged_range in merged_ranges:
+        if cell_coord in merged_range:
+            return merged_range
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark merged-cell lookup.')
+    parser.add_argument('--merged', type=int, default=10000, help='Number of merged ranges')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--cols', type=int, default=6)
+    parser.add_argument('--sample', type=int, default=200, help='Cells timed with the linear scan')
+    args = parser.parse_args()
+
+    excel_file = os.path.join(tempfile.gettempdir(), f"bench_merged_{args.merged}_{args.rows}x{args.cols}.xlsx")
+    if not os.path.exists(excel_file):
+        print(f"Generating {excel_file}...")
+        generate_workbook(excel_file, rows=args.rows, cols=args.cols, merged_ranges=args.merged)
+
+    converter = AdvancedExcelConverter(excel_file)
+    sheet_name = converter.get_sheet_names()[0]
+    sheet = converter.workbook[sheet_name]
+    merged_ranges = converter._get_merged_cell_ranges(sheet)
+    coords = [(row, col) for row in range(1, sheet.max_row + 1) for col in range(1, sheet.max_column + 1)]
+    print(f"{len(merged_ranges)} merged ranges, {len(coords)} cells")
+
+    sample = coords[:args.sample]
+    start = time.perf_counter()
+    for row, col in sample:
+        linear_lookup(row, col, merged_ranges)
+    linear = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    merged_index = converter._build_merged_index(merged_ranges, sheet.max_row, sheet.max_column)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    for row, col in coords:
+        merged_index.get((row, col))
+    indexed = (time.perf_counter() - start) / len(coords)
+
+    print(f"linear scan : {linear * 1e6:10.2f} us/cell  (~{linear * len(coords):.1f} s for the sheet)")
+    print(f"index       : {indexed * 1e6:10.2f} us/cell  ({indexed * len(coords) + build:.3f} s incl. {build:.3f} s build)")
+
+    start = time.perf_counter()
+    converter.convert_sheet_to_markdown(sheet_name)
+    print(f"convert_sheet_to_markdown: {time.perf_counter() - start:.2f} s")
+    converter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
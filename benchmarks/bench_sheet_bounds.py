@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sheet bounds found by a pre-scan of every cell vs while parsing.
+
+Before timing, the converter's output in loaded and streaming mode is checked
+against the pre-scan renderer (at the streaming table width for streaming
+mode) on hand-written edge-case sheets: leading blank rows and columns, a
+stale or missing <dimension>, cells without r= or with reordered attributes,
+values under merged ranges and formulas without a cached value. The exit code
+is 1 if any output differs.
+
+Usage: python benchmarks/bench_sheet_bounds.py [--rows N] [--cols N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import openpyxl
+
+from advanced_converter import AdvancedExcelConverter
+from benchmarks.synthetic import generate_workbook
+
+SHEET_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '{dimension}<sheetData>{rows}</sheetData>{merged}</worksheet>'
+)
+
+
+def _text(ref, text):
+    return f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+def _number(ref, value):
+    return f'<c r="{ref}"><v>{value}</v></c>'
+
+
+# Sheet name -> (<dimension> ref or None, <sheetData> rows, merged range refs)
+EDGE_CASES = {
+    'leading_blanks': (
+        'D5:Z9',
+        '<row r="1"><c r="Z1" s="0"/></row>'
+        f'<row r="5">{_text("D5", "x")}{_text("F5", "y")}</row>'
+        f'<row r="7">{_number("E7", 7)}</row>'
+        '<row r="8"><c r="D8" s="0"/></row>'
+        f'<row r="9"><c r="D9"><f>E7*2</f><v>14</v></c></row>',
+        [],
+    ),
+    'stale_dimension': (
+        'A1:B2',
+        f'<row r="1">{_text("A1", "a")}{_text("B1", "b")}</row>'
+        f'<row r="4">{_number("A4", 1)}{_number("D4", 4)}</row>'
+        f'<row r="6">{_text("F6", "last")}</row>',
+        [],
+    ),
+    'missing_dimension': (
+        None,
+        f'<row r="2">{_text("B2", "a")}{_text("C2", "b")}</row>'
+        f'<row r="3">{_number("E3", 3)}</row>',
+        [],
+    ),
+    'no_cell_refs': (
+        'A1:C4',
+        '<row r="1"><c t="inlineStr"><is><t>h1</t></is></c><c t="inlineStr"><is><t>h2</t></is></c></row>'
+        '<row r="2"><c><v>1</v></c><c/><c><v>3</v></c></row>'
+        '<row><c><v>4</v></c><c><v>5</v></c></row>',
+        [],
+    ),
+    'reordered_attributes': (
+        'A1:C3',
+        '<row spans="1:3" r="1"><c t="inlineStr" s="0" r="A1"><is><t>h1</t></is></c>'
+        '<c s="0" t="inlineStr" r="C1"><is><t>h3</t></is></c></row>'
+        '<row spans="1:3" r="3"><c s="0" r="B3"><v>2</v></c></row>',
+        [],
+    ),
+    'merged_values': (
+        'A1:D5',
+        f'<row r="1">{_text("A1", "h1")}{_text("B1", "h2")}{_text("C1", "h3")}</row>'
+        f'<row r="2">{_text("A2", "anchor")}{_text("B2", "hidden")}</row>'
+        f'<row r="4">{_text("C4", "kept")}</row>'
+        f'<row r="5">{_text("D5", "hidden")}</row>',
+        ['A2:B2', 'C4:D5'],
+    ),
+    'formula_no_cache': (
+        'A1:C2',
+        f'<row r="1">{_text("A1", "n")}{_text("B1", "double")}{_text("C1", "text")}</row>'
+        f'<row r="2">{_number("A2", 2)}<c r="B2"><f>A2*2</f></c>'
+        '<c r="C2" t="str"><f>A2&amp;"x"</f></c></row>'
+        '<row r="3"><c r="D3"><f>SUM(A2:B2)</f></c></row>',
+        [],
+    ),
+}
+
+
+class PreScanConverter(AdvancedExcelConverter):
+    """
+    Converter rendering loaded sheets as previously done, after a pre-scan of every cell
+
+    With stream_width, tables are as wide as in streaming mode, which takes
+    the width from the verified <dimension> and keeps trailing empty columns.
+    """
+
+    stream_width = False
+
+    def _iter_loaded_sheet(self, sheet_name, include_formulas=False, window=None):
+        sheet = self.workbook.load(sheet_name)
+
+        data_rows = []
+        max_cols = 0
+        for row_idx, row in enumerate(sheet.iter_rows(), 1):
+            row_has_data = False
+            for col_idx, cell in enumerate(row, 1):
+                if cell.value is not None or cell.formula is not None:
+                    row_has_data = True
+                    max_cols = max(max_cols, col_idx)
+            if row_has_data:
+                data_rows.append(row_idx)
+
+        if not data_rows:
+            yield f"## {sheet_name}\n\n*Empty sheet*\n\n"
+            return
+
+        if self.stream_width:
+            max_cols = max(max_cols, self.workbook.stream(sheet_name).max_column)
+        min_row, max_row = min(data_rows), max(data_rows)
+        merged_index = self._build_merged_index(self._get_merged_cell_ranges(sheet), max_row, max_cols)
+
+        header_cells = [sheet.cell(min_row, col_idx) for col_idx in range(1, max_cols + 1)]
+        yield self._format_row(header_cells, merged_index) + "\n"
+        yield self._format_alignment_row(header_cells) + "\n"
+
+        for row_idx in range(min_row + 1, max_row + 1):
+            if row_idx in data_rows:
+                cells = [sheet.cell(row_idx, col_idx) for col_idx in range(1, max_cols + 1)]
+                yield self._format_row(cells, merged_index, include_formulas) + "\n"
+
+
+def write_edge_workbook(path):
+    """Write a workbook with one sheet per edge case, whose XML is replaced by the hand-written one"""
+    workbook = openpyxl.Workbook()
+    workbook.active.title = next(iter(EDGE_CASES))
+    for name in list(EDGE_CASES)[1:]:
+        workbook.create_sheet(name)
+    template = path + ".template"
+    workbook.save(template)
+
+    with zipfile.ZipFile(template) as src, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                sheet_idx = int(item.filename[len('xl/worksheets/sheet'):-len('.xml')])
+                dimension, rows, merged = EDGE_CASES[workbook.sheetnames[sheet_idx - 1]]
+                data = SHEET_XML.format(
+                    dimension=f'<dimension ref="{dimension}"/>' if dimension else '',
+                    rows=rows,
+                    merged=(f'<mergeCells count="{len(merged)}">'
+                            + ''.join(f'<mergeCell ref="{ref}"/>' for ref in merged)
+                            + '</mergeCells>') if merged else '',
+                ).encode()
+            dst.writestr(item, data)
+    os.remove(template)
+    return path
+
+
+def check_edge_cases(path):
+    """Compare loaded and streaming output with the pre-scan renderer; returns the differing cases"""
+    mismatches = []
+    reference = PreScanConverter(path, engine='openpyxl')
+    converter = AdvancedExcelConverter(path, engine='openpyxl')
+    try:
+        for name in EDGE_CASES:
+            for include_formulas in (False, True):
+                for streaming in (False, True):
+                    reference.stream_width = streaming
+                    expected = reference.convert_to_markdown(name, include_formulas)
+                    if converter.convert_to_markdown(name, include_formulas, streaming) != expected:
+                        mode = 'streaming' if streaming else 'loaded'
+                        mismatches.append(f"{name} ({mode}{', formulas' if include_formulas else ''})")
+    finally:
+        reference.close()
+        converter.close()
+    return mismatches
+
+
+def timed(converter_class, path):
+    """Seconds taken to convert every sheet of a workbook in loaded mode"""
+    start = time.perf_counter()
+    converter = converter_class(path, engine='openpyxl')
+    try:
+        converter.convert_to_markdown()
+    finally:
+        converter.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sheet bounds detection.')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--cols', type=int, default=10)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="excel2markdown_bounds_")
+    try:
+        mismatches = check_edge_cases(write_edge_workbook(os.path.join(tmpdir, "edge_cases.xlsx")))
+        print(f"edge cases same output: {not mismatches}" + (f" ({', '.join(mismatches)})" if mismatches else ""))
+
+        path = generate_workbook(os.path.join(tmpdir, "bounds.xlsx"), rows=args.rows, cols=args.cols)
+        pre_scan = timed(PreScanConverter, path)
+        single_pass = timed(AdvancedExcelConverter, path)
+        print(f"{'rows':>10} {'pre-scan':>10} {'single pass':>12} {'speedup':>8}")
+        print(f"{args.rows:>10} {pre_scan:>9.2f}s {single_pass:>11.2f}s {pre_scan / single_pass:>7.1f}x")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
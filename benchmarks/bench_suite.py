@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: every conversion path on a set of synthetic workbooks.
+
+Each scenario is a generated workbook with a given size, formula ratio, merge
+density, style variety and sheet count (generated once and kept in a temp
+directory). Each target converts it through one public entry point:
+
+- advanced: ``AdvancedExcelConverter`` (formatting, merged cells, formulas)
+- advanced_streaming: the same in streaming mode
+- basic: ``excel_to_markdown``
+- batch: ``batch_convert.run_conversions`` over several copies of the workbook
+
+Every (scenario, target) pair runs in its own child process, so its peak RSS
+is measured in isolation; the import footprint is reported separately. Times
+are the median of --repeat runs.
+
+Results are written as JSON with --output. Pass a previous result file with
+--baseline to compare against it: pairs slower or heavier than the baseline by
+more than --tolerance are reported and the exit code is 1. Baselines are
+machine-specific, record one on the machine that runs the comparison.
+
+Usage: python benchmarks/bench_suite.py [--scale 0.1] [--scenarios plain styled] [--targets basic]
+       python benchmarks/bench_suite.py --output benchmarks/baseline.json
+       python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+# name -> generate_workbook() parameters; merge_density is the fraction of
+# data cells covered by 1x2 merged ranges
+SCENARIOS = {
+    'plain': {'rows': 20000, 'cols': 10, 'formula_ratio': 0},
+    'formulas': {'rows': 20000, 'cols': 10, 'formula_ratio': 0.3},
+    'merged': {'rows': 20000, 'cols': 10, 'formula_ratio': 0, 'merge_density': 0.05},
+    'styled': {'rows': 20000, 'cols': 10, 'formula_ratio': 0, 'styles': 16},
+    'multi_sheet': {'rows': 5000, 'cols': 10, 'formula_ratio': 0.1, 'sheets': 8},
+    'wide': {'rows': 2000, 'cols': 200, 'formula_ratio': 0.1},
+}
+
+TARGETS = ('advanced', 'advanced_streaming', 'basic', 'batch')
+
+# Copies of the workbook converted by the batch target
+BATCH_COPIES = 3
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), "excel2markdown_bench")
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or of its finished children) in MB, None if unknown"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def scenario_params(name, scale=1.0):
+    """generate_workbook() keyword arguments of a scenario, with its row count scaled"""
+    params = dict(SCENARIOS[name])
+    params['rows'] = max(1, int(params['rows'] * scale))
+    density = params.pop('merge_density', 0)
+    params['merged_ranges'] = int(params['rows'] * params['cols'] * density / 2)
+    return params
+
+
+def scenario_workbook(name, scale=1.0):
+    """Path of a scenario's workbook, generated on first use"""
+    from benchmarks.synthetic import generate_workbook
+    params = scenario_params(name, scale)
+    tag = "_".join(f"{key}{value:g}" for key, value in sorted(params.items()))
+    excel_file = os.path.join(DATA_DIR, f"{name}_{tag}.xlsx")
+    if not os.path.exists(excel_file):
+        print(f"Generating {excel_file}...", file=sys.stderr)
+        # Generate under another name so an interrupted run leaves no truncated workbook behind
+        generate_workbook(excel_file + ".part", **params)
+        os.replace(excel_file + ".part", excel_file)
+    return excel_file
+
+
+def convert(target, excel_file, output_dir, jobs=1):
+    """Convert excel_file with a target, writing the Markdown to output_dir"""
+    output_file = os.path.join(output_dir, "output.md")
+    if target in ('advanced', 'advanced_streaming'):
+        from advanced_converter import AdvancedExcelConverter
+        converter = AdvancedExcelConverter(excel_file)
+        try:
+            converter.write_markdown(output_file, streaming=target == 'advanced_streaming')
+        finally:
+            converter.close()
+    elif target == 'basic':
+        from excel2markdown import excel_to_markdown
+        if not excel_to_markdown(excel_file, output_file):
+            raise RuntimeError("excel_to_markdown failed")
+    else:
+        from batch_convert import run_conversions
+        tasks = [(f"copy{idx}", excel_file, os.path.join(output_dir, f"copy{idx}.md")) for idx in range(BATCH_COPIES)]
+        for result in run_conversions(tasks, jobs=jobs):
+            if not result.success:
+                raise RuntimeError(result.error)
+
+
+def run_target(target, excel_file, repeat, jobs):
+    """Child process side: time repeat conversions, return the measurements"""
+    import advanced_converter, batch_convert, excel2markdown  # noqa: F401, imports are not timed
+    import_rss = peak_rss_mb()
+    runs = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            convert(target, excel_file, output_dir, jobs)
+            runs.append(time.perf_counter() - start)
+    peak = peak_rss_mb()
+    children = peak_rss_mb(children=True)
+    if peak is not None and children:
+        # Parallel batch conversions run in child processes
+        peak = max(peak, children)
+    return {'runs': [round(seconds, 4) for seconds in runs], 'import_rss_mb': import_rss, 'peak_rss_mb': peak}
+
+
+def measure(scenario, target, scale, repeat, jobs):
+    """Run one (scenario, target) pair in a child process"""
+    excel_file = scenario_workbook(scenario, scale)
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--run', target, '--file', excel_file,
+         '--repeat', str(repeat), '--jobs', str(jobs)],
+        cwd=ROOT_DIR,
+    )
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    result.update({
+        'scenario': scenario,
+        'target': target,
+        'params': scenario_params(scenario, scale),
+        'seconds': round(statistics.median(result['runs']), 4),
+    })
+    return result
+
+
+def environment():
+    """Versions and machine the results were measured with"""
+    import numpy
+    import openpyxl
+    import pandas
+    try:
+        import python_calamine
+        calamine = getattr(python_calamine, '__version__', 'installed')
+    except ImportError:
+        calamine = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'openpyxl': openpyxl.__version__,
+        'python_calamine': calamine,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline result file
+
+    Returns:
+    --------
+    list of str
+        One line per regression (time or peak memory above baseline * (1 + tolerance))
+    """
+    known = {(entry['scenario'], entry['target']): entry for entry in baseline['results']}
+    regressions = []
+    print(f"\n{'scenario':<12} {'target':<19} {'seconds':>9} {'baseline':>9} {'ratio':>7} "
+          f"{'peak MB':>9} {'baseline':>9}")
+    for result in results:
+        entry = known.get((result['scenario'], result['target']))
+        if entry is None:
+            print(f"{result['scenario']:<12} {result['target']:<19} {result['seconds']:>9.3f} {'(new)':>9}")
+            continue
+        if entry['params'] != result['params']:
+            print(f"{result['scenario']:<12} {result['target']:<19} different workbook parameters, not compared")
+            continue
+        ratio = result['seconds'] / entry['seconds'] if entry['seconds'] else float('inf')
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  SLOWER"
+            regressions.append(f"{result['scenario']}/{result['target']}: {result['seconds']:.3f} s "
+                               f"vs {entry['seconds']:.3f} s ({ratio:.2f}x)")
+        peak, base_peak = result.get('peak_rss_mb'), entry.get('peak_rss_mb')
+        if peak and base_peak and peak > base_peak * (1 + tolerance):
+            flag += "  MORE MEMORY"
+            regressions.append(f"{result['scenario']}/{result['target']}: peak RSS {peak:.0f} MB "
+                               f"vs {base_peak:.0f} MB")
+        print(f"{result['scenario']:<12} {result['target']:<19} {result['seconds']:>9.3f} {entry['seconds']:>9.3f} "
+              f"{ratio:>6.2f}x {peak or 0:>9.1f} {base_peak or 0:>9.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every conversion path on synthetic workbooks.')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply the row counts of the scenarios')
+    parser.add_argument('--repeat', type=int, default=3, help='Conversions per pair; the median time is kept')
+    parser.add_argument('--jobs', type=int, default=1, help='Parallel conversions of the batch target')
+    parser.add_argument('--output', help='Write the results to this JSON file (e.g. to record a baseline)')
+    parser.add_argument('--baseline', help='Compare with a JSON file written by --output')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown or memory growth over the baseline (default: %(default)g = 20%%)')
+    parser.add_argument('--run', choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_target(args.run, args.file, args.repeat, args.jobs)))
+        return 0
+
+    results = []
+    print(f"{'scenario':<12} {'target':<19} {'seconds':>9} {'min':>9} {'peak MB':>9} {'import MB':>9}")
+    for scenario in args.scenarios:
+        for target in args.targets:
+            result = measure(scenario, target, args.scale, args.repeat, args.jobs)
+            results.append(result)
+            print(f"{scenario:<12} {target:<19} {result['seconds']:>9.3f} {min(result['runs']):>9.3f} "
+                  f"{result['peak_rss_mb'] or 0:>9.1f} {result['import_rss_mb'] or 0:>9.1f}")
+
+    report = {'environment': environment(), 'scale': args.scale, 'repeat': args.repeat, 'jobs': args.jobs,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regression above {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DataFrame.to_markdown (tabulate) vs the native pipe-table renderer.
+
+Frames are built in memory with the column types read_excel produces (text,
+floats with missing values, integers, dates) so that only the rendering is
+timed. Before timing, nullable extension columns (Int64 and boolean, with and
+without missing values) are checked against to_markdown. At 1M rows tabulate takes several minutes; use --baseline-max-rows to
+skip it above a size.
+
+Usage: python benchmarks/bench_table_rendering.py [--rows 10000 100000 1000000] [--cols N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+import pandas as pd
+
+from markdown_table import dataframe_to_markdown
+
+
+def make_frame(rows, cols, seed=0):
+    """Mixed-type frame resembling a sheet read with pandas.read_excel"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col_idx in range(cols):
+        kind = col_idx % 4
+        if kind == 0:
+            values = pd.Series([f"text {value}" for value in rng.integers(0, 1000, rows).tolist()], dtype=object)
+        elif kind == 1:
+            values = rng.random(rows) * 1000
+            values[rng.random(rows) < 0.05] = np.nan
+        elif kind == 2:
+            values = rng.integers(-10**6, 10**6, rows)
+        else:
+            values = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10**6, rows), unit="min")
+        data[f"Column {col_idx + 1}"] = values
+    return pd.DataFrame(data)
+
+
+def nullable_frames():
+    """
+    Frames with nullable Int64 and boolean columns, with and without NA
+
+    Each has a text column, as sheets do: tabulate formats df.values, so
+    frames without text are the known all-numeric difference.
+    """
+    text = ['x', 'y', 'z']
+    columns = {
+        'Int64': pd.array([1, 2, 3], dtype='Int64'),
+        'Int64 with NA': pd.array([1, None, 3], dtype='Int64'),
+        'Int64 above 2**53 with NA': pd.array([2**53 + 1, None, -5], dtype='Int64'),
+        'boolean': pd.array([True, False, True], dtype='boolean'),
+        'boolean with NA': pd.array([True, None, False], dtype='boolean'),
+    }
+    return {name: pd.DataFrame({'a': values, 'b': text}) for name, values in columns.items()}
+
+
+def check_nullable_parity():
+    """Compare the native renderer with to_markdown on nullable columns; returns the names that differ"""
+    return [name for name, df in nullable_frames().items()
+            if dataframe_to_markdown(df) != df.to_markdown(index=False)]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Markdown table rendering.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--baseline-max-rows', type=int, default=None,
+                        help='Do not time to_markdown on frames larger than this')
+    args = parser.parse_args()
+
+    mismatches = check_nullable_parity()
+    print(f"nullable columns same layout: {not mismatches}" + (f" ({', '.join(mismatches)})" if mismatches else ""))
+    print(f"{'rows':>10} {'to_markdown':>12} {'native':>10} {'speedup':>8}  same layout")
+    for rows in args.rows:
+        df = make_frame(rows, args.cols)
+        native, native_seconds = timed(dataframe_to_markdown, df)
+        if args.baseline_max_rows is not None and rows > args.baseline_max_rows:
+            print(f"{rows:>10} {'skipped':>12} {native_seconds:>9.2f}s")
+            continue
+        baseline, baseline_seconds = timed(df.to_markdown, index=False)
+        same = baseline == native
+        print(f"{rows:>10} {baseline_seconds:>11.2f}s {native_seconds:>9.2f}s "
+              f"{baseline_seconds / native_seconds:>7.1f}x  {same}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: double openpyxl load vs the single-pass workbook loader.
+
+Each variant runs in its own child process so that its peak RSS is measured
+in isolation.
+
+Usage: python benchmarks/bench_workbook_loading.py [--rows N] [--cols N] [--file path]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.bench_suite import peak_rss_mb  # noqa: E402
+
+
+def run_variant(variant, excel_file):
+    """Load every sheet of excel_file with the given loader"""
+    start = time.perf_counter()
+    if variant == 'before':
+        import openpyxl
+        workbook = openpyxl.load_workbook(excel_file, data_only=False)
+        workbook_data_only = openpyxl.load_workbook(excel_file, data_only=True)
+        cells = sum(len(ws._cells) for ws in workbook.worksheets)
+    else:
+        from workbook_reader import SinglePassWorkbook
+        workbook = SinglePassWorkbook(excel_file)
+        cells = 0
+        for sheet_name in workbook.sheetnames:
+            cells += len(workbook[sheet_name]._cells)
+        workbook.close()
+    elapsed = time.perf_counter() - start
+    return {'variant': variant, 'seconds': round(elapsed, 3),
+            'peak_rss_mb': peak_rss_mb(), 'cells': cells}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark workbook loading.')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--file', help='Use an existing workbook instead of a synthetic one')
+    parser.add_argument('--variant', choices=['before', 'after'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.file)))
+        return 0
+
+    excel_file = args.file
+    if not excel_file:
+        from benchmarks.synthetic import generate_workbook
+        excel_file = os.path.join(tempfile.gettempdir(), f"bench_load_{args.rows}x{args.cols}.xlsx")
+        if not os.path.exists(excel_file):
+            print(f"Generating {excel_file}...")
+            generate_workbook(excel_file, rows=args.rows, cols=args.cols)
+
+    size_mb = os.path.getsize(excel_file) / (1024 * 1024)
+    print(f"Workbook: {excel_file} ({size_mb:.1f} MB)")
+    for variant in ('before', 'after'):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--variant', variant, '--file', excel_file],
+            cwd=ROOT_DIR,
+        )
+        result = json.loads(output)
+        print(f"{variant:>6}: {result['seconds']:8.3f} s  peak RSS {result['peak_rss_mb'] or 0:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
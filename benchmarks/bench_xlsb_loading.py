@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: reading the same data from .xlsb and from .xlsx.
+
+Nothing in the Python ecosystem writes .xlsb, so the binary workbook has to
+be saved from Excel (or LibreOffice). Run once with --generate to write the
+.xlsx, save a copy of it as .xlsb, then pass both files. Each workbook is
+converted to plain Markdown (no formatting) with every engine that can read
+it, and the outputs are checked to be identical.
+
+Usage: python benchmarks/bench_xlsb_loading.py --xlsx data.xlsx --xlsb data.xlsb
+       python benchmarks/bench_xlsb_loading.py --generate data.xlsx [--rows N] [--cols N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from advanced_converter import AdvancedExcelConverter
+from workbook_reader import BINARY_FORMATS, detect_format
+
+
+def convert(excel_file, engine):
+    """Convert every sheet without formatting, returning (markdown, seconds)"""
+    start = time.perf_counter()
+    converter = AdvancedExcelConverter(excel_file, engine, formatting=False)
+    try:
+        markdown = converter.convert_to_markdown()
+    finally:
+        converter.close()
+    return markdown, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark .xlsb against .xlsx reading.')
+    parser.add_argument('--xlsx', help='Workbook in .xlsx format')
+    parser.add_argument('--xlsb', help='The same workbook saved as .xlsb')
+    parser.add_argument('--generate', metavar='PATH', help='Write a synthetic .xlsx to save as .xlsb, then exit')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--cols', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.generate:
+        from benchmarks.synthetic import generate_workbook
+        # No formulas: .xlsb and .xlsx must hold the same cached values
+        generate_workbook(args.generate, rows=args.rows, cols=args.cols, formula_ratio=0)
+        print(f"Generated {args.generate}, save it as .xlsb and run again with --xlsx and --xlsb")
+        return 0
+    if not (args.xlsx and args.xlsb):
+        parser.error('--xlsx and --xlsb are required (or --generate)')
+
+    runs = []
+    for excel_file in (args.xlsb, args.xlsx):
+        engines = ['calamine'] if detect_format(excel_file) in BINARY_FORMATS else ['calamine', 'openpyxl']
+        size_mb = os.path.getsize(excel_file) / (1024 * 1024)
+        for engine in engines:
+            markdown, seconds = convert(excel_file, engine)
+            runs.append((os.path.basename(excel_file), size_mb, engine, seconds, markdown))
+
+    reference = runs[0][3]
+    print(f"{'workbook':<30} {'size':>9} {'engine':>9} {'seconds':>9} {'vs xlsb':>8}  same output")
+    for name, size_mb, engine, seconds, markdown in runs:
+        print(f"{name:<30} {size_mb:>7.1f}MB {engine:>9} {seconds:>9.2f} {seconds / reference:>7.1f}x  "
+              f"{markdown == runs[0][4]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
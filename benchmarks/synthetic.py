@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Synthetic workbook generators for the benchmarks.
+
+Workbooks are written with openpyxl's write-only mode so that large files can
+be generated quickly and without holding the whole sheet in memory.
+"""
+import os
+import random
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+
+def _merged_ranges(count, rows, cols):
+    """Lay out count horizontal 1x2 merged ranges over the data rows"""
+    pairs_per_row = cols // 2
+    if count > rows * pairs_per_row:
+        raise ValueError(f"Cannot fit {count} merged ranges in {rows} rows x {cols} columns")
+    ranges = []
+    for idx in range(count):
+        row_idx = 2 + idx % rows
+        col_idx = 1 + 2 * (idx // rows)
+        ranges.append(CellRange(min_col=col_idx, min_row=row_idx, max_col=col_idx + 1, max_row=row_idx))
+    return ranges
+
+
+def _cell_styles(count):
+    """count distinct (font, alignment) pairs: bold/italic/underline combined with horizontal alignments"""
+    styles = []
+    for horizontal in (None, 'left', 'center', 'right'):
+        for flags in range(8):
+            font = Font(bold=bool(flags & 1), italic=bool(flags & 2), underline='single' if flags & 4 else None)
+            styles.append((font, Alignment(horizontal=horizontal)))
+    if count > len(styles):
+        raise ValueError(f"At most {len(styles)} cell styles can be generated")
+    return styles[:count]
+
+
+def generate_workbook(path, rows=10000, cols=10, sheets=1, formula_ratio=0.1, merged_ranges=0, styles=0, seed=0):
+    """
+    Write a synthetic workbook and return its path
+
+    Parameters:
+    -----------
+    path : str
+        Destination .xlsx path
+    rows : int
+        Number of data rows per sheet (a bold header row is added on top)
+    cols : int
+        Number of columns per sheet
+    sheets : int
+        Number of sheets
+    formula_ratio : float
+        Fraction of data cells that hold a formula instead of a constant
+    merged_ranges : int
+        Number of 1x2 merged ranges per sheet
+    styles : int
+        Number of distinct cell styles (font and alignment) given at random
+        to the data cells; 0 leaves them unstyled
+    seed : int
+        Seed for the random generator, so runs are reproducible
+    """
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    header_font = Font(bold=True)
+    cell_styles = _cell_styles(styles)
+
+    for sheet_idx in range(sheets):
+        sheet = workbook.create_sheet(f"Sheet{sheet_idx + 1}")
+        header = []
+        for col_idx in range(cols):
+            cell = WriteOnlyCell(sheet, value=f"Column {col_idx + 1}")
+            cell.font = header_font
+            header.append(cell)
+        sheet.append(header)
+
+        for row_idx in range(2, rows + 2):
+            row = []
+            for col_idx in range(cols):
+                if col_idx and rng.random() < formula_ratio:
+                    value = f"=A{row_idx}*{col_idx}"
+                elif col_idx % 3 == 0:
+                    value = f"text {rng.randint(0, 999)}"
+                else:
+                    value = rng.random() * 1000
+                if cell_styles:
+                    cell = WriteOnlyCell(sheet, value=value)
+                    cell.font, cell.alignment = rng.choice(cell_styles)
+                    value = cell
+                row.append(value)
+            sheet.append(row)
+
+        if merged_ranges:
+            # Assigned in one go: MultiCellRange.add() is linear per call
+            sheet.merged_cells = MultiCellRange(_merged_ranges(merged_ranges, rows, cols))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    workbook.save(path)
+    return path
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of converted Markdown documents.
+
+Entries are keyed by the SHA-256 of the workbook content together with the
+conversion options and the converter version, so an unchanged workbook
+converted with the same options is never converted twice. The cache lives in
+a directory holding one ``<key>.md`` file per entry and an ``index.json`` with
+entry sizes and last use times; least recently used entries are evicted once
+the total size exceeds a limit.
+
+To avoid rehashing large unchanged files on every run, the index also
+remembers the hash of each source path together with its size and mtime.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from markdown_writer import replace_atomically
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+INDEX_FILE = "index.json"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """
+    On-disk cache mapping (workbook content, options) to a Markdown document
+
+    Parameters:
+    -----------
+    cache_dir : str
+        Directory holding the cached documents and the index
+    max_bytes : int, optional
+        Total size of cached documents above which the least recently used
+        entries are evicted
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.md")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('entries', {})
+        index.setdefault('sources', {})
+        return index
+
+    def save(self):
+        """Write the index atomically, forgetting source files that no longer exist"""
+        sources = self._index['sources']
+        for path in [path for path in sources if not os.path.exists(path)]:
+            del sources[path]
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self._index_path())
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def source_hash(self, path):
+        """Content hash of a workbook, reusing the remembered hash when size and mtime are unchanged"""
+        stat = os.stat(path)
+        abs_path = os.path.abspath(path)
+        known = self._index['sources'].get(abs_path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['hash']
+        digest = file_hash(path)
+        self._index['sources'][abs_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        return digest
+
+    def make_key(self, path, options):
+        """
+        Cache key of a workbook converted with the given options
+
+        Parameters:
+        -----------
+        path : str
+            Path to the workbook
+        options : dict
+            JSON-serialisable conversion options, including the converter version
+        """
+        payload = json.dumps({'source': self.source_hash(path), 'options': options}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def fetch(self, key, output_path):
+        """Copy a cached document to output_path; return False on a cache miss"""
+        entry = self._index['entries'].get(key)
+        entry_path = self._entry_path(key)
+        if entry is None or not os.path.exists(entry_path):
+            return False
+        with replace_atomically(output_path) as tmp_path:
+            shutil.copyfile(entry_path, tmp_path)
+        entry['last_used'] = time.time()
+        return True
+
+    def store(self, key, output_path):
+        """Add a freshly converted document to the cache and evict old entries if needed"""
+        entry_path = self._entry_path(key)
+        shutil.copyfile(output_path, entry_path)
+        self._index['entries'][key] = {'size': os.path.getsize(entry_path), 'last_used': time.time()}
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = self._index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(key)['size']
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Per-phase timing and counters of conversions.
+
+A ``ConversionMetrics`` object handed to a converter records, for the
+workbook and for each sheet, how long every phase took along with the number
+of rows, cells and Markdown bytes produced. Phases are:
+
+- open: zip directory, workbook part and styles (pandas: opening the ExcelFile)
+- styles: per-workbook style lookup table
+- prescan: bounds and merged ranges scanned before streaming a sheet
+- parse: sheet XML (or pandas read) turned into cells
+- merged_cells: merged cell index of a sheet
+- format: cells turned into Markdown
+- write: output file writes
+- checksums: part checksums of an incremental conversion
+- workers: waiting for sheets converted in worker processes
+
+Phase times are exclusive: time spent in a nested phase (parsing a row while
+formatting the table, formatting while the writer pulls rows) is counted in
+that phase only. Sheet records are also added up into their workbook record.
+
+Records are plain dicts, written one JSON object per line by
+``write_report``. ``NO_METRICS`` has the same interface and does nothing, so
+converters call it unconditionally at almost no cost when nobody measures.
+"""
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def _source_name(excel_file):
+    """Readable name of a workbook given as a path or an opened pandas.ExcelFile"""
+    excel_file = getattr(excel_file, 'io', excel_file)
+    if isinstance(excel_file, (str, os.PathLike)):
+        return os.fspath(excel_file)
+    return repr(excel_file)
+
+
+class _Scope:
+    """A workbook or sheet being measured"""
+
+    def __init__(self, record):
+        self.record = record
+        self.start = time.perf_counter()
+
+
+class ConversionMetrics:
+    """
+    Collect per-phase durations and counters of conversions
+
+    Attributes:
+    -----------
+    records : list of dict
+        One record per finished sheet and workbook, in completion order:
+        workbook, sheet (None for the workbook record), seconds (wall time),
+        phases ({phase: seconds}), rows, cells and bytes
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.records = []
+        self._scopes = []
+        self._phases = []
+        self._mark = time.perf_counter()
+
+    def _charge(self, now):
+        """Add the time since the last phase change to the current phase of the current scope"""
+        if self._phases and self._scopes:
+            phases = self._scopes[-1].record['phases']
+            name = self._phases[-1]
+            phases[name] = phases.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def _enter(self, name):
+        self._charge(time.perf_counter())
+        self._phases.append(name)
+
+    def _exit(self):
+        self._charge(time.perf_counter())
+        self._phases.pop()
+
+    def start(self, workbook=None, sheet=None):
+        """
+        Start measuring a workbook or one of its sheets
+
+        Parameters:
+        -----------
+        workbook : str, Path or pandas.ExcelFile, optional
+            The workbook; defaults to the one being measured
+        sheet : str, optional
+            Sheet name, None for the workbook itself
+
+        Returns:
+        --------
+        object
+            Handle to pass to finish()
+        """
+        if workbook is None and self._scopes:
+            name = self._scopes[-1].record['workbook']
+        else:
+            name = _source_name(workbook)
+        self._charge(time.perf_counter())
+        scope = _Scope({'workbook': name, 'sheet': sheet, 'seconds': 0.0, 'phases': {},
+                        'rows': 0, 'cells': 0, 'bytes': 0})
+        self._scopes.append(scope)
+        return scope
+
+    def finish(self, scope):
+        """Stop measuring a workbook or sheet and add its counters to the enclosing workbook"""
+        if scope not in self._scopes:
+            return
+        now = time.perf_counter()
+        self._charge(now)
+        self._scopes.remove(scope)
+        record = scope.record
+        record['seconds'] = now - scope.start
+        if self._scopes:
+            self._merge(self._scopes[-1].record, record)
+        self.records.append(record)
+
+    @contextmanager
+    def scope(self, workbook=None, sheet=None):
+        """Measure a workbook or sheet for the duration of a with block"""
+        scope = self.start(workbook, sheet)
+        try:
+            yield scope
+        finally:
+            self.finish(scope)
+
+    @contextmanager
+    def phase(self, name):
+        """Count the time spent in a with block in a phase"""
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, items, name, count_bytes=True):
+        """
+        Wrap an iterator, counting the time spent producing each item in a phase
+
+        Parameters:
+        -----------
+        items : iterable
+            Markdown pieces, or any items with count_bytes=False
+        name : str
+            Phase charged with the time spent in the iterator
+        count_bytes : bool, optional
+            Add the UTF-8 size of the pieces to the current scope's bytes
+        """
+        scope = self._scopes[-1] if self._scopes else None
+        iterator = iter(items)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            if count_bytes and scope is not None:
+                scope.record['bytes'] += len(item.encode('utf-8'))
+            yield item
+
+    def count(self, rows=0, cells=0, nbytes=0):
+        """Add to the counters of the current workbook or sheet"""
+        if self._scopes:
+            record = self._scopes[-1].record
+            record['rows'] += rows
+            record['cells'] += cells
+            record['bytes'] += nbytes
+
+    def add(self, record):
+        """Add a sheet record measured elsewhere (e.g. in a worker process) to the current workbook"""
+        if self._scopes:
+            self._merge(self._scopes[-1].record, record)
+        self.records.append(record)
+
+    @staticmethod
+    def _merge(total, record):
+        for name, seconds in record['phases'].items():
+            total['phases'][name] = total['phases'].get(name, 0.0) + seconds
+        for key in ('rows', 'cells', 'bytes'):
+            total[key] += record[key]
+
+    def write_report(self, report_file):
+        """Write the records as JSON lines to a path"""
+        with open(report_file, 'w', encoding='utf-8') as f:
+            write_records(self.records, f)
+
+
+class NullMetrics:
+    """Stand-in for ConversionMetrics that records nothing"""
+
+    enabled = False
+    records = ()
+
+    def start(self, workbook=None, sheet=None):
+        return None
+
+    def finish(self, scope):
+        pass
+
+    def scope(self, workbook=None, sheet=None):
+        return nullcontext()
+
+    def phase(self, name):
+        return nullcontext()
+
+    def timed(self, items, name, count_bytes=True):
+        return items
+
+    def count(self, rows=0, cells=0, nbytes=0):
+        pass
+
+    def add(self, record):
+        pass
+
+
+NO_METRICS = NullMetrics()
+
+
+def write_records(records, out):
+    """Write metrics records to an open text file, one JSON object per line"""
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def report_path(profile_file):
+    """Path of the metrics report written along a --profile dump: stats.prof -> stats.metrics.jsonl"""
+    return os.path.splitext(profile_file)[0] + ".metrics.jsonl"
+
+
+def format_summary(records):
+    """
+    Human-readable per-phase totals of the workbook records, for the --profile output
+
+    Returns:
+    --------
+    str
+        One line per workbook, phases sorted from the slowest
+    """
+    lines = []
+    for record in records:
+        if record['sheet'] is not None:
+            continue
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in
+                           sorted(record['phases'].items(), key=lambda item: -item[1]))
+        lines.append(f"{record['workbook']}: {record['seconds']:.3f}s ({phases}); "
+                     f"{record['rows']} rows, {record['cells']} cells, {record['bytes']} bytes")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiled(profile_file=None):
+    """Run a with block under cProfile and dump the stats to profile_file (does nothing when it is None)"""
+    if not profile_file:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        print(f"Profile written to {profile_file} (python -m pstats {profile_file})", file=sys.stderr)
@@ -5,56 +5,130 @@ import os
 import argparse
 from pathlib import Path
 
-def excel_to_markdown(excel_file, output_file=None, sheet_name=None, index=False):
+from conversion_metrics import NO_METRICS, ConversionMetrics, format_summary, profiled, report_path
+from markdown_table import dataframe_to_markdown
+from markdown_writer import ChunkedMarkdownWriter, MarkdownWriter, chunk_paths, open_output
+from workbook_reader import ENGINES, MAX_ROWS, open_lazy_workbook, parse_window, select_engine
+
+def _read_window(xls, sheet, window):
+    """
+    Read a sheet, or only the cells inside a SheetWindow
+    
+    The first row of the window is the header row. Rows before it are
+    skipped and pandas stops reading at its last row (nrows), so the rest of
+    the sheet is never parsed by openpyxl. Columns are sliced afterwards:
+    usecols cannot name columns beyond the last one holding data.
+    """
+    if window is None:
+        return xls.parse(sheet)
+    nrows = None if window.max_row == MAX_ROWS else window.max_row - window.min_row
+    df = xls.parse(sheet, skiprows=window.min_row - 1, nrows=nrows)
+    # Sheets are read from column A, so positions match Excel columns
+    return df.iloc[:, window.min_col - 1:window.max_col]
+
+def _write_sheets(writer, xls, sheet_names, index=False, window=None, metrics=NO_METRICS):
+    """Write the Markdown table of each sheet as soon as it is converted"""
+    for sheet in sheet_names:
+        with metrics.scope(sheet=sheet):
+            # Read the sheet from the open workbook
+            with metrics.phase('parse'):
+                df = _read_window(xls, sheet, window)
+            
+            # Add sheet name as header if multiple sheets
+            if len(sheet_names) > 1:
+                writer.write(f"## {sheet}\n\n")
+            
+            # Convert dataframe to markdown
+            with metrics.phase('format'):
+                markdown = dataframe_to_markdown(df, index=index)
+            if metrics.enabled:
+                metrics.count(rows=len(df), cells=df.size, nbytes=len(markdown.encode('utf-8')))
+            writer.write(markdown)
+            writer.write("\n\n")
+
+def excel_to_markdown(excel_file, output_file=None, sheet_name=None, index=False, engine='auto', window=None,
+                      chunk_rows=None, chunk_bytes=None, metrics=None):
     """
     Convert an Excel file to Markdown format.
     
     Parameters:
     -----------
-    excel_file : str
-        Path to the Excel file
-    output_file : str, optional
-        Path to the output Markdown file. If None, output is printed to console.
+    excel_file : str or pandas.ExcelFile
+        Path to the Excel file, or a workbook already opened with
+        pandas.ExcelFile (it is left open)
+    output_file : str or file-like, optional
+        Path to the output Markdown file, or an object with a write() method.
+        If None, output is printed to console.
     sheet_name : str or list, optional
         Sheet name(s) to convert. If None, all sheets are converted.
     index : bool, optional
         Whether to include index column in the output.
+    engine : str, optional
+        Reader engine: 'openpyxl', 'calamine' or 'auto'. Only values are read,
+        so 'auto' uses calamine for large files when python-calamine is installed.
+    window : SheetWindow, optional
+        Only convert the cells of each sheet inside this window, e.g.
+        ``parse_window(rows='1000:2000', cols='A:F')``; its first row is the
+        header row
+    chunk_rows : int, optional
+        Split the output into files of at most this many table rows, each
+        repeating the table header, plus a manifest indexing them (see
+        markdown_writer.ChunkedMarkdownWriter); needs an output path
+    chunk_bytes : int, optional
+        Split the output into files of at most this many bytes
+    metrics : ConversionMetrics, optional
+        Record per-phase durations and counters of the workbook and of each
+        sheet (see conversion_metrics)
     """
+    metrics = metrics or NO_METRICS
+    workbook_scope = metrics.start(excel_file)
+    xls = None
     try:
+        # The workbook is opened once; each sheet is parsed from it when converted
+        if isinstance(excel_file, pd.ExcelFile):
+            xls = excel_file
+        else:
+            engine = select_engine(excel_file, engine, values_only=True, window=window)
+            with metrics.phase('open'):
+                # openpyxl then only parses the shared strings the rows read need
+                source = open_lazy_workbook(excel_file) if engine == 'openpyxl' else excel_file
+                xls = pd.ExcelFile(source, engine=engine)
+        
         # Get all sheet names if not specified
         if sheet_name is None:
-            xls = pd.ExcelFile(excel_file)
             sheet_names = xls.sheet_names
         else:
             sheet_names = [sheet_name] if isinstance(sheet_name, str) else sheet_name
         
-        # Initialize output string
-        md_content = ""
+        if chunk_rows or chunk_bytes:
+            if not isinstance(output_file, (str, os.PathLike)):
+                raise ValueError("Chunked output needs an output file path")
+            with metrics.phase('write'), ChunkedMarkdownWriter(output_file, chunk_rows, chunk_bytes) as writer:
+                _write_sheets(writer, xls, sheet_names, index, window, metrics)
+            print(f"Converted Excel file to {len(writer.chunks)} Markdown chunks, "
+                  f"indexed in: {chunk_paths(output_file)[1]}")
+            return True
         
-        # Process each sheet
-        for sheet in sheet_names:
-            # Read the Excel file
-            df = pd.read_excel(excel_file, sheet_name=sheet)
-            
-            # Add sheet name as header if multiple sheets
-            if len(sheet_names) > 1:
-                md_content += f"## {sheet}\n\n"
-            
-            # Convert dataframe to markdown
-            md_table = df.to_markdown(index=index)
-            md_content += md_table + "\n\n"
+        # Each sheet is written to the output as soon as it is converted
+        with metrics.phase('write'), open_output(output_file) as sink:
+            with MarkdownWriter(sink) as writer:
+                _write_sheets(writer, xls, sheet_names, index, window, metrics)
+                
+                if output_file is None:
+                    # Same trailing newline as print()
+                    writer.write("\n")
         
-        # Write to file or print to console
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(md_content)
+        if isinstance(output_file, (str, os.PathLike)):
             print(f"Converted Excel file to Markdown: {output_file}")
-        else:
-            print(md_content)
             
     except Exception as e:
         print(f"Error converting Excel file: {e}", file=sys.stderr)
         return False
+    finally:
+        # Only close the workbook if it was opened here
+        if xls is not None and xls is not excel_file:
+            xls.close()
+        metrics.finish(workbook_scope)
     
     return True
 
@@ -65,8 +139,28 @@ def main():
     parser.add_argument('-o', '--output', help='Path to the output Markdown file')
     parser.add_argument('-s', '--sheet', help='Sheet name to convert. If not specified, all sheets are converted.')
     parser.add_argument('-i', '--index', action='store_true', help='Include index column in the output')
+    parser.add_argument('-e', '--engine', choices=ENGINES, default='auto',
+                        help='Workbook reader: openpyxl, calamine (faster, needs python-calamine) '
+                             'or auto (calamine for large files when installed)')
+    parser.add_argument('--rows', help='Only convert these rows, e.g. 1000:2000 (the first one is the header)')
+    parser.add_argument('--cols', help='Only convert these columns, e.g. A:F')
+    parser.add_argument('--range', dest='cell_range', help='Only convert this A1-style range, e.g. B2:F2000')
+    parser.add_argument('--chunk-rows', type=int,
+                        help='Split the output into files of at most this many table rows, indexed by a manifest')
+    parser.add_argument('--chunk-size', type=float,
+                        help='Split the output into files of at most this many MB, indexed by a manifest')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Write per-phase durations, row, cell and byte counts of the workbook and of each '
+                             'sheet to FILE as JSON lines')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Write a cProfile dump to FILE, and the --metrics report next to it '
+                             '(FILE.metrics.jsonl) unless --metrics is given')
     
     args = parser.parse_args()
+    try:
+        window = parse_window(args.rows, args.cols, args.cell_range)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Check if input file exists
     if not os.path.exists(args.excel_file):
@@ -79,12 +173,25 @@ def main():
         args.output = input_path.with_suffix('.md')
     
     # Convert Excel to Markdown
-    success = excel_to_markdown(
-        args.excel_file, 
-        args.output, 
-        args.sheet, 
-        args.index
-    )
+    metrics = ConversionMetrics() if args.metrics or args.profile else None
+    with profiled(args.profile):
+        success = excel_to_markdown(
+            args.excel_file, 
+            args.output, 
+            args.sheet, 
+            args.index,
+            args.engine,
+            window,
+            args.chunk_rows,
+            int(args.chunk_size * 1024 * 1024) if args.chunk_size else None,
+            metrics
+        )
+    
+    if metrics:
+        report_file = args.metrics or report_path(args.profile)
+        metrics.write_report(report_file)
+        print(format_summary(metrics.records), file=sys.stderr)
+        print(f"Metrics written to {report_file}", file=sys.stderr)
     
     return 0 if success else 1
 
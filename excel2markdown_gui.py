@@ -5,9 +5,158 @@ from tkinter.scrolledtext import ScrolledText
 import pandas as pd
 import sys
 import os
+import queue
+import signal
+import threading
+import multiprocessing
+import traceback
 from pathlib import Path
 import subprocess
 
+from markdown_table import dataframe_to_markdown
+from markdown_writer import MarkdownWriter, open_output
+from sheet_cache import SheetCache, file_key
+from workbook_reader import MAX_COLUMNS, SheetWindow, open_lazy_workbook, select_engine
+
+# Rows of a sheet shown at once in the preview
+PREVIEW_PAGE_ROWS = 500
+# Pages above this row are read on their own (openpyxl stops right after
+# them); further down, the whole sheet is read once and paged from memory
+PREVIEW_WINDOW_ROWS = 10000
+# Whole sheets of larger files are read in a child process that Cancel can
+# stop; smaller ones are read faster than a process starts
+PROCESS_MIN_BYTES = 1024 * 1024
+
+
+class TaskCancelled(Exception):
+    """Raised inside a background task when the user pressed Cancel"""
+
+
+def _read_sheet_worker(excel_file, engine, sheet, conn):
+    """Run in a child process: read a whole sheet and send the DataFrame (or the error) back"""
+    # Ctrl+C is handled by the GUI process, which terminates this one on Cancel
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        source = open_lazy_workbook(excel_file) if engine == 'openpyxl' else excel_file
+        with pd.ExcelFile(source, engine=engine) as workbook:
+            conn.send(('done', workbook.parse(sheet)))
+    except Exception as e:
+        try:
+            conn.send(('error', e))
+        except Exception:
+            # The exception cannot be pickled
+            conn.send(('error', RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+
+class BackgroundTask:
+    """
+    Run a function in a worker thread and report back to the Tk main loop
+    
+    Tk widgets may only be used from the main thread, so the worker never
+    touches them: progress updates and the result are put in a queue that the
+    main loop polls with root.after. The function receives the task and
+    calls report() between steps (each sheet read, rendered or written),
+    which raises TaskCancelled once cancel() was called. Steps that are long
+    in themselves, reading a whole large sheet, run in a child process with
+    run_process(), which terminates it as soon as Cancel is pressed.
+    """
+    
+    POLL_MS = 50
+    
+    def __init__(self, root, func, on_progress, on_done, on_error, on_cancelled):
+        self.root = root
+        self.func = func
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self._cancelled = threading.Event()
+        self._messages = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+    
+    def cancel(self):
+        """Ask the worker to stop at its next step"""
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    def report(self, done, total, message=""):
+        """Called by the worker: queue a progress update, or stop if cancelled"""
+        if self._cancelled.is_set():
+            raise TaskCancelled()
+        self._messages.put(('progress', (done, total, message)))
+    
+    def run_process(self, target, *args):
+        """
+        Called by the worker: run target(*args, conn) in a child process and return what it sends
+        
+        target sends ('done', result) or ('error', exception) through conn.
+        The child is terminated, and TaskCancelled raised, if the task is
+        cancelled in the meantime.
+        """
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=target, args=args + (child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        try:
+            # poll() also returns when the child exits without sending anything
+            while not parent_conn.poll(self.POLL_MS / 1000):
+                if self._cancelled.is_set():
+                    raise TaskCancelled()
+            try:
+                kind, payload = parent_conn.recv()
+            except EOFError:
+                process.join()
+                raise RuntimeError(f"The reading process stopped (exit code {process.exitcode})")
+            if kind == 'error':
+                raise payload
+            return payload
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            parent_conn.close()
+    
+    def _run(self):
+        try:
+            result = self.func(self)
+        except TaskCancelled:
+            self._messages.put(('cancelled', None))
+        except Exception as e:
+            traceback.print_exc()
+            self._messages.put(('error', e))
+        else:
+            self._messages.put(('cancelled', None) if self.cancelled else ('done', result))
+    
+    def _poll(self):
+        """Dispatch the queued messages on the main thread"""
+        while True:
+            try:
+                kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                if not self.cancelled:
+                    self.on_progress(*payload)
+                continue
+            if kind == 'done':
+                self.on_done(payload)
+            elif kind == 'error':
+                self.on_error(payload)
+            else:
+                self.on_cancelled()
+            return
+        self.root.after(self.POLL_MS, self._poll)
+
+
 class Excel2MarkdownGUI:
     def __init__(self, root):
         self.root = root
@@ -21,6 +170,17 @@ class Excel2MarkdownGUI:
         self.include_index_var = tk.BooleanVar(value=False)
         self.selected_sheet_var = tk.StringVar()
         self.sheets = []
+        # Workbook handles (one per reader engine) shared by the sheet list,
+        # the preview and the conversion
+        self.workbooks = {}
+        self.workbook_key = None
+        # Sheets read in full, reused by Convert and the preview until the file changes
+        self.sheet_cache = SheetCache()
+        # Sheets, position and options of the page shown in the preview
+        self.preview_state = None
+        # Background task running a load, preview or conversion (one at a time)
+        self.task = None
+        self.status_var = tk.StringVar(value="Ready")
         
         # Create UI
         self.create_widgets()
@@ -60,19 +220,38 @@ class Excel2MarkdownGUI:
         
         options_frame.columnconfigure(1, weight=1)
         
-        # Preview
+        # Preview, one page of rows at a time
+        pager_frame = ttk.Frame(preview_frame)
+        pager_frame.pack(side="bottom", fill="x", padx=5, pady=(0, 5))
+        self.previous_page_button = ttk.Button(pager_frame, text="< Previous", command=self.previous_page,
+                                               state="disabled")
+        self.previous_page_button.pack(side="left")
+        self.next_page_button = ttk.Button(pager_frame, text="Next >", command=self.next_page, state="disabled")
+        self.next_page_button.pack(side="right")
+        self.page_var = tk.StringVar()
+        ttk.Label(pager_frame, textvariable=self.page_var, anchor="center").pack(fill="x", expand=True)
+        
         self.preview_text = ScrolledText(preview_frame, wrap=tk.WORD)
         self.preview_text.pack(fill="both", expand=True, padx=5, pady=5)
         
         # Buttons
-        ttk.Button(button_frame, text="Preview", command=self.preview_markdown).pack(side="left", padx=5)
-        ttk.Button(button_frame, text="Convert", command=self.convert_to_markdown).pack(side="left", padx=5)
+        self.preview_button = ttk.Button(button_frame, text="Preview", command=self.preview_markdown)
+        self.preview_button.pack(side="left", padx=5)
+        self.convert_button = ttk.Button(button_frame, text="Convert", command=self.convert_to_markdown)
+        self.convert_button.pack(side="left", padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_task, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
         ttk.Button(button_frame, text="Exit", command=self.root.destroy).pack(side="right", padx=5)
+        
+        # Progress of the background task
+        self.progress_bar = ttk.Progressbar(button_frame, mode="determinate", length=160)
+        self.progress_bar.pack(side="left", padx=10)
+        ttk.Label(button_frame, textvariable=self.status_var).pack(side="left", padx=5)
     
     def browse_input_file(self):
         file_path = filedialog.askopenfilename(
             title="Select Excel File",
-            filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+            filetypes=[("Excel files", "*.xlsx *.xls *.xlsb"), ("All files", "*.*")]
         )
         if file_path:
             self.input_file_var.set(file_path)
@@ -92,16 +271,151 @@ class Excel2MarkdownGUI:
         if file_path:
             self.output_file_var.set(file_path)
     
+    def get_workbook(self, excel_file, window=None):
+        """
+        Return the open workbook for excel_file, opening it only when needed
+        
+        The file is opened and its zip parsed once; sheets are then read from the
+        handle on demand. It is reopened if another file is selected or if the
+        file changed on disk since it was opened. The reader is picked like in
+        excel2markdown for reading the given window (calamine for whole sheets
+        of large and binary workbooks when available, openpyxl for the top of a
+        sheet), so up to one handle per engine is kept.
+        """
+        key = file_key(excel_file)
+        if self.workbook_key != key:
+            self.close_workbook()
+            self.workbook_key = key
+        engine = select_engine(excel_file, values_only=True, window=window)
+        if engine not in self.workbooks:
+            # The lazy openpyxl workbook reads neither the rows nor the shared strings up front
+            source = open_lazy_workbook(excel_file) if engine == 'openpyxl' else excel_file
+            self.workbooks[engine] = pd.ExcelFile(source, engine=engine)
+        return self.workbooks[engine]
+    
+    def close_workbook(self):
+        for workbook in self.workbooks.values():
+            workbook.close()
+        self.workbooks = {}
+        self.workbook_key = None
+    
+    def read_sheet(self, task, excel_file, sheet):
+        """
+        Return a whole sheet as a DataFrame, parsing it only if it is not cached
+        
+        Sheets stay in the cache for the version of the file they were read
+        from (see SheetCache), so a file changed on disk is read again.
+        Sheets of large files are parsed in a child process (see
+        BackgroundTask.run_process), so that Cancel stops the parsing itself.
+        """
+        workbook = self.get_workbook(excel_file)
+        frame = self.sheet_cache.fetch(self.workbook_key, sheet)
+        if frame is None:
+            if os.path.getsize(excel_file) >= PROCESS_MIN_BYTES:
+                frame = task.run_process(_read_sheet_worker, excel_file, workbook.engine, sheet)
+            else:
+                frame = workbook.parse(sheet)
+            self.sheet_cache.store(self.workbook_key, sheet, frame)
+        return frame
+    
+    def run_task(self, func, on_done, on_error, description):
+        """
+        Run func(task) in the background while the window stays responsive
+        
+        Preview and Convert are disabled and Cancel enabled until the task
+        ends; on_done(result) or on_error(exception) then run on the main thread.
+        """
+        if self.task is not None:
+            messagebox.showwarning("Warning", "Another operation is still running.")
+            return
+        self.task = BackgroundTask(self.root, func, self.show_progress,
+                                   lambda result: self._end_task(on_done, result),
+                                   lambda error: self._end_task(on_error, error),
+                                   lambda: self._end_task(None, None, "Cancelled"))
+        self.preview_button.config(state="disabled")
+        self.convert_button.config(state="disabled")
+        self.previous_page_button.config(state="disabled")
+        self.next_page_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.status_var.set(description)
+        # Until the first report, the amount of work is unknown
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start(10)
+        self.task.start()
+    
+    def show_progress(self, done, total, message):
+        if total > 1:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=total, value=done)
+        self.status_var.set(message)
+    
+    def cancel_task(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.cancel_button.config(state="disabled")
+            # The worker stops at its next step; a sheet being read in a child process is abandoned at once
+            self.status_var.set("Cancelling...")
+    
+    def _end_task(self, callback, value, status="Ready"):
+        self.task = None
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="determinate", value=0)
+        self.preview_button.config(state="normal")
+        self.convert_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+        self.status_var.set(status)
+        if callback is not None:
+            callback(value)
+        self.update_pager()
+    
     def load_sheets(self, excel_file):
-        try:
-            xls = pd.ExcelFile(excel_file)
-            self.sheets = xls.sheet_names
+        def load(task):
+            # Listing the sheets does not need the reader used for whole sheets
+            return self.get_workbook(excel_file, self.page_window(0)).sheet_names
+        
+        def loaded(sheets):
+            self.sheets = sheets
             self.sheet_combobox['values'] = ['All Sheets'] + self.sheets
             self.sheet_combobox.current(0)  # Select 'All Sheets' by default
-        except Exception as e:
+        
+        def failed(e):
             messagebox.showerror("Error", f"Failed to load Excel file: {e}")
+            self.close_workbook()
             self.sheets = []
             self.sheet_combobox['values'] = []
+        
+        self.run_task(load, loaded, failed, "Loading workbook...")
+    
+    def iter_markdown(self, task, excel_file, sheet_name, include_index):
+        """
+        Yield the Markdown of the selected sheets, reporting progress to the task
+        
+        Runs in the worker thread; each step is a point where Cancel takes effect.
+        """
+        task.report(0, 1, "Opening workbook...")
+        workbook = self.get_workbook(excel_file)
+        
+        # Get all sheet names if not specified
+        if sheet_name is None:
+            sheet_names = workbook.sheet_names
+        else:
+            sheet_names = [sheet_name]
+        
+        # Process each sheet
+        for idx, sheet in enumerate(sheet_names):
+            task.report(idx, len(sheet_names), f"Reading sheet {sheet} ({idx + 1}/{len(sheet_names)})...")
+            # Read the sheet from the already open workbook, or reuse it
+            df = self.read_sheet(task, excel_file, sheet)
+            
+            task.report(idx, len(sheet_names), f"Rendering sheet {sheet} ({idx + 1}/{len(sheet_names)}, "
+                                                f"{len(df)} rows)...")
+            # Add sheet name as header if multiple sheets
+            if len(sheet_names) > 1:
+                yield f"## {sheet}\n\n"
+            
+            # Convert dataframe to markdown
+            yield dataframe_to_markdown(df, index=include_index) + "\n\n"
+        task.report(len(sheet_names), len(sheet_names), "Done")
     
     def get_selected_sheet(self):
         selected = self.selected_sheet_var.get()
@@ -109,61 +423,132 @@ class Excel2MarkdownGUI:
             return None  # None means all sheets
         return selected
     
+    def page_window(self, start):
+        """Rows of a sheet to read for the preview page beginning at data row start (0-based)"""
+        # The header row, the page and one more row telling whether others follow
+        return SheetWindow(1, start + PREVIEW_PAGE_ROWS + 2, 1, MAX_COLUMNS)
+    
+    def read_page(self, task, excel_file, sheet, start):
+        """
+        Read a page of PREVIEW_PAGE_ROWS data rows of a sheet
+        
+        Returns:
+        --------
+        tuple
+            (DataFrame of the page, indexed by data row, whether more rows follow)
+        """
+        workbook = self.get_workbook(excel_file, self.page_window(start))
+        frame = self.sheet_cache.fetch(self.workbook_key, sheet)
+        if frame is None:
+            if start + PREVIEW_PAGE_ROWS <= PREVIEW_WINDOW_ROWS and workbook.engine == 'openpyxl':
+                # Only the rows down to the end of the page are parsed
+                df = workbook.parse(sheet, skiprows=range(1, start + 1), nrows=PREVIEW_PAGE_ROWS + 1)
+                df.index = range(start, start + len(df))
+                return df.iloc[:PREVIEW_PAGE_ROWS], len(df) > PREVIEW_PAGE_ROWS
+            # calamine always reads whole sheets, and pages far down would
+            # parse every row above them each time: read the sheet once
+            frame = self.read_sheet(task, excel_file, sheet)
+        return frame.iloc[start:start + PREVIEW_PAGE_ROWS], start + PREVIEW_PAGE_ROWS < len(frame)
+    
     def preview_markdown(self):
         excel_file = self.input_file_var.get()
         if not excel_file:
             messagebox.showwarning("Warning", "Please select an Excel file first.")
             return
         
-        try:
-            # Kiểm tra xem file đầu vào có tồn tại không
-            if not os.path.exists(excel_file):
-                messagebox.showerror("Error", f"Excel file does not exist: {excel_file}")
-                return
-                
-            sheet_name = self.get_selected_sheet()
-            include_index = self.include_index_var.get()
-            
-            # Get all sheet names if not specified
-            if sheet_name is None:
-                sheet_names = self.sheets
-            else:
-                sheet_names = [sheet_name]
+        # Kiểm tra xem file đầu vào có tồn tại không
+        if not os.path.exists(excel_file):
+            messagebox.showerror("Error", f"Excel file does not exist: {excel_file}")
+            return
+        
+        sheet_name = self.get_selected_sheet()
+        self.show_page({
+            'excel_file': excel_file,
+            'sheet_names': None if sheet_name is None else [sheet_name],
+            'include_index': self.include_index_var.get(),
+            'sheet_idx': 0,
+            'start': 0,
+        })
+    
+    def next_page(self):
+        state = self.preview_state
+        if state['has_more']:
+            self.show_page(dict(state, start=state['start'] + PREVIEW_PAGE_ROWS))
+        elif state['sheet_idx'] + 1 < len(state['sheet_names']):
+            self.show_page(dict(state, sheet_idx=state['sheet_idx'] + 1, start=0))
+    
+    def previous_page(self):
+        state = self.preview_state
+        if state['start'] > 0:
+            self.show_page(dict(state, start=max(state['start'] - PREVIEW_PAGE_ROWS, 0)))
+        elif state['sheet_idx'] > 0:
+            self.show_page(dict(state, sheet_idx=state['sheet_idx'] - 1, start=0))
+    
+    def show_page(self, state):
+        """Read and display one page of the preview; only that page is kept in the text widget"""
+        excel_file = state['excel_file']
+        
+        def render(task):
+            sheet_names = state['sheet_names']
+            if sheet_names is None:
+                sheet_names = self.get_workbook(excel_file, self.page_window(0)).sheet_names
+            sheet = sheet_names[state['sheet_idx']]
+            task.report(0, 1, f"Reading sheet {sheet} ({state['sheet_idx'] + 1}/{len(sheet_names)})...")
+            df, has_more = self.read_page(task, excel_file, sheet, state['start'])
             
-            # Initialize output string
             md_content = ""
-            
-            # Process each sheet
-            for sheet in sheet_names:
-                # Read the Excel file
-                df = pd.read_excel(excel_file, sheet_name=sheet)
-                
-                # Add sheet name as header if multiple sheets
-                if len(sheet_names) > 1:
-                    md_content += f"## {sheet}\n\n"
-                
-                # Convert dataframe to markdown
-                md_table = df.to_markdown(index=include_index)
-                md_content += md_table + "\n\n"
-            
+            # Add sheet name as header if multiple sheets
+            if len(sheet_names) > 1:
+                md_content += f"## {sheet}\n\n"
+            md_content += dataframe_to_markdown(df, index=state['include_index']) + "\n"
+            return dict(state, sheet_names=sheet_names, has_more=has_more, rows=len(df)), md_content
+        
+        def show(result):
+            self.preview_state, md_content = result
             # Display in preview
             self.preview_text.delete(1.0, tk.END)
             self.preview_text.insert(tk.END, md_content)
-            
-        except pd.errors.EmptyDataError:
-            messagebox.showerror("Error", "The Excel file contains no data.")
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, "Error: The Excel file contains no data.")
-        except pd.errors.ParserError:
-            messagebox.showerror("Error", "Error parsing the Excel file. File may be corrupted.")
-            self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, "Error: File parsing failed. The file may be corrupted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate preview: {str(e)}")
+        
+        def failed(e):
+            self.preview_state = None
+            if isinstance(e, pd.errors.EmptyDataError):
+                messagebox.showerror("Error", "The Excel file contains no data.")
+                message = "Error: The Excel file contains no data."
+            elif isinstance(e, pd.errors.ParserError):
+                messagebox.showerror("Error", "Error parsing the Excel file. File may be corrupted.")
+                message = "Error: File parsing failed. The file may be corrupted."
+            else:
+                messagebox.showerror("Error", f"Failed to generate preview: {str(e)}")
+                message = f"Error: {str(e)}"
             self.preview_text.delete(1.0, tk.END)
-            self.preview_text.insert(tk.END, f"Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.preview_text.insert(tk.END, message)
+        
+        self.run_task(render, show, failed, "Generating preview...")
+    
+    def update_pager(self):
+        """Enable the page buttons that lead somewhere and describe the page shown"""
+        state = self.preview_state
+        if state is None:
+            self.page_var.set("")
+            self.previous_page_button.config(state="disabled")
+            self.next_page_button.config(state="disabled")
+            return
+        sheet_names = state['sheet_names']
+        if state['rows']:
+            rows = f"rows {state['start'] + 1}-{state['start'] + state['rows']}"
+        else:
+            rows = "no rows"
+        if state['has_more']:
+            rows += ", more follow"
+        if len(sheet_names) > 1:
+            self.page_var.set(f"Sheet {state['sheet_idx'] + 1}/{len(sheet_names)} "
+                              f"({sheet_names[state['sheet_idx']]}): {rows}")
+        else:
+            self.page_var.set(f"{sheet_names[0]}: {rows}")
+        has_previous = state['start'] > 0 or state['sheet_idx'] > 0
+        has_next = state['has_more'] or state['sheet_idx'] + 1 < len(sheet_names)
+        self.previous_page_button.config(state="normal" if has_previous else "disabled")
+        self.next_page_button.config(state="normal" if has_next else "disabled")
     
     def convert_to_markdown(self):
         excel_file = self.input_file_var.get()
@@ -177,50 +562,31 @@ class Excel2MarkdownGUI:
             messagebox.showwarning("Warning", "Please specify an output file.")
             return
         
-        try:
-            sheet_name = self.get_selected_sheet()
-            include_index = self.include_index_var.get()
-            
-            # Kiểm tra xem file đầu vào có tồn tại không
-            if not os.path.exists(excel_file):
-                messagebox.showerror("Error", f"Excel file does not exist: {excel_file}")
-                return
-                
-            # Kiểm tra xem có thể tạo file đầu ra không
-            try:
-                output_dir = os.path.dirname(output_file)
-                if output_dir and not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-            except OSError as e:
-                messagebox.showerror("Error", f"Cannot create output directory: {e}")
-                return
-            
-            # Get all sheet names if not specified
-            if sheet_name is None:
-                sheet_names = self.sheets
-            else:
-                sheet_names = [sheet_name]
-            
-            # Initialize output string
-            md_content = ""
-            
-            # Process each sheet
-            for sheet in sheet_names:
-                # Read the Excel file
-                df = pd.read_excel(excel_file, sheet_name=sheet)
-                
-                # Add sheet name as header if multiple sheets
-                if len(sheet_names) > 1:
-                    md_content += f"## {sheet}\n\n"
-                
-                # Convert dataframe to markdown
-                md_table = df.to_markdown(index=include_index)
-                md_content += md_table + "\n\n"
-            
-            # Write to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(md_content)
+        sheet_name = self.get_selected_sheet()
+        include_index = self.include_index_var.get()
+        
+        # Kiểm tra xem file đầu vào có tồn tại không
+        if not os.path.exists(excel_file):
+            messagebox.showerror("Error", f"Excel file does not exist: {excel_file}")
+            return
             
+        # Kiểm tra xem có thể tạo file đầu ra không
+        try:
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+        except OSError as e:
+            messagebox.showerror("Error", f"Cannot create output directory: {e}")
+            return
+        
+        def convert(task):
+            # Sheets are written as they are converted; a cancelled or failed
+            # conversion removes the partial file (see open_output)
+            with open_output(output_file) as sink:
+                with MarkdownWriter(sink) as writer:
+                    writer.write_all(self.iter_markdown(task, excel_file, sheet_name, include_index))
+        
+        def converted(_):
             messagebox.showinfo("Success", f"Excel file converted to Markdown: {output_file}")
             
             # Mở thư mục chứa file
@@ -234,17 +600,18 @@ class Excel2MarkdownGUI:
                     subprocess.call(['xdg-open', output_dir])
             except Exception:
                 pass  # Nếu không mở được thư mục thì bỏ qua
-            
-        except pd.errors.EmptyDataError:
-            messagebox.showerror("Error", "The Excel file contains no data.")
-        except pd.errors.ParserError:
-            messagebox.showerror("Error", "Error parsing the Excel file. File may be corrupted.")
-        except PermissionError:
-            messagebox.showerror("Error", f"Permission denied when writing to file: {output_file}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to convert file: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        
+        def failed(e):
+            if isinstance(e, pd.errors.EmptyDataError):
+                messagebox.showerror("Error", "The Excel file contains no data.")
+            elif isinstance(e, pd.errors.ParserError):
+                messagebox.showerror("Error", "Error parsing the Excel file. File may be corrupted.")
+            elif isinstance(e, PermissionError):
+                messagebox.showerror("Error", f"Permission denied when writing to file: {output_file}")
+            else:
+                messagebox.showerror("Error", f"Failed to convert file: {str(e)}")
+        
+        self.run_task(convert, converted, failed, "Converting...")
 
 def main():
     root = tk.Tk()
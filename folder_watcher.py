@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Watch a folder for new or changed files.
+
+``FolderWatcher`` reports the files of a directory once they have been
+written completely: a file is ready when its size and modification time have
+not changed for a settle time, so a workbook still being copied is not picked
+up half written.
+
+Changes are detected with inotify on Linux (through ctypes, no extra
+dependency), which wakes up as soon as a file is touched without listing the
+folder. Elsewhere, or when inotify is unavailable (some network file systems
+never deliver events), the folder is polled: its entries are listed and
+stat'ed every few seconds and compared with the previous listing.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+def _load_libc():
+    """The C library if it provides inotify, else None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _snapshot(directory, matches):
+    """{name: (size, mtime_ns)} of the regular files of a directory accepted by matches"""
+    entries = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not matches(entry.name):
+                continue
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                pass  # Removed while listing
+    return entries
+
+
+class InotifyWatcher:
+    """
+    Names of the entries of a directory changed since the last call, from inotify
+
+    Raises OSError when inotify cannot be used (not Linux, no more watches...).
+    """
+
+    def __init__(self, directory):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this system")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno), directory)
+
+    def changes(self, timeout):
+        """
+        Wait up to timeout seconds for changes
+
+        Returns:
+        --------
+        set of str or None
+            Names of the changed entries; None when the kernel queue
+            overflowed and events were lost, so the directory must be rescanned
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        names = set()
+        if not ready:
+            return names
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if length:
+                    names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+                offset += length
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Names of the entries of a directory changed since the last call, by listing it periodically"""
+
+    def __init__(self, directory, matches, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.matches = matches
+        self.poll_interval = poll_interval
+        self._entries = _snapshot(directory, matches)
+        self._next_poll = time.monotonic() + poll_interval
+
+    def changes(self, timeout):
+        """Wait up to timeout seconds, listing the directory when a poll is due; return the changed names"""
+        delay = self._next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_poll = time.monotonic() + self.poll_interval
+        entries = _snapshot(self.directory, self.matches)
+        changed = {name for name, state in entries.items() if self._entries.get(name) != state}
+        changed.update(name for name in self._entries if name not in entries)
+        self._entries = entries
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """
+    Files of a directory that were created or changed and then left alone for a while
+
+    Parameters:
+    -----------
+    directory : str
+        Directory to watch (not its subdirectories)
+    matches : callable, optional
+        Filter on file names, e.g. to keep only workbooks
+    settle_seconds : float, optional
+        How long the size and modification time of a file must stay the same
+        before it is considered completely written
+    poll_interval : float, optional
+        Seconds between two listings when polling
+    polling : bool, optional
+        Poll even if inotify is available (for network file systems)
+    """
+
+    def __init__(self, directory, matches=None, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, polling=False):
+        self.directory = directory
+        self.matches = matches or (lambda name: True)
+        self.settle_seconds = settle_seconds
+        self._watcher = None
+        if not polling:
+            try:
+                self._watcher = InotifyWatcher(directory)
+            except OSError:
+                pass
+        if self._watcher is None:
+            self._watcher = PollingWatcher(directory, self.matches, poll_interval)
+        # name -> ((size, mtime_ns), monotonic time it was first seen in that state)
+        self._pending = {}
+
+    @property
+    def method(self):
+        """'inotify' or 'polling'"""
+        return 'inotify' if isinstance(self._watcher, InotifyWatcher) else 'polling'
+
+    def add_existing(self):
+        """Treat every file already in the directory as changed (for a first conversion pass)"""
+        self._add(_snapshot(self.directory, self.matches))
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for changes and return the files ready to be read
+
+        Returns:
+        --------
+        list of str
+            Names of the files whose writes have settled, in name order
+        """
+        if self._pending:
+            # Come back in time to see the pending files settle
+            timeout = min(timeout, self.settle_seconds)
+        names = self._watcher.changes(timeout)
+        if names is None:
+            # Events were lost: look at everything
+            self.add_existing()
+        else:
+            self._add({name: None for name in names if self.matches(name)})
+        return self._settled()
+
+    def _add(self, names):
+        for name in names:
+            self._pending.setdefault(name, (None, 0))
+
+    def _settled(self):
+        now = time.monotonic()
+        ready = []
+        for name, (state, since) in list(self._pending.items()):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # Deleted (or renamed away) before it settled
+                del self._pending[name]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != state:
+                self._pending[name] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[name]
+                ready.append(name)
+        return sorted(ready)
+
+    def close(self):
+        self._watcher.close()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Markdown pipe tables rendered from pandas DataFrames.
+
+``DataFrame.to_markdown`` hands the frame to tabulate, which types, formats
+and pads every cell one at a time in pure Python and becomes very slow past a
+hundred thousand rows. ``dataframe_to_markdown`` produces the same pipe-table
+layout (column types, number formatting, decimal alignment, padding and
+alignment row) but processes whole columns at once with pandas/NumPy string
+operations and joins the rows in bulk.
+
+Differences with tabulate:
+
+- pipes and line breaks inside cells are escaped (``\\|`` and ``<br>``) so
+  that they cannot break the table;
+- each column is formatted according to its own dtype. tabulate formats the
+  cells of ``df.values``, whose type depends on the other columns: in a frame
+  where every column is numeric, integers are printed like floats
+  (``1.23457e+07``), and a frame holding only booleans or only dates prints
+  ``0``/``1`` or ISO timestamps.
+"""
+import re
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+try:
+    from wcwidth import wcswidth
+except ImportError:
+    # Optional, as in tabulate: without it every character counts as one column
+    wcswidth = None
+
+# Extra width given to each column on top of its header
+MIN_PADDING = 2
+
+# Column types, from the least to the most generic (same order as tabulate)
+NONE_TYPE, BOOL_TYPE, INT_TYPE, FLOAT_TYPE, STR_TYPE = range(5)
+
+# pandas.api.types.infer_dtype() result -> column type, anything else is text
+INFERRED_TYPES = {
+    'empty': NONE_TYPE,
+    'boolean': BOOL_TYPE,
+    'integer': INT_TYPE,
+    'floating': FLOAT_TYPE,
+    'mixed-integer-float': FLOAT_TYPE,
+    'decimal': FLOAT_TYPE,
+}
+
+INT_STRING_RE = r'\s*[+-]?\d+\s*'
+LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+
+def _format_floats(values):
+    """Format floats like tabulate's default 'g' float format"""
+    # There is no vectorised equivalent of '%g'; formatting the plain Python
+    # floats of tolist() is faster than np.char.mod or Series.map
+    return ['%g' % value for value in values.tolist()]
+
+
+def _format_datetimes(values):
+    """Format naive datetime64 values like str(Timestamp) without creating Timestamps"""
+    seconds = values.astype('datetime64[s]')
+    strings = [string.replace('T', ' ') for string in np.datetime_as_string(seconds, unit='s').tolist()]
+    missing = np.isnat(values)
+    for idx in np.flatnonzero(missing):
+        strings[idx] = 'NaT'
+    # Fractions of a second are rare, str() gives them the right precision
+    for idx in np.flatnonzero((values != seconds) & ~missing):
+        strings[idx] = str(pd.Timestamp(values[idx]))
+    return strings
+
+
+def _all_numbers(texts):
+    """Whether every string of a Series spells a number"""
+    try:
+        # Raises on the first non-number, so text columns are rejected quickly
+        return bool(pd.to_numeric(texts).notna().all())
+    except (ValueError, TypeError):
+        return False
+
+
+def _classify_objects(values):
+    """
+    Deduce the tabulate column type of an object column
+
+    Returns:
+    --------
+    tuple
+        (column type, mask of empty cells (None or ''), mask of NaN cells)
+    """
+    empty = (values == None) | (values == '')  # noqa: E711, elementwise comparison
+    nan = pd.isna(values) & ~empty
+    present = values[~(empty | nan)]
+
+    kind = pd.api.types.infer_dtype(present, skipna=False)
+    inferred = INFERRED_TYPES.get(kind, STR_TYPE)
+    if kind == 'string':
+        # Numbers stored as text are typed as numbers, like tabulate does
+        texts = pd.Series(present, dtype=object)
+        if texts.isin(('True', 'False')).all():
+            inferred = BOOL_TYPE
+        elif _all_numbers(texts):
+            inferred = INT_TYPE if texts.str.fullmatch(INT_STRING_RE).all() else FLOAT_TYPE
+
+    # Columns start as bool, NaN is a float and empty cells do not count
+    col_type = max(BOOL_TYPE, inferred, FLOAT_TYPE if nan.any() else NONE_TYPE)
+    return col_type, empty, nan
+
+
+def _format_column(series):
+    """
+    Format a column as strings
+
+    Returns:
+    --------
+    tuple
+        (list of str, column type, mask of the cells of a float column that
+        are not numbers or None)
+    """
+    dtype = series.dtype
+    # Nullable extension columns holding NA go through the generic object path
+    if pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+        return np.where(series.to_numpy(dtype=bool), 'True', 'False').tolist(), BOOL_TYPE, None
+    if pd.api.types.is_integer_dtype(dtype) and not series.hasnans:
+        return list(map(str, series.tolist())), INT_TYPE, None
+    if pd.api.types.is_float_dtype(dtype):
+        return _format_floats(series.to_numpy(dtype=float, na_value=np.nan)), FLOAT_TYPE, None
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return _format_datetimes(series.to_numpy()), STR_TYPE, None
+    if not (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)):
+        # Dates, timedeltas, categories...: their str() is shown as text
+        return list(map(str, series.astype(object).tolist())), STR_TYPE, None
+
+    values = series.to_numpy(dtype=object)
+    col_type, empty, nan = _classify_objects(values)
+    text = None
+    if col_type == FLOAT_TYPE:
+        numbers = pd.to_numeric(pd.Series(np.where(empty, np.nan, values), dtype=object), errors='coerce')
+        strings = _format_floats(numbers.to_numpy(dtype=float))
+        # Values that are not numbers ('True'...) are shown as they are
+        text = numbers.isna().to_numpy() & ~(empty | nan)
+        for idx in np.flatnonzero(text):
+            strings[idx] = str(values[idx])
+    else:
+        # Numbers stored as text keep their original spelling
+        strings = list(map(str, values.tolist()))
+    for idx in np.flatnonzero(empty):
+        strings[idx] = ''
+    return strings, col_type, text
+
+
+def _escape(strings):
+    """Escape what would break the table structure"""
+    # One scan of the joined column is much cheaper than testing every cell
+    joined = "".join(strings)
+    if '|' in joined:
+        strings = [string.replace('|', '\\|') for string in strings]
+    if '\n' in joined or '\r' in joined:
+        strings = [LINE_BREAK_RE.sub('<br>', string) for string in strings]
+    return strings
+
+
+def _decimal_align(strings, text=None):
+    """Pad numbers on the right so that their decimal points line up"""
+    count = len(strings)
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=count)
+    point = np.fromiter(map(str.rfind, strings, repeat('.')), dtype=np.int64, count=count)
+    if (point < 0).any():
+        exponent = np.fromiter(map(str.rfind, strings, repeat('e')), dtype=np.int64, count=count)
+        point = np.where(point >= 0, point, exponent)
+    if text is not None:
+        point[text] = -1
+    decimals = np.where(point >= 0, lengths - point - 1, -1)
+    padding = decimals.max() - decimals
+    if not padding.any():
+        return strings
+    return list(map(str.__add__, strings, map(' '.__mul__, padding.tolist())))
+
+
+def _visible_width(string):
+    """Display width of a string, counting wide characters twice when wcwidth is available"""
+    if wcswidth is None or string.isascii():
+        return len(string)
+    return wcswidth(string)
+
+
+def _pad_column(strings, min_width, right):
+    """
+    Pad the strings of a column to a common display width
+
+    Returns:
+    --------
+    tuple
+        (padded strings, column width)
+    """
+    if wcswidth is None or "".join(strings).isascii():
+        width = max(max(map(len, strings)), min_width)
+        widths = repeat(width)
+    else:
+        # Wide characters take two columns, so they get less padding
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+        visible = np.fromiter(map(_visible_width, strings), dtype=np.int64, count=len(strings))
+        width = max(int(visible.max()), min_width)
+        widths = (width - (visible - lengths)).tolist()
+    justify = str.rjust if right else str.ljust
+    return list(map(justify, strings, widths)), width
+
+
+def dataframe_to_markdown(df, index=False):
+    """
+    Render a DataFrame as a Markdown pipe table
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Table to render
+    index : bool, optional
+        Whether to include the index as the first column
+
+    Returns:
+    --------
+    str
+        Markdown table without a trailing newline, laid out like
+        ``df.to_markdown(index=index)``
+    """
+    if not len(df.columns):
+        return ""
+
+    headers = [str(column) for column in df.columns]
+    columns = [df.iloc[:, col_idx] for col_idx in range(len(df.columns))]
+    # Like tabulate, an empty frame only shows a named index
+    if index and (len(df) or df.index.name is not None):
+        headers.insert(0, "" if df.index.name is None else str(df.index.name))
+        columns.insert(0, df.index.to_series())
+    headers = _escape(headers)
+
+    cells = []
+    separators = []
+    header_cells = []
+    for header, column in zip(headers, columns):
+        min_width = _visible_width(header) + MIN_PADDING
+        if not len(df):
+            header_cells.append(header.ljust(min_width - (_visible_width(header) - len(header))))
+            separators.append('-' * (min_width + 2))
+            continue
+
+        strings, col_type, text = _format_column(column)
+        numeric = col_type in (INT_TYPE, FLOAT_TYPE)
+        if numeric:
+            # Numbers are not stripped, as in tabulate's decimal alignment
+            strings = _escape(strings)
+            if col_type == FLOAT_TYPE:
+                strings = _decimal_align(strings, text)
+        else:
+            strings = _escape(list(map(str.strip, strings)))
+        strings, width = _pad_column(strings, min_width, right=numeric)
+        cells.append(strings)
+
+        padding = ' ' * (width - _visible_width(header))
+        if numeric:
+            header_cells.append(padding + header)
+            separators.append('-' * (width + 1) + ':')
+        else:
+            header_cells.append(header + padding)
+            separators.append(':' + '-' * (width + 1))
+
+    lines = ["| " + " | ".join(header_cells) + " |", "|" + "|".join(separators) + "|"]
+    if cells:
+        # Rows are assembled by C-level map/join over the padded columns
+        lines.append("| " + " |\n| ".join(map(" | ".join, zip(*cells))) + " |")
+    return "\n".join(lines)
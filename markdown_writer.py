@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Output sinks for the Markdown converters.
+
+Converters produce the document as a sequence of small pieces (one per table
+row) instead of one big string. ``MarkdownWriter`` gathers the pieces into
+batches and hands each batch to a sink: a file, stdout, an in-memory buffer or
+any object with a ``write`` method. ``iter_chunks`` does the same batching for
+callers that prefer to pull chunks from a generator.
+
+``ChunkedMarkdownWriter`` splits a document into several files of bounded
+size instead, repeating the table header in each of them.
+
+``replace_atomically`` writes a file under a temporary name and renames it
+over the target once complete, so that readers never see a partial document.
+"""
+import json
+import os
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Pieces are joined and written once this many characters are buffered
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Suffix of the JSON file indexing the chunks of a split document
+CHUNKS_MANIFEST_SUFFIX = ".chunks.json"
+
+
+class MarkdownWriter:
+    """
+    Buffer Markdown pieces and write them to a sink in batches
+
+    Parameters:
+    -----------
+    sink : file-like
+        Any object with a ``write(str)`` method (open file, sys.stdout, io.StringIO...)
+    buffer_size : int, optional
+        Number of buffered characters that triggers a write to the sink
+    """
+
+    def __init__(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.chars_written = 0
+        self._parts = []
+        self._buffered = 0
+
+    def write(self, text):
+        """Add a piece of Markdown, flushing the buffer when it is full"""
+        self._parts.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_all(self, pieces):
+        """Write every piece of an iterable"""
+        for text in pieces:
+            self.write(text)
+
+    def flush(self):
+        """Write the buffered pieces to the sink as one chunk"""
+        if self._parts:
+            self.sink.write("".join(self._parts))
+            self.chars_written += self._buffered
+            self._parts = []
+            self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+def iter_chunks(pieces, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Regroup an iterable of small Markdown pieces into chunks of about buffer_size characters
+
+    Parameters:
+    -----------
+    pieces : iterable of str
+        Pieces produced by a converter
+    buffer_size : int, optional
+        Minimum size of each chunk, except the last one
+
+    Yields:
+    -------
+    str
+        Chunks of the Markdown document
+    """
+    parts = []
+    buffered = 0
+    for text in pieces:
+        parts.append(text)
+        buffered += len(text)
+        if buffered >= buffer_size:
+            yield "".join(parts)
+            parts = []
+            buffered = 0
+    if parts:
+        yield "".join(parts)
+
+
+@contextmanager
+def open_output(target):
+    """
+    Open an output target as a writable text sink
+
+    Parameters:
+    -----------
+    target : str, Path, file-like or None
+        A path is opened (and closed afterwards) as a UTF-8 file; None means
+        sys.stdout; any object with a ``write`` method is used as is.
+
+    If an error occurs while writing to a path, the partially written file is
+    removed so that a failed conversion does not leave a truncated document.
+    """
+    if target is None:
+        yield sys.stdout
+        return
+    if hasattr(target, 'write'):
+        yield target
+        return
+
+    f = open(target, 'w', encoding='utf-8')
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        raise
+    else:
+        f.close()
+
+
+def output_file_mode(output_file):
+    """Permissions for a rewritten output: those of the existing file, else the umask default"""
+    try:
+        return stat.S_IMODE(os.stat(output_file).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def replace_atomically(output_file):
+    """
+    Yield a temporary path to write instead of output_file, then rename it over output_file
+
+    The temporary file is hidden and in the same directory, so the rename is
+    atomic: output_file is either the previous document or the new one. If the
+    block raises, the temporary file is removed and output_file is untouched.
+    Files opened on the temporary path must be closed inside the block.
+    """
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(output_file)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        # mkstemp creates the file as private (0600), give it normal permissions
+        os.chmod(tmp_path, output_file_mode(output_file))
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def chunk_paths(output_file):
+    """
+    Name the chunks of a split document after its output path
+
+    Returns:
+    --------
+    tuple
+        (function giving the path of chunk n, starting at 1, manifest path)
+        e.g. report.part001.md, report.part002.md... and report.chunks.json
+    """
+    root, ext = os.path.splitext(os.fspath(output_file))
+    return (lambda number: f"{root}.part{number:03d}{ext or '.md'}"), f"{root}{CHUNKS_MANIFEST_SUFFIX}"
+
+
+class ChunkedMarkdownWriter:
+    """
+    Write a Markdown document as several files of bounded size
+
+    Takes the same pieces as ``MarkdownWriter`` and cuts the document line by
+    line: a chunk is closed once it holds max_rows table rows or when the next
+    row would take it past max_bytes. A table split across chunks has its
+    section heading (the last ``#`` line before it), header row and alignment
+    row repeated at the top of the next chunk, so every chunk renders on its
+    own. Chunks are written to disk as the rows arrive.
+
+    On close, a JSON manifest lists the chunks with their size and the rows of
+    each table they hold (counted from 1, header excluded). Chunks left over
+    by a previous, longer split of the same output are removed.
+
+    Parameters:
+    -----------
+    output_file : str or Path
+        Path the document would have had in one piece; chunks and manifest
+        are named after it (see chunk_paths)
+    max_rows : int, optional
+        Maximum number of table rows per chunk
+    max_bytes : int, optional
+        Maximum size of a chunk in bytes (UTF-8); a chunk always gets at
+        least one row, even if that row alone is larger
+    """
+
+    def __init__(self, output_file, max_rows=None, max_bytes=None):
+        if not (max_rows or max_bytes):
+            raise ValueError("Chunked output needs a maximum number of rows or bytes per chunk")
+        self.output_file = output_file
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._chunk_path, self.manifest_path = chunk_paths(output_file)
+        self.chunks = []
+        self._file = None
+        self._carry = ""
+        # Lines outside tables, written when the next table starts or on close
+        self._pending = []
+        self._heading = None
+        # Header lines seen so far, and those of the table being written
+        self._header = []
+        self._table_header = ""
+        self._in_rows = False
+        self._table = None
+        self._row_number = 0
+
+    def write(self, text):
+        """Add a piece of Markdown; complete lines are dispatched as they arrive"""
+        if self._carry:
+            text = self._carry + text
+            self._carry = ""
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end < 0:
+                self._carry = text[start:]
+                return
+            self._line(text[start:end + 1])
+            start = end + 1
+
+    def write_all(self, pieces):
+        """Write every piece of an iterable"""
+        for text in pieces:
+            self.write(text)
+
+    def _line(self, line):
+        if line.startswith("|"):
+            if self._in_rows:
+                self._row(line)
+            else:
+                self._header.append(line)
+                if len(self._header) == 2:
+                    self._start_table()
+            return
+        self._end_table()
+        self._pending.append(line)
+        if line.startswith("#"):
+            self._heading = line
+
+    def _start_table(self):
+        # The header is written with the first row, so that it never ends a chunk
+        self._table_header = "".join(self._header)
+        self._header = []
+        self._in_rows = True
+        self._row_number = 0
+        self._table = None
+
+    def _end_table(self):
+        if self._in_rows and self._table is None:
+            # Table without rows: its header is plain text
+            self._pending.append(self._table_header)
+        # A single '|' line is not a table either
+        self._pending.extend(self._header)
+        self._header = []
+        self._in_rows = False
+        self._table = None
+
+    def _is_full(self, next_size):
+        if not self._file:
+            return False
+        chunk = self.chunks[-1]
+        if not chunk['rows']:
+            return False
+        if self.max_rows and chunk['rows'] >= self.max_rows:
+            return True
+        return bool(self.max_bytes) and chunk['bytes'] + next_size > self.max_bytes
+
+    def _new_chunk(self):
+        if self._file:
+            self._file.close()
+        path = self._chunk_path(len(self.chunks) + 1)
+        self._file = open(path, 'wb', buffering=DEFAULT_BUFFER_SIZE)
+        self.chunks.append({'file': os.path.basename(path), 'bytes': 0, 'rows': 0, 'tables': []})
+
+    def _write_bytes(self, data):
+        self._file.write(data)
+        self.chunks[-1]['bytes'] += len(data)
+
+    def _pending_text(self, new_chunk):
+        """Text waiting to be written; a new chunk does not start with blank lines"""
+        lines = self._pending
+        if new_chunk:
+            while lines and not lines[0].strip():
+                lines = lines[1:]
+        return "".join(lines)
+
+    def _open_table(self, prefix):
+        """Record the part of the current table held by the current chunk"""
+        self._write_bytes(prefix.encode('utf-8'))
+        section = self._heading.lstrip("#").strip() if self._heading else None
+        self._table = {'section': section, 'first_row': self._row_number + 1, 'last_row': self._row_number}
+        self.chunks[-1]['tables'].append(self._table)
+
+    def _row(self, line):
+        data = line.encode('utf-8')
+        if self._table is None:
+            # First row: the text before the table and its header come with it
+            prefix = self._pending_text(False) + self._table_header
+            if not self._file or self._is_full(len(prefix.encode('utf-8')) + len(data)):
+                self._new_chunk()
+                prefix = self._pending_text(True) + self._table_header
+            self._pending = []
+            self._open_table(prefix)
+        elif self._is_full(len(data)):
+            # The table goes on in a new chunk, under its heading and header
+            self._new_chunk()
+            heading = self._heading + "\n" if self._heading else ""
+            self._open_table(heading + self._table_header)
+        self._file.write(data)
+        chunk = self.chunks[-1]
+        chunk['bytes'] += len(data)
+        chunk['rows'] += 1
+        self._row_number += 1
+        self._table['last_row'] = self._row_number
+
+    def close(self):
+        """Write the remaining text and the manifest, and remove stale chunks"""
+        if self._carry:
+            self._line(self._carry)
+            self._carry = ""
+        self._end_table()
+        if not self._file:
+            self._new_chunk()
+        text = self._pending_text(not self.chunks[-1]['bytes'])
+        self._pending = []
+        self._write_bytes(text.encode('utf-8'))
+        self._file.close()
+        self._file = None
+
+        written = {chunk['file'] for chunk in self.chunks}
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        for name in _manifest_chunks(self.manifest_path):
+            if name not in written:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        manifest = {
+            'output': os.path.basename(os.fspath(self.output_file)),
+            'max_rows': self.max_rows,
+            'max_bytes': self.max_bytes,
+            'chunks': self.chunks,
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+    def discard(self):
+        """Remove the chunks written so far, after a failed conversion"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        # A previous manifest may list chunks that were just overwritten
+        for name in [chunk['file'] for chunk in self.chunks] + [os.path.basename(self.manifest_path)]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+    @property
+    def paths(self):
+        """Paths of the chunks written so far"""
+        directory = os.path.dirname(os.fspath(self.output_file))
+        return [os.path.join(directory, chunk['file']) for chunk in self.chunks]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def _manifest_chunks(manifest_path):
+    """Chunk file names listed in an existing manifest"""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return [chunk['file'] for chunk in json.load(f)['chunks']]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Excel number formats rendered in Python.
+
+Cells store raw values; what Excel displays depends on the number format
+code of the cell's style: ``0.00%`` shows 0.125 as ``12.50%``,
+``#,##0.00 "€"`` shows 1234.5 as ``1,234.50 €`` and ``dd/mm/yyyy`` shows a
+date without its time. ``compile_number_format`` parses a format code once
+into a function rendering values the way Excel would, so a converter can
+compile each distinct code of a workbook a single time and then render every
+cell with a lookup and a call.
+
+Supported:
+
+- up to four sections (positive; negative; zero; text), colors and
+  ``[$€-407]`` currency tags;
+- digit placeholders ``0 # ?``, thousands separators and scaling commas,
+  percent, scientific notation (``0.00E+00``, ``##0.0E+0``);
+- literal text (quoted, backslash-escaped or plain), ``_`` spacing (one
+  space) and ``*`` fills (dropped);
+- dates and times: ``y m d h s`` tokens, month and day names (English),
+  ``AM/PM``, fractions of seconds and elapsed times (``[h]:mm:ss``);
+- ``@`` text sections.
+
+Fractions (``# ?/?``), conditional sections (``[>=100]``) and placeholders
+interleaved with literal text (``000-0000``) are not: their formatter
+returns None, like the formatter of a value its format does not apply to
+(text in a number format, booleans), and the caller falls back to its own
+rendering of the raw value. ``General`` compiles to None.
+"""
+import datetime
+import math
+import re
+from decimal import ROUND_HALF_UP, Context, Decimal
+
+from openpyxl.utils.datetime import CALENDAR_WINDOWS_1900, from_excel
+
+GENERAL = 'General'
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December')
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+COLOR_RE = re.compile(r'(black|blue|cyan|green|magenta|red|white|yellow|color\s*\d+)$', re.IGNORECASE)
+ELAPSED_RE = re.compile(r'(h+|m+|s+)$', re.IGNORECASE)
+
+# Large enough to round any double to a fixed number of decimals
+DECIMAL_CONTEXT = Context(prec=400, rounding=ROUND_HALF_UP)
+
+# Characters displayed as they are in a format code
+LITERAL_CHARS = frozenset('$-+/():!^&\'~{}<>= ,%')
+
+
+class UnsupportedFormat(ValueError):
+    """A format code, or a section of it, that this module cannot render"""
+
+
+def _split_sections(code):
+    """Split a format code on the semicolons that are not quoted or escaped"""
+    sections = []
+    current = []
+    idx = 0
+    while idx < len(code):
+        char = code[idx]
+        if char == '"':
+            end = code.find('"', idx + 1)
+            end = len(code) if end < 0 else end
+            current.append(code[idx:end + 1])
+            idx = end + 1
+            continue
+        if char == '\\' and idx + 1 < len(code):
+            current.append(code[idx:idx + 2])
+            idx += 2
+            continue
+        if char == ';':
+            sections.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        idx += 1
+    sections.append("".join(current))
+    return sections
+
+
+def _tokenize(section):
+    """
+    Split one section into tokens
+
+    Returns:
+    --------
+    list of (kind, text)
+        kind is 'literal', 'char' (a character with a meaning: placeholder,
+        date letter...), 'elapsed' ([h], [mm]...), 'text' (@) or 'general'
+    """
+    tokens = []
+    idx = 0
+    while idx < len(section):
+        char = section[idx]
+        if char == '"':
+            end = section.find('"', idx + 1)
+            end = len(section) if end < 0 else end
+            tokens.append(('literal', section[idx + 1:end]))
+            idx = end + 1
+        elif char == '\\':
+            tokens.append(('literal', section[idx + 1:idx + 2]))
+            idx += 2
+        elif char == '_':
+            # Space as wide as the next character
+            tokens.append(('literal', ' '))
+            idx += 2
+        elif char == '*':
+            # Repeat the next character to fill the cell: nothing to fill in Markdown
+            idx += 2
+        elif char == '[':
+            end = section.find(']', idx)
+            if end < 0:
+                raise UnsupportedFormat(section)
+            content = section[idx + 1:end]
+            idx = end + 1
+            if content.startswith('$'):
+                # Currency and locale: [$€-407], [$-409]
+                tokens.append(('literal', content[1:].split('-', 1)[0]))
+            elif ELAPSED_RE.match(content):
+                tokens.append(('elapsed', content.lower()))
+            elif not COLOR_RE.match(content):
+                # Conditions ([>=100]) and unknown tags
+                raise UnsupportedFormat(section)
+        elif char == '@':
+            tokens.append(('text', '@'))
+            idx += 1
+        elif section[idx:idx + 7].lower() == 'general':
+            tokens.append(('general', GENERAL))
+            idx += 7
+        elif char in LITERAL_CHARS and char not in ',%':
+            tokens.append(('literal', char))
+            idx += 1
+        else:
+            tokens.append(('char', char))
+            idx += 1
+    return tokens
+
+
+def _is_date_section(tokens):
+    """Whether a section formats dates and times rather than numbers"""
+    for kind, text in tokens:
+        if kind == 'elapsed' or (kind == 'char' and text in 'ymdhsYMDHS'):
+            return True
+    return False
+
+
+def _literal_text(tokens):
+    """Text of the literal tokens of a section (a section without placeholders)"""
+    return "".join(text for kind, text in tokens if kind in ('literal', 'char'))
+
+
+def _to_decimal(value):
+    """A number as a Decimal, integers and Decimals keeping all their digits"""
+    if isinstance(value, (int, Decimal)):
+        return Decimal(value)
+    # repr() is the shortest string giving back the float: 2.675 rounds to 2.68 like in Excel
+    return Decimal(repr(value))
+
+
+def _round_decimal(value, places):
+    """value rounded half away from zero to a number of decimals, as a Decimal"""
+    return _to_decimal(value).quantize(Decimal(1).scaleb(-places), context=DECIMAL_CONTEXT)
+
+
+def _group_thousands(digits):
+    """'1234567' -> '1,234,567'"""
+    head = len(digits) % 3 or 3
+    return ",".join([digits[:head]] + [digits[idx:idx + 3] for idx in range(head, len(digits), 3)])
+
+
+class _NumberSection:
+    """One number section of a format code, e.g. '#,##0.00 "€"'"""
+
+    def __init__(self, tokens):
+        self.percent = 0
+        self.prefix = []
+        self.suffix = []
+        int_pattern = []
+        frac_pattern = []
+        exp_pattern = None
+        self.exp_sign = '+'
+        self.decimal_point = False
+        self.general = False
+        # Commas after the decimal placeholders ('0.0,"K"') divide by 1000 each
+        frac_scale = 0
+        state = 'prefix'
+
+        idx = 0
+        while idx < len(tokens):
+            kind, text = tokens[idx]
+            following = tokens[idx + 1] if idx + 1 < len(tokens) else (None, None)
+            if kind == 'general':
+                if state != 'prefix' or self.general:
+                    raise UnsupportedFormat(text)
+                self.general = True
+                state = 'suffix'
+            elif kind == 'char' and text in '0#?':
+                if state == 'suffix':
+                    raise UnsupportedFormat("placeholders after literal text")
+                if state == 'prefix':
+                    state = 'int'
+                if state == 'frac' and frac_scale:
+                    raise UnsupportedFormat("placeholders after scaling commas")
+                {'int': int_pattern, 'frac': frac_pattern, 'exp': exp_pattern}[state].append(text)
+            elif kind == 'char' and text == '.' and state in ('prefix', 'int') and (
+                    state == 'int' or (following[0] == 'char' and following[1] in '0#?')):
+                self.decimal_point = True
+                state = 'frac'
+            elif kind == 'char' and text == ',' and state == 'int':
+                int_pattern.append(',')
+            elif kind == 'char' and text == ',' and state == 'frac':
+                frac_scale += 1
+            elif kind == 'char' and text in 'Ee' and state in ('int', 'frac') and following[1] in ('+', '-'):
+                exp_pattern = []
+                self.exp_sign = following[1]
+                state = 'exp'
+                idx += 1
+            elif kind == 'char' and text == '/':
+                raise UnsupportedFormat("fractions")
+            elif kind == 'text':
+                raise UnsupportedFormat("@ in a number section")
+            else:
+                if kind == 'char' and text == '%':
+                    self.percent += 1
+                if state != 'prefix':
+                    state = 'suffix'
+                (self.prefix if state == 'prefix' else self.suffix).append(text)
+            idx += 1
+
+        if not self.general and not int_pattern and not frac_pattern:
+            # Only literal text, e.g. the '"-"' zero section of accounting formats
+            self.constant = "".join(self.prefix)
+        else:
+            self.constant = None
+        self.prefix = "".join(self.prefix)
+        self.suffix = "".join(self.suffix)
+
+        # Commas right before the decimal point (or the end) divide by 1000 each
+        self.scale = frac_scale
+        while int_pattern and int_pattern[-1] == ',':
+            int_pattern.pop()
+            self.scale += 1
+        self.grouping = ',' in int_pattern
+        int_pattern = [char for char in int_pattern if char != ',']
+        self.int_zeros = int_pattern.count('0')
+        self.int_width = self.int_zeros + int_pattern.count('?')
+        self.int_places = len(int_pattern)
+        self.int_optional = '#' in int_pattern
+        self.frac_zeros = frac_pattern.count('0')
+        self.frac_spaces = frac_pattern.count('?')
+        self.frac_places = len(frac_pattern)
+        self.exp_digits = exp_pattern.count('0') if exp_pattern is not None else None
+
+    def render(self, value):
+        """
+        Render a non-negative number
+
+        Returns:
+        --------
+        tuple
+            (text, whether the displayed number is zero)
+        """
+        if self.constant is not None:
+            return self.constant, True
+        if self.general:
+            return f"{self.prefix}{value}{self.suffix}", value == 0
+        if self.percent or self.scale:
+            if isinstance(value, int):
+                # Integers are scaled exactly, keeping all their digits
+                value = Decimal(value * 100 ** self.percent).scaleb(-3 * self.scale)
+            else:
+                value = value * 100 ** self.percent / 1000 ** self.scale
+        exponent = None
+        if self.exp_digits is not None:
+            value, exponent = self._scientific(value)
+        rounded = _round_decimal(value, self.frac_places)
+        int_digits, _, frac_digits = f"{rounded:f}".partition('.')
+
+        if int_digits == '0' and self.int_zeros == 0:
+            int_digits = ""
+        int_digits = int_digits.zfill(self.int_zeros)
+        if self.grouping and int_digits:
+            int_digits = _group_thousands(int_digits)
+        int_digits = int_digits.rjust(self.int_width)
+
+        number = int_digits
+        if self.decimal_point:
+            # Optional decimals (#, ?) are dropped when they are trailing zeros
+            kept = max(len(frac_digits.rstrip('0')), self.frac_zeros)
+            number += '.' + frac_digits[:kept].ljust(min(self.frac_places, self.frac_zeros + self.frac_spaces))
+        if exponent is not None:
+            sign = '-' if exponent < 0 else ('+' if self.exp_sign == '+' else '')
+            number += f"E{sign}{str(abs(exponent)).zfill(self.exp_digits)}"
+        return f"{self.prefix}{number}{self.suffix}", rounded == 0
+
+    def _scientific(self, value):
+        """Split a number into (mantissa, exponent) for the E+00 notation"""
+        if value == 0:
+            return 0.0, 0
+        exponent = math.floor(math.log10(value))
+        if self.int_optional and self.int_places > 1:
+            # Engineering notation: exponents are multiples of the integer placeholders
+            step = self.int_places
+            exponent -= exponent % step
+        else:
+            step = 1
+            exponent -= max(self.int_places, 1) - 1
+        mantissa = float(_to_decimal(value).scaleb(-exponent, context=DECIMAL_CONTEXT))
+        # Rounding may carry the mantissa over to the next power of ten
+        if _round_decimal(mantissa, self.frac_places) >= 10 ** max(self.int_places, 1):
+            exponent += step
+            mantissa = float(_to_decimal(value).scaleb(-exponent, context=DECIMAL_CONTEXT))
+        return mantissa, exponent
+
+
+class _DateSection:
+    """One date or time section of a format code, e.g. 'dd/mm/yyyy hh:mm'"""
+
+    def __init__(self, tokens):
+        # (kind, argument): kind is 'literal' or a date part
+        self.parts = []
+        self.twelve_hour = False
+        self.fraction_digits = 0
+        chars = []
+        # Group repeated letters: 'yyyy' -> ('y', 4)
+        for kind, text in tokens:
+            if kind == 'char' and chars and chars[-1][0] == 'char' and text.lower() in 'ymdhs' \
+                    and chars[-1][1][0].lower() == text.lower():
+                chars[-1] = ('char', chars[-1][1] + text)
+            else:
+                chars.append((kind, text))
+
+        idx = 0
+        while idx < len(chars):
+            kind, text = chars[idx]
+            lowered = text.lower()
+            if kind == 'elapsed':
+                self.parts.append(('elapsed_' + lowered[0], len(lowered)))
+            elif kind == 'char' and lowered[0] in 'ymdhs':
+                self.parts.append((lowered[0], len(lowered)))
+            elif kind == 'char' and lowered == 'a' and self._match_ampm(chars, idx):
+                ampm = self._match_ampm(chars, idx)
+                self.parts.append(('ampm', ampm))
+                self.twelve_hour = True
+                # 'A', 'M', '/', 'P', 'M' or 'A', '/', 'P'
+                idx += len(ampm[0]) + len(ampm[1]) + 1
+                continue
+            elif kind == 'char' and text == '.' and self.parts and self.parts[-1][0] in ('s', 'elapsed_s'):
+                digits = 0
+                while idx + 1 < len(chars) and chars[idx + 1] == ('char', '0'):
+                    digits += 1
+                    idx += 1
+                if not digits:
+                    self.parts.append(('literal', '.'))
+                else:
+                    self.parts.append(('fraction', digits))
+                    self.fraction_digits = max(self.fraction_digits, digits)
+            elif kind in ('general', 'text'):
+                raise UnsupportedFormat(text)
+            else:
+                self.parts.append(('literal', text))
+            idx += 1
+
+        # 'm' means minutes right after hours or right before seconds
+        date_parts = [idx for idx, (kind, _) in enumerate(self.parts) if kind not in ('literal', 'fraction')]
+        for position, part_idx in enumerate(date_parts):
+            kind, width = self.parts[part_idx]
+            if kind != 'm' or width > 2:
+                continue
+            before = self.parts[date_parts[position - 1]][0] if position > 0 else None
+            after = self.parts[date_parts[position + 1]][0] if position + 1 < len(date_parts) else None
+            if before in ('h', 'elapsed_h') or after in ('s', 'elapsed_s'):
+                self.parts[part_idx] = ('minute', width)
+
+    @staticmethod
+    def _match_ampm(chars, idx):
+        """
+        Match AM/PM or A/P (any case) starting at chars[idx]
+
+        Returns:
+        --------
+        tuple or None
+            (text shown before noon, text shown after noon)
+        """
+        text = "".join(text for _, text in chars[idx:idx + 5])
+        if text.upper() == 'AM/PM':
+            return text[:2], text[3:]
+        if text[:3].upper() == 'A/P':
+            return text[0], text[2]
+        return None
+
+    def render(self, moment, elapsed):
+        """
+        Render a datetime
+
+        Parameters:
+        -----------
+        moment : datetime.datetime
+            The value as a date and time
+        elapsed : float
+            Seconds since the Excel epoch (or length of a duration), for [h] parts
+        """
+        # Excel rounds to the fractions of seconds it displays
+        step = 10 ** (6 - self.fraction_digits)
+        microseconds = (moment.microsecond + step // 2) // step * step
+        moment = moment.replace(microsecond=0) + datetime.timedelta(microseconds=microseconds)
+        elapsed = round(elapsed * 10 ** self.fraction_digits) / 10 ** self.fraction_digits
+
+        texts = []
+        for kind, arg in self.parts:
+            if kind == 'literal':
+                texts.append(arg)
+            elif kind == 'y':
+                texts.append(f"{moment.year % 100:02d}" if arg <= 2 else f"{moment.year:04d}")
+            elif kind == 'm':
+                if arg == 1:
+                    texts.append(str(moment.month))
+                elif arg == 2:
+                    texts.append(f"{moment.month:02d}")
+                elif arg == 3:
+                    texts.append(MONTH_NAMES[moment.month - 1][:3])
+                elif arg == 5:
+                    texts.append(MONTH_NAMES[moment.month - 1][0])
+                else:
+                    texts.append(MONTH_NAMES[moment.month - 1])
+            elif kind == 'd':
+                if arg <= 2:
+                    texts.append(f"{moment.day:0{arg}d}")
+                else:
+                    texts.append(DAY_NAMES[moment.weekday()][:3] if arg == 3 else DAY_NAMES[moment.weekday()])
+            elif kind == 'h':
+                hour = moment.hour
+                if self.twelve_hour:
+                    hour = hour % 12 or 12
+                texts.append(f"{hour:0{min(arg, 2)}d}")
+            elif kind == 'minute':
+                texts.append(f"{moment.minute:0{min(arg, 2)}d}")
+            elif kind == 's':
+                texts.append(f"{moment.second:0{min(arg, 2)}d}")
+            elif kind == 'fraction':
+                texts.append('.' + f"{moment.microsecond:06d}"[:arg])
+            elif kind == 'ampm':
+                texts.append(arg[0] if moment.hour < 12 else arg[1])
+            else:
+                # Elapsed hours, minutes or seconds: [h], [mm], [ss]
+                unit = {'elapsed_h': 3600, 'elapsed_m': 60, 'elapsed_s': 1}[kind]
+                texts.append(f"{int(elapsed // unit):0{arg}d}")
+        return "".join(texts)
+
+
+class _TextSection:
+    """Text section of a format code, e.g. '"Name: "@'"""
+
+    def __init__(self, tokens):
+        self.parts = [(kind, text) for kind, text in tokens]
+
+    def render(self, text):
+        return "".join(text if kind == 'text' else part for kind, part in self.parts)
+
+
+def _compile_section(section):
+    tokens = _tokenize(section)
+    if _is_date_section(tokens):
+        return _DateSection(tokens)
+    return _NumberSection(tokens)
+
+
+class NumberFormat:
+    """
+    A compiled format code; calling it renders a value
+
+    Use compile_number_format() to create one.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        sections = _split_sections(code)
+        if len(sections) > 4:
+            raise UnsupportedFormat(code)
+        self.text_section = None
+        if len(sections) == 4:
+            self.text_section = _TextSection(_tokenize(sections.pop()))
+        elif any(kind == 'text' for kind, _ in _tokenize(sections[-1])):
+            # A lone text section ('@', '"Name: "@') or a last one holding '@'
+            self.text_section = _TextSection(_tokenize(sections.pop()))
+        self.sections = [_compile_section(section) for section in sections]
+        self.is_date = any(isinstance(section, _DateSection) for section in self.sections)
+
+    def __call__(self, value):
+        """
+        Render a cell value
+
+        Returns:
+        --------
+        str or None
+            The text Excel displays, or None when the format does not apply
+            to the value (the caller then renders the raw value)
+        """
+        value_type = type(value)
+        if value_type is str:
+            if self.text_section is None:
+                return None
+            return self.text_section.render(value)
+        if not self.sections or value_type is bool:
+            return None
+        if self.is_date:
+            return self._render_date(value)
+        if value_type is not int and value_type is not float:
+            return None
+        if value != value or value in (math.inf, -math.inf):
+            return None
+
+        sections = self.sections
+        if value < 0 and len(sections) > 1:
+            # The negative section shows the absolute value, with its own signs
+            return sections[1].render(-value)[0]
+        if value == 0 and len(sections) > 2:
+            return sections[2].render(0)[0]
+        text, is_zero = sections[0].render(abs(value))
+        if value < 0 and not is_zero:
+            return '-' + text
+        return text
+
+    def _render_date(self, value):
+        """Render a date, time, duration or serial number with the first date section"""
+        section = self.sections[0]
+        if not isinstance(section, _DateSection):
+            return None
+        epoch = CALENDAR_WINDOWS_1900
+        if isinstance(value, datetime.datetime):
+            moment = value.replace(tzinfo=None)
+        elif isinstance(value, datetime.date):
+            moment = datetime.datetime.combine(value, datetime.time())
+        elif isinstance(value, datetime.time):
+            moment = datetime.datetime.combine(epoch.date(), value.replace(tzinfo=None))
+        elif isinstance(value, datetime.timedelta):
+            try:
+                moment = epoch + value
+            except OverflowError:
+                return None
+            return section.render(moment, value.total_seconds())
+        elif type(value) in (int, float) and value >= 0 and value == value and value != math.inf:
+            try:
+                moment = from_excel(value)
+            except (OverflowError, ValueError):
+                # Beyond the dates Python can represent
+                return None
+            if not isinstance(moment, datetime.datetime):
+                moment = datetime.datetime.combine(epoch.date(), moment)
+        else:
+            return None
+        return section.render(moment, (moment - epoch).total_seconds())
+
+
+def compile_number_format(code):
+    """
+    Compile an Excel number format code
+
+    Parameters:
+    -----------
+    code : str
+        Format code of a cell style (cell.number_format)
+
+    Returns:
+    --------
+    NumberFormat or None
+        Callable rendering values like Excel; None for 'General' and for the
+        codes that cannot be rendered, whose values are shown raw
+    """
+    if not code or code == GENERAL:
+        return None
+    try:
+        return NumberFormat(code)
+    except UnsupportedFormat:
+        return None
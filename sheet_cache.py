@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+In-process cache of parsed sheets.
+
+Reading a large sheet into a DataFrame takes seconds to minutes, and the GUI
+reads the same sheets again and again: Convert after a preview, a second
+conversion with other options, paging through the preview. ``SheetCache``
+keeps the parsed DataFrames in memory, keyed by the workbook's path, size and
+modification time so that a file changed on disk is never served from stale
+entries. The total size of the cached frames is capped; the least recently
+used ones are evicted first.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+def file_key(excel_file):
+    """
+    Identify the current content of a workbook file
+
+    Returns:
+    --------
+    tuple
+        (absolute path, size, modification time in ns); a different key for
+        the same path means the file changed on disk
+    """
+    stat = os.stat(excel_file)
+    return os.path.abspath(excel_file), stat.st_size, stat.st_mtime_ns
+
+
+def frame_size(frame):
+    """Memory used by a DataFrame, including the strings of its object columns"""
+    return int(frame.memory_usage(deep=True).sum())
+
+
+class SheetCache:
+    """
+    In-memory LRU cache mapping (workbook version, sheet name) to a DataFrame
+
+    Workbook versions are file_key() tuples. Looking up or storing a sheet
+    with a new key drops every entry of the older versions of that file. It
+    is safe to use from worker threads.
+
+    Parameters:
+    -----------
+    max_bytes : int, optional
+        Total size of cached frames above which the least recently used
+        entries are evicted; a frame larger than that is not cached
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def fetch(self, key, sheet_name):
+        """
+        Return the cached frame of a sheet, or None on a cache miss
+
+        Parameters:
+        -----------
+        key : tuple
+            file_key() of the workbook, taken when it was opened
+        sheet_name : str
+            Name of the sheet
+        """
+        with self._lock:
+            self._drop_stale(key)
+            entry = self._frames.get((key, sheet_name))
+            if entry is None:
+                return None
+            self._frames.move_to_end((key, sheet_name))
+            return entry[0]
+
+    def store(self, key, sheet_name, frame):
+        """Add a freshly parsed sheet to the cache and evict old entries if needed"""
+        size = frame_size(frame)
+        with self._lock:
+            self._drop_stale(key)
+            self._remove((key, sheet_name))
+            if size > self.max_bytes:
+                return
+            self._frames[(key, sheet_name)] = (frame, size)
+            self.size_bytes += size
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._frames)))
+
+    def invalidate(self, excel_file=None):
+        """Forget the sheets of a workbook, or every sheet when no file is given"""
+        with self._lock:
+            if excel_file is None:
+                self._frames.clear()
+                self.size_bytes = 0
+                return
+            path = os.path.abspath(excel_file)
+            for entry_key in [entry_key for entry_key in self._frames if entry_key[0][0] == path]:
+                self._remove(entry_key)
+
+    def _drop_stale(self, key):
+        """Remove the entries of other versions of the file identified by key"""
+        path = key[0]
+        stale = [entry_key for entry_key in self._frames if entry_key[0][0] == path and entry_key[0] != key]
+        for entry_key in stale:
+            self._remove(entry_key)
+
+    def _remove(self, entry_key):
+        entry = self._frames.pop(entry_key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
@@ -0,0 +1,932 @@
+#!/usr/bin/env python3
+"""
+Single-pass workbook loader for the advanced converter.
+
+openpyxl can give either the formula text (``data_only=False``) or the value
+cached by Excel (``data_only=True``) for a cell, but not both, so the
+converter used to load every workbook twice. This module opens the workbook
+once in read-only mode (shared strings, styles and sheet list only) and then
+parses each sheet XML part exactly once, keeping both the cached value and the
+formula of every cell.
+
+``CalamineWorkbook`` offers the same interface on top of python-calamine, a
+much faster reader that only gives cell values: no formulas and no styles.
+It also reads the binary formats that openpyxl cannot open, legacy ``.xls``
+and ``.xlsb``. ``select_engine`` picks between the two from the file format,
+the options requested and the file size, and ``open_workbook`` opens a
+workbook with the chosen engine.
+
+Both openpyxl readers use ``open_lazy_workbook``: the shared strings table is
+parsed only as far as the cells read so far need and sheets are sized without
+scanning their rows, so the first rows of a huge workbook are available
+without parsing millions of strings or cells first.
+"""
+import datetime
+import os
+import re
+import zipfile
+from collections import namedtuple
+
+from openpyxl.cell.read_only import ReadOnlyCell
+from openpyxl.cell.text import Text
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.styles import Alignment, Font
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from openpyxl.worksheet._reader import WorkSheetParser, DATA_TAG, DIMENSION_TAG, FORMULA_TAG
+from openpyxl.worksheet.dimensions import SheetDimension
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.xml.constants import SHARED_STRINGS, SHEET_MAIN_NS
+from openpyxl.xml.functions import iterparse
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+ENGINES = ('auto', 'openpyxl', 'calamine')
+
+# Smaller workbooks are read with openpyxl even for plain values: they convert
+# instantly either way and openpyxl is the reference reader
+CALAMINE_MIN_BYTES = 256 * 1024
+
+# calamine returns every number as a float; like openpyxl, integral values
+# are given back as int (below this magnitude Excel stores them as integers)
+MAX_EXACT_INT = 10 ** 15
+
+
+# Workbook file formats; only the zip/XML one can be read by openpyxl
+WORKBOOK_FORMATS = ('xlsx', 'xls', 'xlsb')
+BINARY_FORMATS = ('xls', 'xlsb')
+
+# Extension -> format, used when the file header cannot be read
+EXTENSION_FORMATS = {'.xls': 'xls', '.xlsb': 'xlsb'}
+
+# .xls workbooks are BIFF streams in an OLE2 compound file, .xlsx and .xlsb are zip packages
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+ZIP_MAGIC = b'PK\x03\x04'
+
+# Main part of an .xlsb package (an .xlsx has xl/workbook.xml)
+XLSB_WORKBOOK_PART = 'xl/workbook.bin'
+
+# Size of an Excel sheet, the bounds of an open-ended window
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+
+# Part of a sheet to convert: 1-based, inclusive bounds
+SheetWindow = namedtuple('SheetWindow', ['min_row', 'max_row', 'min_col', 'max_col'])
+
+# Workbook-wide parts that every sheet's rendering depends on
+SHARED_PART_NAMES = ('workbook.xml', 'sharedStrings.xml', 'styles.xml')
+
+# One entry of the shared strings table
+SHARED_STRING_TAG = '{%s}si' % SHEET_MAIN_NS
+
+# <mergeCell ref="A1:B2"/>, with or without a namespace prefix
+MERGE_CELL_RE = re.compile(rb'<(?:[\w.-]+:)?mergeCell\b[^>]*?\bref="([^"]+)"')
+
+# Reference of a cell written as its first attribute, as every known writer does: <c r="AB12" ...>
+CELL_REF_RE = re.compile(rb'<(?:[\w.-]+:)?c r="([A-Z]{1,3})([0-9]+)"')
+CELL_COLUMN_RE = re.compile(rb'<c r="([A-Z]{1,3})')
+CELL_ROW_RE = re.compile(rb'c r="[A-Z]{1,3}([0-9]+)"')
+
+# Start of any cell element, to make sure that every cell had a reference
+CELL_TAG_RE = re.compile(rb'<(?:[\w.-]+:)?c[\s/>]')
+
+# Merged ranges of a sheet and the bounds of its cells, from a raw scan of
+# the part; max_row and max_column are None when some cells have no reference
+SheetLayout = namedtuple('SheetLayout', ['merged_ranges', 'max_row', 'max_column'])
+
+
+def _part_checksum(archive, part_name):
+    """Checksum of a zip part, taken from its CRC-32 and size in the zip directory"""
+    info = archive.getinfo(part_name)
+    return f"{info.CRC:08x}:{info.file_size}"
+
+
+def _shared_checksums(archive):
+    """Checksums of the workbook, shared strings and styles parts, keyed by part name"""
+    checksums = {}
+    for part_name in archive.namelist():
+        if part_name.startswith('xl/') and part_name.count('/') == 1 \
+                and part_name[3:] in SHARED_PART_NAMES:
+            checksums[part_name] = _part_checksum(archive, part_name)
+    return checksums
+
+
+def _parse_bounds(spec, parse_index, limit, name):
+    """Parse 'first:last', 'first:', ':last' or 'first' into inclusive (first, last) indices"""
+    first, sep, last = spec.strip().partition(':')
+    if not sep:
+        last = first
+    try:
+        first = parse_index(first.strip()) if first.strip() else 1
+        last = parse_index(last.strip()) if last.strip() else limit
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{spec}'") from None
+    if not 1 <= first <= last <= limit:
+        raise ValueError(f"Invalid {name} '{spec}'")
+    return first, last
+
+
+def _column_index(spec):
+    """Column index from a letter ('F') or a 1-based number ('6')"""
+    return int(spec) if spec.isdigit() else column_index_from_string(spec.upper())
+
+
+def parse_window(rows=None, cols=None, cell_range=None):
+    """
+    Build the window of a sheet to convert from command-line style specs
+
+    Parameters:
+    -----------
+    rows : str, optional
+        Excel row numbers, inclusive: '1000:2000', '1000:' (to the end),
+        ':2000' or a single row '1000'
+    cols : str, optional
+        Column letters, inclusive: 'A:F', 'C:', ':F' or a single column 'C'
+    cell_range : str, optional
+        A1-style range such as 'B2:F2000' (or 'A:F', '5:10'); cannot be
+        combined with rows or cols
+
+    Returns:
+    --------
+    SheetWindow or None
+        The window, or None when no spec was given (whole sheet)
+    """
+    if cell_range:
+        if rows or cols:
+            raise ValueError("A cell range cannot be combined with row or column bounds")
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(cell_range.strip().upper())
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid range '{cell_range}'") from None
+        window = SheetWindow(min_row or 1, max_row or MAX_ROWS, min_col or 1, max_col or MAX_COLUMNS)
+        if not (1 <= window.min_row <= window.max_row <= MAX_ROWS
+                and 1 <= window.min_col <= window.max_col <= MAX_COLUMNS):
+            raise ValueError(f"Invalid range '{cell_range}'")
+        return window
+    if not (rows or cols):
+        return None
+    min_row, max_row = _parse_bounds(rows, int, MAX_ROWS, 'rows') if rows else (1, MAX_ROWS)
+    min_col, max_col = _parse_bounds(cols, _column_index, MAX_COLUMNS, 'columns') if cols else (1, MAX_COLUMNS)
+    return SheetWindow(min_row, max_row, min_col, max_col)
+
+
+def _window_cells(row, window):
+    """Cells of a parsed row that fall in the window's columns"""
+    return [cell for cell in row if window.min_col <= cell['column'] <= window.max_col]
+
+
+def _extension_format(excel_file):
+    """Format implied by the file extension ('xlsx' when unknown)"""
+    try:
+        extension = os.path.splitext(os.fspath(excel_file))[1].lower()
+    except TypeError:
+        return 'xlsx'
+    return EXTENSION_FORMATS.get(extension, 'xlsx')
+
+
+def detect_format(excel_file):
+    """
+    Tell the format of a workbook from its first bytes, or from its extension
+
+    Parameters:
+    -----------
+    excel_file : str
+        Path to the workbook
+
+    Returns:
+    --------
+    str
+        'xlsx', 'xls' or 'xlsb'. The content wins over the extension, so a
+        legacy workbook saved with an .xlsx name is still read correctly.
+    """
+    try:
+        with open(excel_file, 'rb') as f:
+            header = f.read(len(OLE2_MAGIC))
+            if header == OLE2_MAGIC:
+                return 'xls'
+            if header.startswith(ZIP_MAGIC):
+                # Only the zip directory is read, not the parts
+                with zipfile.ZipFile(f) as archive:
+                    names = set(archive.namelist())
+                return 'xlsb' if XLSB_WORKBOOK_PART in names else 'xlsx'
+    except (OSError, TypeError, zipfile.BadZipFile):
+        pass
+    return _extension_format(excel_file)
+
+
+class LazySharedStrings:
+    """
+    Shared strings table parsed on demand.
+
+    openpyxl parses the whole ``sharedStrings.xml`` part when a workbook is
+    opened, which takes tens of seconds for a sheet with a million rows of
+    text, even if only its first rows are read. Strings are numbered in the
+    order they first appear, so this table is parsed incrementally, up to the
+    highest index looked up so far, and reading the top of a sheet only costs
+    the strings it uses. Reading the whole sheet parses the whole table once,
+    as openpyxl would.
+    """
+
+    def __init__(self, archive, part_name):
+        self._source = archive.open(part_name)
+        self._nodes = iterparse(self._source)
+        self._strings = []
+
+    def __getitem__(self, idx):
+        try:
+            return self._strings[idx]
+        except IndexError:
+            self._parse_to(idx)
+            return self._strings[idx]
+
+    def _parse_to(self, idx):
+        """Parse the table until string idx is read, or to its end"""
+        if self._nodes is None:
+            return
+        strings = self._strings
+        # Same conversion as openpyxl's read_string_table
+        for _, node in self._nodes:
+            if node.tag == SHARED_STRING_TAG:
+                strings.append(Text.from_tree(node).content.replace('x005F_', ''))
+                node.clear()
+                if len(strings) > idx:
+                    return
+        self.close()
+
+    def close(self):
+        """Release the part; strings parsed so far stay available"""
+        if self._nodes is not None:
+            self._nodes = None
+            self._source.close()
+
+
+class _ReadOnlySheet(ReadOnlyWorksheet):
+    """Read-only worksheet that finds its <dimension> without reading the rows"""
+
+    def _get_size(self):
+        # openpyxl looks for <dimension> on 'end' events, so when a sheet has
+        # none (files written by openpyxl's write-only mode, among others) it
+        # only gives up at the end of <sheetData>: a scan of the whole part
+        # each time the workbook is opened. 'start' events stop at its beginning.
+        with self._get_source() as src:
+            for _, element in iterparse(src, events=('start',)):
+                if element.tag == DIMENSION_TAG:
+                    dimension = SheetDimension.from_tree(element)
+                    self._min_column, self._min_row, self._max_column, self._max_row = dimension.boundaries
+                    return
+                if element.tag == DATA_TAG:
+                    return
+
+
+class _LazyWorkbookReader(ExcelReader):
+    """
+    openpyxl read-only workbook reader that defers the shared strings (see
+    LazySharedStrings) and sizes sheets from their header only
+    """
+
+    def read_strings(self):
+        content_type = self.package.find(SHARED_STRINGS)
+        if content_type is not None:
+            self.shared_strings = LazySharedStrings(self.archive, content_type.PartName[1:])
+
+    def read_worksheets(self):
+        # The read-only branch of ExcelReader.read_worksheets
+        for sheet, rel in self.parser.find_sheets():
+            if rel.target not in self.valid_files:
+                continue
+            if "chartsheet" in rel.Type:
+                self.read_chartsheet(sheet, rel)
+                continue
+            worksheet = _ReadOnlySheet(self.wb, sheet.name, rel.target, self.shared_strings)
+            worksheet.sheet_state = sheet.state
+            self.wb._sheets.append(worksheet)
+
+
+def open_lazy_workbook(excel_file):
+    """
+    Open a workbook with openpyxl in read-only, values-only mode, without reading its rows
+
+    Equivalent to ``openpyxl.load_workbook(excel_file, read_only=True,
+    data_only=True, keep_links=False)`` except that the shared strings table
+    is parsed on demand (see LazySharedStrings) and sheets without a
+    ``<dimension>`` element are not scanned to find it. The workbook can be
+    passed to ``pandas.ExcelFile(workbook, engine='openpyxl')``.
+    """
+    reader = _LazyWorkbookReader(excel_file, read_only=True, data_only=True, keep_links=False)
+    reader.read()
+    return reader.wb
+
+
+def _number_format_code(workbook, number_format_id):
+    """Format code of a number format id: built-in ids are implicit, the others come from styles.xml"""
+    if number_format_id < BUILTIN_FORMATS_MAX_SIZE:
+        return BUILTIN_FORMATS.get(number_format_id, 'General')
+    return workbook._number_formats[number_format_id - BUILTIN_FORMATS_MAX_SIZE]
+
+
+class FormulaCell(ReadOnlyCell):
+    """
+    Read-only cell holding the cached value together with the formula text.
+
+    Style properties (``font``, ``alignment``, ``number_format``...) are
+    resolved through the workbook exactly like openpyxl's ``ReadOnlyCell``.
+    """
+
+    __slots__ = ('formula',)
+
+    def __init__(self, sheet, row, column, value, data_type='n', style_id=0, formula=None):
+        super().__init__(sheet, row, column, value, data_type, style_id)
+        self.formula = formula
+
+    @property
+    def style_id(self):
+        """Index of the cell's style in the workbook's cell style list"""
+        return self._style_id
+
+
+class _DualValueParser(WorkSheetParser):
+    """Worksheet parser that records the formula next to the cached value"""
+
+    def parse_cell(self, element):
+        # The parser runs with data_only=True, so 'value' is the cached value
+        cell = super().parse_cell(element)
+        formula = None
+        if element.find(FORMULA_TAG) is not None:
+            formula = self.parse_formula(element)
+            # Array and data table formulae are not plain strings, skip them
+            if not isinstance(formula, str):
+                formula = None
+        cell['formula'] = formula
+        return cell
+
+
+def _open_parser(worksheet, src):
+    """Create a dual value parser for the XML source of a read-only worksheet"""
+    workbook = worksheet.parent
+    return _DualValueParser(
+        src,
+        worksheet._shared_strings,
+        data_only=True,
+        epoch=workbook.epoch,
+        date_formats=workbook._date_formats,
+        timedelta_formats=workbook._timedelta_formats,
+    )
+
+
+def read_merged_ranges(worksheet, chunk_size=1 << 20):
+    """
+    Collect the merged ranges of a sheet without building an XML tree.
+
+    ``<mergeCells>`` comes after ``<sheetData>`` in the sheet part, so a
+    streaming conversion has to know the ranges before it reaches them. The
+    raw part is scanned chunk by chunk with a regular expression, which keeps
+    memory constant and is much cheaper than parsing the cells.
+    """
+    return scan_sheet_layout(worksheet, chunk_size, bounds=False).merged_ranges
+
+
+def scan_sheet_layout(worksheet, chunk_size=1 << 20, bounds=True):
+    """
+    Collect the merged ranges of a sheet, and with bounds the extent of its cells, in one raw scan of its part
+
+    The ``<dimension>`` element of a sheet is written by the application
+    that saved it and can be stale; the references of the cells themselves
+    cannot. They are matched with a regular expression, much cheaper than
+    parsing the cells. If a cell has no reference (it is optional), the
+    bounds are unknown and returned as None.
+
+    Returns:
+    --------
+    SheetLayout
+        merged_ranges, max_row and max_column (0 for a sheet without cells)
+    """
+    ranges = []
+    max_row = max_column = 0
+    columns = set()
+    complete = True
+    tail = b""
+    with worksheet._get_source() as src:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                body, tail = tail, b""
+            else:
+                # Keep a tag that may be cut by the chunk boundary for the next round
+                data = tail + chunk
+                cut = max(data.rfind(b'<'), 0)
+                body, tail = data[:cut], data[cut:]
+            if bounds and complete:
+                if b':c ' in body:
+                    # Namespace-prefixed cells, seldom seen: the slower general expressions
+                    refs = [letters for letters, _ in CELL_REF_RE.findall(body)]
+                    tags = len(CELL_TAG_RE.findall(body))
+                else:
+                    refs = CELL_COLUMN_RE.findall(body)
+                    tags = body.count(b'<c ') + body.count(b'<c>') + body.count(b'<c/>')
+                if len(refs) != tags:
+                    complete = False
+                elif refs:
+                    columns.update(refs)
+                    # Rows are stored in ascending order: the last reference has the highest row
+                    last = CELL_ROW_RE.match(body, body.rfind(b'c r="'))
+                    if last:
+                        max_row = max(max_row, int(last.group(1)))
+            # Nearly every chunk is cell data: a plain substring search
+            # skips it much faster than the regular expression
+            if b'mergeCell' in body:
+                ranges.extend(CellRange(match.group(1).decode('ascii')) for match in MERGE_CELL_RE.finditer(body))
+            if not chunk:
+                break
+    if not bounds or not complete:
+        return SheetLayout(ranges, None, None)
+    if columns:
+        max_column = max(column_index_from_string(letters.decode('ascii')) for letters in columns)
+    return SheetLayout(ranges, max_row, max_column)
+
+
+class SheetData:
+    """
+    Cells, merged ranges and bounds of one worksheet, parsed in a single pass.
+
+    Mirrors the subset of the openpyxl ``Worksheet`` API used by the
+    converter: ``cell()``, ``iter_rows()``, ``merged_cells``, ``max_row`` and
+    ``max_column``. The rows holding data (a value or a formula) and their
+    extent are recorded while parsing, see ``data_rows`` and
+    ``max_data_column``.
+
+    With a ``SheetWindow``, only the cells inside it are kept and parsing
+    stops at the first row below it; ``min_column`` is then the window's
+    first column.
+    """
+
+    def __init__(self, worksheet, window=None):
+        self._worksheet = worksheet
+        self.title = worksheet.title
+        self._cells = {}
+        # Row index -> last column holding data in that row
+        self._row_extents = {}
+        self.max_row = 0
+        self.max_column = 0
+        self.min_column = window.min_col if window else 1
+
+        complete = True
+        with worksheet._get_source() as src:
+            parser = _open_parser(worksheet, src)
+            for row_idx, row in parser.parse():
+                if window is not None:
+                    if row_idx > window.max_row:
+                        complete = False
+                        break
+                    if row_idx < window.min_row:
+                        continue
+                    row = _window_cells(row, window)
+                for cell in row:
+                    row_idx, column = cell['row'], cell['column']
+                    self._cells[(row_idx, column)] = FormulaCell(worksheet, **cell)
+                    if row_idx > self.max_row:
+                        self.max_row = row_idx
+                    if column > self.max_column:
+                        self.max_column = column
+                    if cell['value'] is not None or cell['formula'] is not None:
+                        if column > self._row_extents.get(row_idx, 0):
+                            self._row_extents[row_idx] = column
+
+        ranges = []
+        if not complete:
+            # <mergeCells> comes after the rows that were not parsed
+            ranges = read_merged_ranges(worksheet)
+        elif parser.merged_cells:
+            ranges = [CellRange(merged.ref) for merged in parser.merged_cells.mergeCell]
+        self._set_merged_ranges(ranges)
+
+    def _set_merged_ranges(self, ranges):
+        """Record the merged ranges, dropping the content of their non-anchor cells"""
+        # Like openpyxl, only the top-left cell of a merged range keeps its content
+        changed_rows = set()
+        for merged_range in ranges:
+            anchor = (merged_range.min_row, merged_range.min_col)
+            for coord in merged_range.cells:
+                if coord != anchor and self._cells.pop(coord, None) is not None:
+                    changed_rows.add(coord[0])
+        for row_idx in changed_rows:
+            self._update_row_extent(row_idx)
+        self.merged_cells = MultiCellRange(ranges)
+
+    def _update_row_extent(self, row_idx):
+        """Recompute the data extent of one row after cells were removed"""
+        extent = 0
+        for col_idx in range(1, self._row_extents.get(row_idx, 0) + 1):
+            cell = self._cells.get((row_idx, col_idx))
+            if cell is not None and (cell.value is not None or cell.formula is not None):
+                extent = col_idx
+        if extent:
+            self._row_extents[row_idx] = extent
+        else:
+            self._row_extents.pop(row_idx, None)
+
+    @property
+    def data_rows(self):
+        """Sorted indices of the rows holding at least one value or formula"""
+        return sorted(self._row_extents)
+
+    @property
+    def max_data_column(self):
+        """Last column holding a value or formula in any row (0 for an empty sheet)"""
+        return max(self._row_extents.values(), default=0)
+
+    def cell(self, row, column):
+        """Return the cell at (row, column), or an empty default-styled cell"""
+        cell = self._cells.get((row, column))
+        if cell is None:
+            cell = FormulaCell(self._worksheet, row, column, None)
+        return cell
+
+    def iter_rows(self):
+        """Yield every row from 1 to max_row as a tuple of cells"""
+        for row_idx in range(1, self.max_row + 1):
+            yield tuple(self.cell(row_idx, col_idx) for col_idx in range(1, self.max_column + 1))
+
+
+class SheetStream:
+    """
+    Forward-only view of one worksheet for constant-memory conversion.
+
+    Rows are parsed and handed out one at a time and nothing is kept once a
+    row has been consumed. The merged ranges and the extent of the cells come
+    from a light pre-scan of the part (see ``scan_sheet_layout``), which also
+    verifies the sheet's ``<dimension>`` element: the table is as wide as the
+    larger of the two, so a stale dimension does not drop columns. With a
+    ``SheetWindow``, rows and columns outside it are dropped and the stream
+    ends below its last row.
+    """
+
+    def __init__(self, worksheet, window=None):
+        self._worksheet = worksheet
+        self._window = window
+        self.title = worksheet.title
+        layout = scan_sheet_layout(worksheet)
+        if layout.max_column is None:
+            # Cells without a reference: size the sheet with an extra parsing pass
+            worksheet.reset_dimensions()
+            worksheet.calculate_dimension(force=True)
+            layout = layout._replace(max_row=0, max_column=0)
+        self.max_row = max(worksheet.max_row or 0, layout.max_row)
+        self.max_column = max(worksheet.max_column or 0, layout.max_column)
+        self.min_column = 1
+        if window is not None:
+            self.max_row = min(self.max_row, window.max_row)
+            self.max_column = min(self.max_column, window.max_col)
+            self.min_column = window.min_col
+        self.merged_cells = MultiCellRange(layout.merged_ranges)
+
+    def cell(self, row, column):
+        """Return an empty default-styled cell at (row, column)"""
+        return FormulaCell(self._worksheet, row, column, None)
+
+    def iter_rows(self):
+        """Yield (row index, {column: cell}) for each row stored in the sheet"""
+        window = self._window
+        with self._worksheet._get_source() as src:
+            parser = _open_parser(self._worksheet, src)
+            for row_idx, row in parser.parse():
+                if window is not None:
+                    if row_idx > window.max_row:
+                        break
+                    if row_idx < window.min_row:
+                        continue
+                    row = _window_cells(row, window)
+                yield row_idx, {cell['column']: FormulaCell(self._worksheet, **cell) for cell in row}
+
+
+class SinglePassWorkbook:
+    """
+    Workbook opened once, with sheets parsed on demand.
+
+    Shared strings and styles are read a single time when the workbook is
+    opened; each ``workbook[sheet_name]`` (or ``load()``) access parses that
+    sheet's XML part once and returns a ``SheetData``.
+    """
+
+    engine = 'openpyxl'
+    format = 'xlsx'
+    reads_formulas = True
+    has_part_checksums = True
+
+    def __init__(self, excel_file):
+        self.excel_file = excel_file
+        self._workbook = open_lazy_workbook(excel_file)
+
+    @property
+    def sheetnames(self):
+        return self._workbook.sheetnames
+
+    def __getitem__(self, sheet_name):
+        return self.load(sheet_name)
+
+    def load(self, sheet_name, window=None):
+        """Parse a sheet, or only the part of it inside a ``SheetWindow``, into a ``SheetData``"""
+        return SheetData(self._workbook[sheet_name], window)
+
+    def cell_styles(self):
+        """
+        Font, alignment and number format code of every cell style, indexed by style id
+
+        Each distinct style is resolved once here, so callers can build a
+        per-workbook lookup table instead of going through the style proxies
+        of every cell.
+        """
+        workbook = self._workbook
+        return [(workbook._fonts[style.fontId], workbook._alignments[style.alignmentId],
+                 _number_format_code(workbook, style.numFmtId))
+                for style in workbook._cell_styles]
+
+    def part_checksum(self, part_name):
+        """
+        Checksum of a zip part, taken from its CRC-32 and size in the zip directory
+
+        Nothing is decompressed, so this is free even for huge parts.
+        """
+        return _part_checksum(self._workbook._archive, part_name)
+
+    def sheet_checksum(self, sheet_name):
+        """Checksum of the XML part of a sheet"""
+        return self.part_checksum(self._workbook[sheet_name]._worksheet_path)
+
+    def shared_checksums(self):
+        """Checksums of the workbook, shared strings and styles parts, keyed by part name"""
+        return _shared_checksums(self._workbook._archive)
+
+    def stream(self, sheet_name, window=None):
+        """Return a forward-only ``SheetStream`` for a sheet, optionally limited to a ``SheetWindow``"""
+        return SheetStream(self._workbook[sheet_name], window)
+
+    def close(self):
+        """Close the underlying zip archive"""
+        self._workbook.close()
+
+
+def _calamine_value(value):
+    """Convert a value read by calamine to the value openpyxl would give"""
+    if value == '':
+        return None
+    if type(value) is float and value.is_integer() and abs(value) < MAX_EXACT_INT:
+        return int(value)
+    if type(value) is datetime.date:
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+class ValueCell:
+    """Cell of a values-only reader: no formula and the default style"""
+
+    __slots__ = ('row', 'column', 'value')
+
+    formula = None
+    style_id = 0
+
+    def __init__(self, row, column, value=None):
+        self.row = row
+        self.column = column
+        self.value = value
+
+
+def _calamine_merged_ranges(sheet):
+    """Merged ranges of a calamine sheet as openpyxl CellRanges"""
+    return [CellRange(min_row=first[0] + 1, min_col=first[1] + 1, max_row=last[0] + 1, max_col=last[1] + 1)
+            for first, last in sheet.merged_cell_ranges or ()]
+
+
+def _iter_calamine_rows(sheet, window=None):
+    """Yield (row index, {column: ValueCell}) for the non-empty cells of a calamine sheet"""
+    if sheet.start is None:
+        return
+    # to_python() starts at the first row and column holding data
+    first_row, first_col = sheet.start
+    nrows = None
+    col_start, col_stop = 0, None
+    if window is not None:
+        if window.max_row <= first_row:
+            return
+        # Rows below the window are not converted to Python objects at all
+        nrows = window.max_row - first_row
+        col_start = max(window.min_col - first_col - 1, 0)
+        col_stop = max(window.max_col - first_col, 0)
+    for row_offset, values in enumerate(sheet.to_python(nrows=nrows), start=first_row + 1):
+        if window is not None:
+            if row_offset < window.min_row:
+                continue
+            values = values[col_start:col_stop]
+        cells = {}
+        for col_idx, value in enumerate(values, start=first_col + col_start + 1):
+            value = _calamine_value(value)
+            if value is not None:
+                cells[col_idx] = ValueCell(row_offset, col_idx, value)
+        if cells:
+            yield row_offset, cells
+
+
+class CalamineSheetData(SheetData):
+    """``SheetData`` of a sheet read with calamine: values only, default style everywhere"""
+
+    def __init__(self, sheet, window=None):
+        self.title = sheet.name
+        self._cells = {}
+        self._row_extents = {}
+        self.max_row = 0
+        self.max_column = 0
+        self.min_column = window.min_col if window else 1
+
+        for row_idx, cells in _iter_calamine_rows(sheet, window):
+            for col_idx, cell in cells.items():
+                self._cells[(row_idx, col_idx)] = cell
+            self.max_row = row_idx
+            self._row_extents[row_idx] = max(cells)
+            self.max_column = max(self.max_column, self._row_extents[row_idx])
+        self._set_merged_ranges(_calamine_merged_ranges(sheet))
+
+    def cell(self, row, column):
+        """Return the cell at (row, column), or an empty cell"""
+        cell = self._cells.get((row, column))
+        if cell is None:
+            cell = ValueCell(row, column)
+        return cell
+
+
+class CalamineSheetStream:
+    """``SheetStream`` of a sheet read with calamine; rows are converted one at a time"""
+
+    def __init__(self, sheet, window=None):
+        self._sheet = sheet
+        self._window = window
+        self.title = sheet.name
+        if sheet.start is None:
+            self.max_row = self.max_column = 0
+        else:
+            self.max_row = sheet.end[0] + 1
+            self.max_column = sheet.end[1] + 1
+        self.min_column = 1
+        if window is not None:
+            self.max_row = min(self.max_row, window.max_row)
+            self.max_column = min(self.max_column, window.max_col)
+            self.min_column = window.min_col
+        self.merged_cells = MultiCellRange(_calamine_merged_ranges(sheet))
+
+    def cell(self, row, column):
+        """Return an empty cell at (row, column)"""
+        return ValueCell(row, column)
+
+    def iter_rows(self):
+        """Yield (row index, {column: cell}) for each row holding data"""
+        return _iter_calamine_rows(self._sheet, self._window)
+
+
+class CalamineWorkbook:
+    """
+    Workbook read with python-calamine, with the interface of ``SinglePassWorkbook``
+
+    Much faster than openpyxl, but only cell values and merged ranges are
+    available: every cell has the default style and no formula. Reads .xlsx,
+    .xls and .xlsb workbooks; the zip part checksums used by incremental
+    conversions only exist for .xlsx (see ``has_part_checksums``).
+    """
+
+    engine = 'calamine'
+    reads_formulas = False
+
+    def __init__(self, excel_file):
+        if python_calamine is None:
+            raise ImportError("The calamine engine needs python-calamine (pip install python-calamine)")
+        self.excel_file = excel_file
+        self.format = detect_format(excel_file)
+        if _extension_format(excel_file) == self.format:
+            self._workbook = python_calamine.CalamineWorkbook.from_path(os.fspath(excel_file))
+        else:
+            # calamine picks its reader from the extension, a misnamed file
+            # is handed over as a file object so that its content is sniffed
+            with open(excel_file, 'rb') as f:
+                self._workbook = python_calamine.CalamineWorkbook.from_filelike(f)
+        self._reader = None
+
+    @property
+    def has_part_checksums(self):
+        """Whether part checksums are available (only .xlsx packages have XML parts)"""
+        return self.format == 'xlsx'
+
+    @property
+    def sheetnames(self):
+        return self._workbook.sheet_names
+
+    def __getitem__(self, sheet_name):
+        return self.load(sheet_name)
+
+    def load(self, sheet_name, window=None):
+        """Read a sheet, or only the part of it inside a ``SheetWindow``, into a ``CalamineSheetData``"""
+        return CalamineSheetData(self._workbook.get_sheet_by_name(sheet_name), window)
+
+    def stream(self, sheet_name, window=None):
+        """Return a forward-only ``CalamineSheetStream`` for a sheet, optionally limited to a ``SheetWindow``"""
+        return CalamineSheetStream(self._workbook.get_sheet_by_name(sheet_name), window)
+
+    def cell_styles(self):
+        """A single default style, used by every cell"""
+        return [(Font(), Alignment(), 'General')]
+
+    def _package(self):
+        """openpyxl reader of the package structure, opened for the part checksums only"""
+        if self._reader is None:
+            self._reader = ExcelReader(self.excel_file, read_only=True)
+            self._reader.read_manifest()
+            self._reader.read_workbook()
+        return self._reader
+
+    def part_checksum(self, part_name):
+        """Checksum of a zip part, taken from its CRC-32 and size in the zip directory"""
+        return _part_checksum(self._package().archive, part_name)
+
+    def sheet_checksum(self, sheet_name):
+        """Checksum of the XML part of a sheet"""
+        for sheet, rel in self._package().parser.find_sheets():
+            if sheet.name == sheet_name:
+                return self.part_checksum(rel.target)
+        raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+    def shared_checksums(self):
+        """Checksums of the workbook, shared strings and styles parts, keyed by part name"""
+        return _shared_checksums(self._package().archive)
+
+    def close(self):
+        """Release the workbook file"""
+        self._workbook.close()
+        if self._reader is not None:
+            self._reader.archive.close()
+            self._reader = None
+
+
+def _file_size(excel_file):
+    try:
+        return os.path.getsize(excel_file)
+    except (OSError, TypeError):
+        return 0
+
+
+def select_engine(excel_file, engine='auto', values_only=False, window=None):
+    """
+    Pick the reader engine for a workbook
+
+    Parameters:
+    -----------
+    excel_file : str
+        Path to the workbook
+    engine : str, optional
+        'openpyxl', 'calamine' or 'auto'
+    values_only : bool, optional
+        Whether only cell values are needed. Formatting and formulas can only
+        be read by openpyxl.
+    window : SheetWindow, optional
+        Part of the sheets that will be read. calamine always reads whole
+        sheets, while openpyxl stops at the last row of the window, so 'auto'
+        keeps openpyxl for windows that end before the bottom of the sheet.
+
+    With 'auto', calamine is used when only values are needed, python-calamine
+    is installed and the file is at least CALAMINE_MIN_BYTES; otherwise
+    openpyxl. Legacy .xls and .xlsb workbooks (see detect_format) can only be
+    read by calamine, which is then picked even if formatting or formulas were
+    asked for: their cells are rendered as plain values.
+
+    Returns:
+    --------
+    str
+        'openpyxl' or 'calamine'
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+    workbook_format = detect_format(excel_file)
+    if workbook_format in BINARY_FORMATS:
+        if engine == 'openpyxl':
+            raise ValueError(f"openpyxl cannot read .{workbook_format} workbooks, use the calamine engine")
+        if python_calamine is None:
+            raise ImportError(f".{workbook_format} workbooks are read with python-calamine "
+                              "(pip install python-calamine)")
+        return 'calamine'
+    if engine == 'calamine':
+        if python_calamine is None:
+            raise ImportError("The calamine engine needs python-calamine (pip install python-calamine)")
+        if not values_only:
+            raise ValueError("The calamine engine only reads values; formatting and formulas need openpyxl")
+        return engine
+    if engine == 'auto' and values_only and python_calamine is not None \
+            and (window is None or window.max_row == MAX_ROWS) \
+            and _file_size(excel_file) >= CALAMINE_MIN_BYTES:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def open_workbook(excel_file, engine='openpyxl'):
+    """Open a workbook with the given engine ('openpyxl' or 'calamine', see select_engine)"""
+    if engine == 'calamine':
+        return CalamineWorkbook(excel_file)
+    return SinglePassWorkbook(excel_file)